@@ -0,0 +1,133 @@
+import resource
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+from utils.admission import admission
+from utils.audit_log import audit_log
+from utils.compact_dataset import memory_report
+from utils.request_profiling import request_profiler
+from utils.single_flight import single_flight_stats
+
+# -------------------------------------------------
+# FastAPI Router
+# -------------------------------------------------
+router = APIRouter()
+
+@router.get("/single-flight")
+def get_single_flight_stats(top: int = 20):
+    """
+    GET /api/admin/single-flight?top=20
+
+    Request coalescing per group: how many requests shared an in-flight
+    computation instead of starting their own, overall and for the
+    busiest keys.
+    """
+    return single_flight_stats(top)
+
+@router.get("/admission")
+async def get_admission_stats():
+    """
+    GET /api/admin/admission
+
+    Admission lanes (operations / interactive / analytics): running and
+    queued requests, limits, shed and timed-out counts, queue wait
+    percentiles. Async so it reads the controller on the event loop.
+    """
+    return admission.stats()
+
+@router.get("/profiles")
+def list_request_profiles():
+    """
+    GET /api/admin/profiles
+
+    Recent request profiles, newest first (requested with X-Profile: 1 /
+    ?profile=1 when PROFILING_ENABLED=1, or captured for slow requests)
+    """
+    return {
+        "config": request_profiler.config(),
+        "profiles": request_profiler.list_profiles()
+    }
+
+@router.get("/profiles/{profile_id}")
+def get_request_profile(profile_id: int):
+    """
+    GET /api/admin/profiles/{id}
+
+    Hottest frames (self and cumulative sample counts) and collapsed
+    stacks, ready for flamegraph tools
+    """
+    profile = request_profiler.get_profile(profile_id)
+    if profile is None:
+        return {"error": f"Profile {profile_id} not found (only the latest are kept)"}
+    return profile
+
+@router.get("/slow-requests")
+def list_slow_requests(limit: int = 50):
+    """
+    GET /api/admin/slow-requests?limit=50
+
+    Requests slower than SLOW_REQUEST_MS, newest first
+    """
+    return {
+        "slow_request_ms": request_profiler.slow_ms,
+        "requests": list(reversed(request_profiler.slow_log))[:limit]
+    }
+
+@router.get("/audit")
+def get_audit_log_stats():
+    """
+    GET /api/admin/audit
+
+    Audit writer health: queue depth and high-water mark, records
+    written / dropped, batch sizes and write latency
+    """
+    return audit_log.stats()
+
+@router.get("/audit/records")
+def list_audit_records(kind: Optional[str] = None, since: Optional[float] = None,
+                       limit: int = Query(50, ge=1, le=1000)):
+    """
+    GET /api/admin/audit/records?kind=induction.recommend&limit=50
+
+    Logged request/response pairs, newest first (`since` is a Unix time)
+    """
+    return {"records": audit_log.records(kind=kind, since=since, limit=limit)}
+
+@router.post("/weather-forecast/refresh")
+def refresh_weather_forecast():
+    """
+    POST /api/admin/weather-forecast/refresh
+
+    Re-fetches today's hourly forecast now, ignoring the once-a-day and
+    retry limits (each call spends weather API quota)
+    """
+    from api.demand_api import get_forecast_store
+
+    store = get_forecast_store()
+    forecast = store.refresh(force=True)
+    if forecast is None:
+        return {"error": "No weather forecast available", "status": store.status()}
+    return {"status": store.status()}
+
+@router.get("/memory")
+def get_memory_report(baseline: bool = False):
+    """
+    GET /api/admin/memory?baseline=false
+
+    Footprint of the in-process timetable dataset per column (deep bytes,
+    category counts) and this worker's peak RSS. With baseline=true the
+    CSV is also read with default dtypes, once, to show what the compact
+    layout saves.
+    """
+    import pandas as pd
+    from api.demand_api import PROCESSED_DATA_PATH, get_historical_data
+
+    data = get_historical_data()
+    if data is None:
+        return {"error": "Historical data not available"}
+
+    report = memory_report(data, pd.read_csv(PROCESSED_DATA_PATH) if baseline else None)
+    # ru_maxrss is in kilobytes on Linux
+    report["process_max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return report
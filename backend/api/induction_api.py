@@ -1,15 +1,54 @@
 import os
 import joblib
+import time
 import numpy as np
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from datetime import datetime
+from statistics import NormalDist
+from fastapi import APIRouter, Request
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Union
+
+from utils.audit_log import audit_log
+from utils.backtest import (
+    DEFAULT_CHUNK_DAYS,
+    DEFAULT_NOISE,
+    CostGreedyPolicy,
+    DayPlanPolicy,
+    FixedPolicy,
+    StatePolicy,
+    date_range,
+    demand_profiles,
+    observed_demand,
+    run_backtest,
+    synthetic_demand
+)
+from utils.fleet_optimizer import (
+    DEFAULT_ENERGY_COST,
+    DEFAULT_FLEET_SIZE,
+    DEFAULT_MAX_HEADWAY,
+    DEFAULT_MAX_RAMP,
+    DEFAULT_MIN_HEADWAY,
+    TRAIN_CAPACITY,
+    cost_table,
+    plan_deployment
+)
+from utils.rostering import (
+    DEFAULT_INDUCTION_LEAD_MINUTES,
+    DEFAULT_TURNAROUND_MINUTES,
+    build_roster,
+    default_fleet,
+    load_trip_summaries
+)
+from utils.service_calendar import get_service_calendar
+from utils.serialization import encoded_response
+from utils.single_flight import single_flight
 
 # -------------------------------------------------
 # Path configuration
 # -------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 MODEL_DIR = os.path.join(BASE_DIR, "model")
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
 
 # -------------------------------------------------
 # Load RL Q-table
@@ -26,13 +65,25 @@ except Exception:
 # -------------------------------------------------
 MIN_TRAINS = 2
 MAX_TRAINS = 10
+DEMAND_LEVEL_THRESHOLDS = (3000, 6000)
+MAX_BACKTEST_DAYS = 3660
 
 # -------------------------------------------------
 # Pydantic models
 # -------------------------------------------------
+class DemandDistribution(BaseModel):
+    # Equally weighted quantiles (as returned by /api/demand/predict),
+    # or a mean/std pair approximated by normal quantiles
+    quantiles: Optional[List[float]] = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+
 class InductionRequest(BaseModel):
     predicted_demand: int
     is_peak_hour: int
+    demand_distribution: Optional[DemandDistribution] = None
+    hour: Optional[int] = None        # with live delays: adjust metrics for that hour
+    day_type: str = "weekday"
 
 class InductionResponse(BaseModel):
     recommended_trains: int
@@ -42,8 +93,50 @@ class InductionResponse(BaseModel):
     expected_waiting_time: float
     overcrowding_risk: str
     q_values: Optional[Dict[int, float]] = None
+    expected_cost: Optional[Dict[int, float]] = None
+    overcrowding_probability: Optional[float] = None
+    realtime_headway: Optional[float] = None
+    realtime_waiting_time: Optional[float] = None
+    realtime_overcrowding_risk: Optional[str] = None
+    canceled_departures: Optional[int] = None
     explanation: str
 
+class DeploymentPlanRequest(BaseModel):
+    hourly_demand: List[float] = Field(min_length=1)
+    start_hour: int = Field(0, ge=0, le=23)
+    fleet_size: int = Field(DEFAULT_FLEET_SIZE, ge=1)
+    unavailable_trains: Union[int, List[int]] = 0
+    min_headway: float = Field(DEFAULT_MIN_HEADWAY, gt=0)  # minutes
+    max_headway: float = Field(DEFAULT_MAX_HEADWAY, gt=0)
+    max_ramp: int = Field(DEFAULT_MAX_RAMP, ge=0)
+    initial_trains: Optional[int] = Field(None, ge=0)  # at most fleet_size
+    energy_cost: float = DEFAULT_ENERGY_COST
+
+class RakeStatus(BaseModel):
+    rake_id: str
+    fit: bool = True
+    mileage_km: float = 0.0
+    km_to_maintenance: Optional[float] = None
+
+class RosterRequest(BaseModel):
+    service_id: str = "WK"
+    # YYYY-MM-DD; when set, the service running that day replaces service_id
+    service_date: Optional[str] = None
+    rakes: Optional[List[RakeStatus]] = None
+    fleet_size: int = Field(DEFAULT_FLEET_SIZE, ge=1)
+    turnaround_minutes: float = Field(DEFAULT_TURNAROUND_MINUTES, ge=0)
+    induction_lead_minutes: float = Field(DEFAULT_INDUCTION_LEAD_MINUTES, ge=0)
+
+class BacktestRequest(BaseModel):
+    start_date: str                  # YYYY-MM-DD
+    end_date: str                    # YYYY-MM-DD, inclusive
+    source: str = "synthetic"        # "synthetic" (model + calendar) or "observed"
+    policies: Optional[List[str]] = None
+    baseline: str = "rule-based-fallback"
+    noise: float = DEFAULT_NOISE
+    seed: int = 0
+    chunk_days: int = Field(DEFAULT_CHUNK_DAYS, ge=1)
+
 class InductionDetailedResponse(BaseModel):
     recommended_trains: int
     confidence: int
@@ -54,10 +147,30 @@ class InductionDetailedResponse(BaseModel):
     demand_level: int
     state: tuple
     q_values: Dict[int, float]
+    expected_cost: Optional[Dict[int, float]] = None
+    overcrowding_probability: Optional[float] = None
     all_actions: List[int]
     rl_model_loaded: bool
+    realtime_headway: Optional[float] = None
+    realtime_waiting_time: Optional[float] = None
+    realtime_overcrowding_risk: Optional[str] = None
+    canceled_departures: Optional[int] = None
     explanation: str
 
+# -------------------------------------------------
+# Timetable trip summaries (read once, on first roster request)
+# -------------------------------------------------
+_trip_summaries = None
+
+def get_trip_summaries():
+    global _trip_summaries
+    if _trip_summaries is None:
+        _trip_summaries = load_trip_summaries(
+            os.path.join(RAW_DIR, "stop_times.csv"),
+            os.path.join(RAW_DIR, "trips.csv")
+        )
+    return _trip_summaries
+
 # -------------------------------------------------
 # Helper functions
 # -------------------------------------------------
@@ -65,9 +178,9 @@ def get_demand_level(demand: int) -> int:
     """
     Discretize continuous demand into RL states
     """
-    if demand < 3000:
+    if demand < DEMAND_LEVEL_THRESHOLDS[0]:
         return 0
-    elif demand < 6000:
+    elif demand < DEMAND_LEVEL_THRESHOLDS[1]:
         return 1
     else:
         return 2
@@ -140,36 +253,124 @@ def generate_explanation(demand_level: int, is_peak: int, trains_deployed: int,
     )
     return explanation
 
-# -------------------------------------------------
-# FastAPI Router
-# -------------------------------------------------
-router = APIRouter()
+def realtime_adjustment(data: InductionRequest, trains: int, headway: float, waiting_time: float) -> dict:
+    """
+    Live headway, waiting time and risk for the request's hour
 
-@router.post("/recommend", response_model=InductionResponse)
-def recommend_trains(data: InductionRequest):
+    The timetable's live/scheduled ratios (mean headway, and waiting
+    time, which also grows with bunching) scale the planned figures, so
+    a disruption degrades the recommendation's service proportionally.
+    Empty without an hour or when the hour has no service.
     """
-    POST /api/induction/recommend
+    if data.hour is None or not 0 <= data.hour < 24:
+        return {}
+    from api.line_api import get_realtime_timetable, status_service
 
-    RL State  : (demand_level, is_peak_hour)
-    RL Action : number of trains to deploy
-    
-    Returns detailed recommendation with operational metrics
+    service = status_service(data.day_type)
+    if service is None:
+        return {}
+    line = get_realtime_timetable().line_headway(service, data.hour)
+    live, scheduled = line["live"], line["scheduled"]
+    if not live["headway"] or not scheduled["headway"] or not scheduled["waiting_time"]:
+        return {}
+
+    headway_ratio = live["headway"] / scheduled["headway"]
+    effective_trains = max(int(trains / headway_ratio), 1)
+    return {
+        "realtime_headway": round(headway * headway_ratio, 1),
+        "realtime_waiting_time": round(waiting_time * live["waiting_time"] / scheduled["waiting_time"], 1),
+        "realtime_overcrowding_risk": assess_overcrowding_risk(get_demand_level(data.predicted_demand),
+                                                               data.is_peak_hour, effective_trains),
+        "canceled_departures": line["canceled_departures"]
+    }
+
+DISTRIBUTION_LEVELS = [round(0.05 + 0.1 * i, 2) for i in range(10)]
+_STANDARD_NORMAL = NormalDist()
+
+def demand_samples(distribution: DemandDistribution) -> Optional[np.ndarray]:
+    """
+    Equally weighted demand scenarios from a request distribution
+    """
+    if distribution.quantiles:
+        return np.maximum(np.asarray(distribution.quantiles, dtype=float), 0.0)
+    if distribution.mean is not None:
+        z = np.array([_STANDARD_NORMAL.inv_cdf(p) for p in DISTRIBUTION_LEVELS])
+        return np.maximum(distribution.mean + z * (distribution.std or 0.0), 0.0)
+    return None
+
+def expected_cost_policy(samples: np.ndarray, actions: List[int]):
+    """
+    Pick the action with the lowest expected waiting + energy cost
+
+    Cost per scenario comes from the fleet optimizer's cost table, so
+    single-hour and whole-day decisions use the same objective.
+    Confidence is the share of scenarios in which the chosen action is
+    also the individually optimal one.
+    """
+    table = cost_table(samples, MAX_TRAINS)[:, actions]
+    expected = table.mean(axis=0)
+    best = int(np.argmin(expected))
+
+    confidence = int(round(100 * np.mean(np.argmin(table, axis=1) == best)))
+    overcrowding = float(np.mean(samples > actions[best] * TRAIN_CAPACITY))
+    costs = {action: round(float(c), 1) for action, c in zip(actions, expected)}
+    return actions[best], confidence, costs, round(overcrowding, 3)
+
+def select_action(data: InductionRequest):
+    """
+    Shared decision logic for /recommend and /detailed
     """
     demand_level = get_demand_level(data.predicted_demand)
     state = (demand_level, data.is_peak_hour)
     actions = list(range(MIN_TRAINS, MAX_TRAINS + 1))
 
     if rl_ready:
-        q_values = {action: q_table.get((state, action), 0.0) for action in actions}
-        best_action = actions[int(np.argmax([q_values[a] for a in actions]))]
-        confidence = 92
-        policy = "reinforcement-learning"
+        q_values = {action: float(q_table.get((state, action), 0.0)) for action in actions}
     else:
-        best_action = fallback_policy(demand_level, data.is_peak_hour)
-        confidence = 78
-        policy = "rule-based-fallback"
         q_values = {action: 0.0 for action in actions}
 
+    samples = demand_samples(data.demand_distribution) if data.demand_distribution else None
+    decision = {
+        "demand_level": demand_level,
+        "state": state,
+        "actions": actions,
+        "q_values": q_values,
+        "expected_cost": None,
+        "overcrowding_probability": None
+    }
+
+    if samples is not None and len(samples):
+        best_action, confidence, costs, overcrowding = expected_cost_policy(samples, actions)
+        decision.update({
+            "best_action": best_action,
+            "confidence": confidence,
+            "policy": "risk-aware-expected-cost",
+            "expected_cost": costs,
+            "overcrowding_probability": overcrowding
+        })
+    elif rl_ready:
+        decision.update({
+            "best_action": actions[int(np.argmax([q_values[a] for a in actions]))],
+            "confidence": 92,
+            "policy": "reinforcement-learning"
+        })
+    else:
+        decision.update({
+            "best_action": fallback_policy(demand_level, data.is_peak_hour),
+            "confidence": 78,
+            "policy": "rule-based-fallback"
+        })
+    return decision
+
+def build_recommendation(data: InductionRequest) -> dict:
+    """
+    /recommend response body for one request
+    """
+    decision = select_action(data)
+    best_action = decision["best_action"]
+    demand_level = decision["demand_level"]
+    policy = decision["policy"]
+
     # Calculate operational metrics
     headway = calculate_headway(best_action)
     waiting_time = calculate_waiting_time(headway)
@@ -178,38 +379,111 @@ def recommend_trains(data: InductionRequest):
 
     return {
         "recommended_trains": best_action,
-        "confidence": confidence,
+        "confidence": decision["confidence"],
         "policy": policy,
         "headway": headway,
         "expected_waiting_time": waiting_time,
         "overcrowding_risk": risk,
-        "q_values": q_values,
+        "q_values": decision["q_values"],
+        "expected_cost": decision["expected_cost"],
+        "overcrowding_probability": decision["overcrowding_probability"],
+        **realtime_adjustment(data, best_action, headway, waiting_time),
         "explanation": explanation
     }
 
+def rl_policy_action(demand_level: int, is_peak: int) -> int:
+    """
+    Greedy Q-table action for a state, as /recommend picks it
+    """
+    actions = list(range(MIN_TRAINS, MAX_TRAINS + 1))
+    q_values = [float(q_table.get(((demand_level, is_peak), action), 0.0)) for action in actions]
+    return actions[int(np.argmax(q_values))]
+
+def hourly_rl_policy_action(demand_level: int, is_peak: int, hour: int) -> int:
+    """
+    Greedy action over the Q-table's (level, peak, hour) states, among
+    the actions it has visited; the rule-based fallback when none
+    """
+    visited = {
+        int(action): float(q) for (state, action), q in q_table.items()
+        if len(state) == 3 and tuple(int(x) for x in state) == (demand_level, is_peak, hour)
+        and MIN_TRAINS <= int(action) <= MAX_TRAINS
+    }
+    if not visited:
+        return fallback_policy(demand_level, is_peak)
+    return max(visited, key=visited.get)
+
+def backtest_policies() -> dict:
+    """
+    Every induction policy in the backtest engine's vectorized form
+    """
+    actions = list(range(MIN_TRAINS, MAX_TRAINS + 1))
+    policies = {
+        "rule-based-fallback": StatePolicy.from_function(fallback_policy, DEMAND_LEVEL_THRESHOLDS),
+        "expected-cost": CostGreedyPolicy(actions),
+        "dynamic-programming": DayPlanPolicy(MAX_TRAINS, DEFAULT_MAX_RAMP),
+        "fixed-max": FixedPolicy(MAX_TRAINS)
+    }
+    if rl_ready:
+        policies["reinforcement-learning"] = StatePolicy.from_function(rl_policy_action, DEMAND_LEVEL_THRESHOLDS)
+        policies["reinforcement-learning-hourly"] = StatePolicy.from_function(
+            hourly_rl_policy_action, DEMAND_LEVEL_THRESHOLDS, hourly=True
+        )
+    return policies
+
+def backtest_demand(source: str, days: list, noise: float = DEFAULT_NOISE, seed: int = 0):
+    """
+    (days x 24) demand to replay and the dates it covers
+    """
+    from api.demand_api import get_learner, get_station_forecaster, series_store
+    from utils.timeseries_store import UTC_OFFSET_SECONDS
+
+    if source == "synthetic":
+        profiles = demand_profiles(get_learner().serving, get_station_forecaster())
+        return synthetic_demand(days, profiles, get_service_calendar(), noise, seed), days
+    if source == "observed":
+        demand, has_data = observed_demand(series_store, days, UTC_OFFSET_SECONDS)
+        return demand[has_data], [d for d, keep in zip(days, has_data) if keep]
+    raise ValueError(f"Unknown demand source: {source}")
+
+# -------------------------------------------------
+# FastAPI Router
+# -------------------------------------------------
+router = APIRouter()
+
+@router.post("/recommend", response_model=InductionResponse)
+def recommend_trains(data: InductionRequest, request: Request):
+    """
+    POST /api/induction/recommend
+
+    RL State  : (demand_level, is_peak_hour)
+    RL Action : number of trains to deploy
+    
+    Returns detailed recommendation with operational metrics.
+    With a demand_distribution, the deployment minimizing expected cost
+    across the distribution is chosen instead. The response model
+    documents the body; it is built here, so it is not re-validated.
+    """
+    started = time.perf_counter()
+    result, shared = single_flight("induction.recommend").do(data.model_dump_json(), lambda: build_recommendation(data))
+
+    audit_log.record("induction.recommend", data.model_dump(), result, model_version=result["policy"],
+                     shared=shared, duration_ms=(time.perf_counter() - started) * 1000)
+    return encoded_response(request, result)
+
 
 @router.post("/detailed", response_model=InductionDetailedResponse)
-def recommend_trains_detailed(data: InductionRequest):
+def recommend_trains_detailed(data: InductionRequest, request: Request):
     """
     POST /api/induction/detailed
 
     Extended endpoint providing full Q-table analysis and debug information
     Useful for monitoring and understanding RL model decisions
     """
-    demand_level = get_demand_level(data.predicted_demand)
-    state = (demand_level, data.is_peak_hour)
-    actions = list(range(MIN_TRAINS, MAX_TRAINS + 1))
-
-    if rl_ready:
-        q_values = {action: float(q_table.get((state, action), 0.0)) for action in actions}
-        best_action = actions[int(np.argmax([q_values[a] for a in actions]))]
-        confidence = 92
-        policy = "reinforcement-learning"
-    else:
-        best_action = fallback_policy(demand_level, data.is_peak_hour)
-        confidence = 78
-        policy = "rule-based-fallback"
-        q_values = {action: 0.0 for action in actions}
+    decision = select_action(data)
+    best_action = decision["best_action"]
+    demand_level = decision["demand_level"]
+    policy = decision["policy"]
 
     # Calculate operational metrics
     headway = calculate_headway(best_action)
@@ -217,19 +491,145 @@ def recommend_trains_detailed(data: InductionRequest):
     risk = assess_overcrowding_risk(demand_level, data.is_peak_hour, best_action)
     explanation = generate_explanation(demand_level, data.is_peak_hour, best_action, headway, policy)
 
-    return {
+    return encoded_response(request, {
         "recommended_trains": best_action,
-        "confidence": confidence,
+        "confidence": decision["confidence"],
         "policy": policy,
         "headway": headway,
         "expected_waiting_time": waiting_time,
         "overcrowding_risk": risk,
         "demand_level": demand_level,
-        "state": state,
-        "q_values": q_values,
-        "all_actions": actions,
+        "state": decision["state"],
+        "q_values": decision["q_values"],
+        "expected_cost": decision["expected_cost"],
+        "overcrowding_probability": decision["overcrowding_probability"],
+        "all_actions": decision["actions"],
         "rl_model_loaded": rl_ready,
+        **realtime_adjustment(data, best_action, headway, waiting_time),
         "explanation": explanation
+    })
+
+
+@router.post("/plan")
+def plan_daily_deployment(data: DeploymentPlanRequest):
+    """
+    POST /api/induction/plan
+
+    Integer deployment plan for a horizon of hourly demand (typically 24h)
+    under fleet, maintenance, headway and ramp-up constraints.
+    """
+    if isinstance(data.unavailable_trains, list) and len(data.unavailable_trains) != len(data.hourly_demand):
+        return {"error": "unavailable_trains must have one entry per hour"}
+
+    try:
+        plan = plan_deployment(
+            data.hourly_demand,
+            fleet_size=data.fleet_size,
+            unavailable=data.unavailable_trains,
+            min_headway=data.min_headway,
+            max_headway=data.max_headway,
+            max_ramp=data.max_ramp,
+            initial_trains=data.initial_trains,
+            energy_cost=data.energy_cost
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+
+    hours = [(data.start_hour + h) % 24 for h in range(len(data.hourly_demand))]
+    headway = [float(x) if np.isfinite(x) else None for x in plan["headway"]]
+    waiting = [float(x) if np.isfinite(x) else None for x in plan["expected_waiting_time"]]
+
+    return {
+        "hours": hours,
+        "recommended_trains": plan["trains"].tolist(),
+        "available_trains": plan["available_trains"].tolist(),
+        "headway": headway,
+        "expected_waiting_time": waiting,
+        "load_factor": plan["load_factor"].tolist(),
+        "total_cost": round(plan["total_cost"], 1),
+        "policy": "dynamic-programming",
+        "solve_ms": plan["solve_ms"]
+    }
+
+
+@router.post("/roster")
+def build_rake_roster(data: RosterRequest):
+    """
+    POST /api/induction/roster
+
+    Chains the service day's trips into blocks, assigns fit rakes to them
+    (balancing cumulative mileage, respecting km left before maintenance)
+    and returns the nightly depot induction order.
+    """
+    trips = get_trip_summaries()
+    service_id = data.service_id
+    if data.service_date:
+        try:
+            day = datetime.strptime(data.service_date, "%Y-%m-%d").date()
+        except ValueError:
+            return {"error": "service_date must be YYYY-MM-DD"}
+        # Outside the feed's dates: the plain weekday / weekend service
+        services = get_service_calendar().running_services(day)
+        if not services:
+            return {"error": f"No service runs on {data.service_date}"}
+        service_id = services[0]
+    if service_id not in set(trips["service_id"]):
+        return {"error": f"Unknown service_id: {service_id}"}
+
+    rakes = [r.model_dump() for r in data.rakes] if data.rakes else default_fleet(data.fleet_size)
+    if len({r["rake_id"] for r in rakes}) != len(rakes):
+        return {"error": "rake_id values must be unique"}
+
+    return build_roster(
+        trips,
+        service_id,
+        rakes,
+        turnaround_minutes=data.turnaround_minutes,
+        induction_lead_minutes=data.induction_lead_minutes
+    )
+
+
+@router.post("/backtest")
+def backtest_induction_policies(data: BacktestRequest):
+    """
+    POST /api/induction/backtest
+
+    Replays a date range of hourly demand through the induction policies
+    and compares waiting time, load factor, energy and overcrowding.
+    """
+    try:
+        start = datetime.strptime(data.start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(data.end_date, "%Y-%m-%d").date()
+    except ValueError:
+        return {"error": "Dates must be YYYY-MM-DD"}
+    if end < start:
+        return {"error": "end_date must not be before start_date"}
+    if (end - start).days >= MAX_BACKTEST_DAYS:
+        return {"error": f"At most {MAX_BACKTEST_DAYS} days per backtest"}
+
+    policies = backtest_policies()
+    if data.policies:
+        unknown = sorted(set(data.policies) - set(policies))
+        if unknown:
+            return {"error": f"Unknown policies: {unknown}", "available": sorted(policies)}
+        policies = {name: policies[name] for name in data.policies}
+
+    try:
+        demand, days = backtest_demand(data.source, date_range(start, end), data.noise, data.seed)
+    except ValueError as e:
+        return {"error": str(e)}
+    if not days:
+        return {"error": f"No {data.source} demand between {data.start_date} and {data.end_date}"}
+
+    # In-process: forking the API server (audit writer, profiler and
+    # warm-up threads) per request risks deadlocks. Multi-core runs are
+    # for the backtest.py CLI; the analytics lane bounds concurrency here.
+    report = run_backtest(demand, policies, workers=1, chunk_days=data.chunk_days, baseline=data.baseline)
+    return {
+        "start_date": days[0].isoformat(),
+        "end_date": days[-1].isoformat(),
+        "source": data.source,
+        **report
     }
 
 
@@ -247,5 +647,6 @@ def induction_system_status():
         "max_trains": MAX_TRAINS,
         "q_table_size": len(q_table) if rl_ready else 0,
         "demand_levels": 3,  # Low, Medium, High
-        "policies": ["reinforcement-learning", "rule-based-fallback"]
+        "policies": ["reinforcement-learning", "rule-based-fallback", "risk-aware-expected-cost", "dynamic-programming", "block-rostering"],
+        "backtest_policies": sorted(backtest_policies())
     }
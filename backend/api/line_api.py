@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import datetime
+import numpy as np
+from fastapi import APIRouter, Request
+from typing import Optional
+
+from api.demand_api import (
+    BASE_DIR,
+    TRAIN_CAPACITY,
+    get_learner,
+    get_station_forecaster
+)
+from utils.load_propagation import LoadPropagator
+from utils.realtime_timetable import RealtimeTimetable, parse_feed_protobuf, service_for_day_type
+from utils.serialization import encoded_response
+from utils.service_calendar import get_service_calendar
+from utils.train_positions import TrainPositionEngine
+
+# -------------------------------------------------
+# Path configuration
+# -------------------------------------------------
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+
+# Built on first use (reads the static GTFS feed once)
+_load_propagator = None
+
+def get_load_propagator() -> LoadPropagator:
+    global _load_propagator
+    if _load_propagator is None:
+        _load_propagator = LoadPropagator(
+            get_station_forecaster().stop_ids,
+            os.path.join(RAW_DIR, "stop_times.csv"),
+            os.path.join(RAW_DIR, "trips.csv"),
+            os.path.join(RAW_DIR, "fare_rules.csv"),
+            os.path.join(RAW_DIR, "fare_attributes.csv")
+        )
+    return _load_propagator
+
+# Trip/shape index for live positions (built on first use)
+_position_engine = None
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+def get_position_engine() -> TrainPositionEngine:
+    global _position_engine
+    if _position_engine is None:
+        _position_engine = TrainPositionEngine(
+            os.path.join(RAW_DIR, "stops.csv"),
+            os.path.join(RAW_DIR, "stop_times.csv"),
+            os.path.join(RAW_DIR, "trips.csv"),
+            os.path.join(RAW_DIR, "shapes.csv"),
+            get_service_calendar()
+        )
+    return _position_engine
+
+# Static timetable with live trip delays applied (built on first use)
+_realtime_timetable = None
+
+def get_realtime_timetable() -> RealtimeTimetable:
+    global _realtime_timetable
+    if _realtime_timetable is None:
+        _realtime_timetable = RealtimeTimetable(
+            os.path.join(RAW_DIR, "stops.csv"),
+            os.path.join(RAW_DIR, "stop_times.csv"),
+            os.path.join(RAW_DIR, "trips.csv")
+        )
+    return _realtime_timetable
+
+def status_service(day_type: str = "weekday", date: Optional[datetime.date] = None) -> Optional[str]:
+    """
+    Timetable (service_id) a status query refers to: the calendar's for a
+    date in the feed, otherwise the plain weekday / weekend one
+    """
+    timetable = get_realtime_timetable()
+    calendar = get_service_calendar()
+    if date is not None:
+        running = [s for s in calendar.services_on(date) if s in timetable.service_ids]
+        if running:
+            return running[0]
+        day_type = calendar.day_info(date)["day_type"]
+    weekend = dict(zip(calendar.service_ids, calendar.weekend_services.tolist()))
+    return service_for_day_type(timetable.service_ids, weekend, day_type)
+
+# Line status thresholds: live max gap vs the scheduled one, mean delay
+DISRUPTED_GAP_RATIO = 2.0
+MODERATE_GAP_RATIO = 1.3
+MODERATE_DELAY_S = 120
+
+# -------------------------------------------------
+# FastAPI Router
+# -------------------------------------------------
+router = APIRouter()
+
+@router.get("/load")
+def get_line_load(request: Request, day_type: str = "weekday", start_hour: int = 6, end_hour: int = 22,
+                  date: Optional[datetime.date] = None):
+    """
+    GET /api/line/load?day_type=weekday&start_hour=6&end_hour=22
+
+    On-board load for every inter-station segment, direction and hour,
+    propagated from station-level boardings. The peak-load segment sets
+    how many trains an hour needs. A `date` overrides day_type with the
+    service calendar's (holidays count as weekends).
+    """
+    if not (0 <= start_hour <= 23 and 0 <= end_hour <= 23):
+        return {"error": "start_hour and end_hour must be between 0 and 23"}
+    if start_hour > end_hour:
+        return {"error": "start_hour must not be after end_hour"}
+    if date is not None:
+        day_type = get_service_calendar().day_info(date)["day_type"]
+    boardings = get_station_forecaster().forecast(get_learner().serving, is_weekend=int(day_type == "weekend"))
+    propagation = get_load_propagator().propagate(boardings)
+    hours = slice(start_hour, end_hour + 1)
+
+    directions = []
+    for direction, entry in sorted(propagation.items()):
+        load = entry["load"][hours]
+        peak_segment = entry["peak_segment"][hours]
+        peak_load = entry["peak_load"][hours]
+
+        directions.append({
+            "direction_id": direction,
+            "segments": entry["segments"],
+            "load": np.rint(load).astype(int),   # hours x segments
+            "peak_segment": [entry["segments"][i] for i in peak_segment],
+            "peak_load": np.rint(peak_load).astype(int),
+            "required_trains": np.ceil(peak_load / TRAIN_CAPACITY).astype(int)
+        })
+
+    return encoded_response(request, {
+        "hours": list(range(start_hour, end_hour + 1)),
+        "day_type": day_type,
+        "directions": directions
+    })
+
+@router.get("/positions")
+def get_train_positions(request: Request, at: Optional[datetime.datetime] = None):
+    """
+    GET /api/line/positions?at=2025-03-12T08:30:00
+
+    Scheduled position of every train in service, interpolated along the
+    GTFS shapes. `at` defaults to now; naive timestamps are IST. Outside
+    the feed's validity the plain weekday / weekend timetable is used
+    (`in_feed` is false).
+    """
+    started = time.perf_counter()
+    if at is None:
+        at = datetime.datetime.now(IST)
+    elif at.tzinfo is not None:
+        at = at.astimezone(IST)
+    at = at.replace(tzinfo=None)
+
+    engine = get_position_engine()
+    state = engine.positions(at)
+    ranks = state["ranks"]
+
+    # Round and convert whole columns at once, then zip into rows
+    columns = zip(
+        engine.trip_ids[ranks].tolist(),
+        engine.trip_direction[ranks].tolist(),
+        np.round(state["lat"], 6).tolist(),
+        np.round(state["lon"], 6).tolist(),
+        np.round(state["bearing"], 1).tolist(),
+        np.round(state["dist_km"], 3).tolist(),
+        # GTFS-realtime vehicle stop status vocabulary
+        np.where(state["at_stop"], "STOPPED_AT", "IN_TRANSIT_TO").tolist(),
+        engine.stop_ids[state["stop"]].tolist(),
+        engine.stop_names[state["stop"]].tolist()
+    )
+    keys = ("trip_id", "direction_id", "lat", "lon", "bearing", "dist_km", "status", "stop_id", "stop_name")
+    trains = [dict(zip(keys, row)) for row in columns]
+
+    return encoded_response(request, {
+        "timestamp": at.isoformat(),
+        "in_feed": engine.calendar.day_info(at.date())["in_feed"],
+        "count": len(trains),
+        "trains": trains,
+        "compute_ms": round((time.perf_counter() - started) * 1000, 2)
+    })
+
+@router.get("/calendar")
+def get_service_days(start: Optional[datetime.date] = None, end: Optional[datetime.date] = None):
+    """
+    GET /api/line/calendar?start=2025-09-01&end=2025-09-30
+
+    Running services, day type and holiday/festival flags per date
+    """
+    calendar = get_service_calendar()
+    start = start or datetime.datetime.now(IST).date()
+    end = end or start
+    if end < start:
+        return {"error": "end must not be before start"}
+    if (end - start).days > 366:
+        return {"error": "At most 366 days per request"}
+
+    first, last = calendar.valid_range
+    days = [calendar.day_info(start + datetime.timedelta(days=i)) for i in range((end - start).days + 1)]
+    return {
+        "feed_valid_from": first.isoformat(),
+        "feed_valid_to": last.isoformat(),
+        "days": days
+    }
+
+@router.post("/realtime")
+async def ingest_trip_updates(request: Request):
+    """
+    POST /api/line/realtime
+
+    GTFS-realtime TripUpdate feed, as JSON (FeedMessage field names) or
+    binary protobuf (Content-Type: application/x-protobuf). Delays are
+    applied to the in-memory timetable; only the stops and directions the
+    updated trips serve are recomputed.
+    """
+    body = await request.body()
+    try:
+        if "protobuf" in request.headers.get("content-type", ""):
+            feed = parse_feed_protobuf(body)
+        else:
+            feed = json.loads(body or b"{}")
+    except (RuntimeError, ValueError) as e:
+        return {"error": f"Could not parse feed: {e}"}
+    if not isinstance(feed, dict):
+        return {"error": "Feed must be a FeedMessage object"}
+    try:
+        return get_realtime_timetable().apply(feed)
+    except ValueError as e:
+        return {"error": f"Invalid feed: {e}"}
+
+@router.get("/realtime")
+def get_realtime_state(limit: int = 20):
+    """
+    GET /api/line/realtime?limit=20
+
+    Ingestion counters and the most delayed / canceled trips
+    """
+    return get_realtime_timetable().stats(limit)
+
+@router.post("/realtime/reset")
+def reset_realtime_state():
+    """
+    POST /api/line/realtime/reset
+
+    Drop all live delays (back to the static schedule)
+    """
+    get_realtime_timetable().reset()
+    return {"reset": True}
+
+@router.get("/status")
+def get_line_status(request: Request, hour: int = 8, day_type: str = "weekday",
+                    date: Optional[datetime.date] = None):
+    """
+    GET /api/line/status?hour=8&day_type=weekday
+
+    One entry per station in line order: forecast boardings for the hour,
+    departures and headways with live delays applied, and a status
+    (Normal / Moderate / Disrupted; No service outside operating hours).
+    """
+    if not 0 <= hour < 24:
+        return {"error": "hour must be between 0 and 23"}
+    service = status_service(day_type, date)
+    if service is None:
+        return {"error": f"No timetable runs on a {day_type}"}
+    if date is not None:
+        day_type = get_service_calendar().day_info(date)["day_type"]
+
+    timetable = get_realtime_timetable()
+    status = timetable.hour_status(service, hour)
+    forecaster = get_station_forecaster()
+    boardings = forecaster.forecast(get_learner().serving, is_weekend=int(day_type == "weekend"))
+    passengers = dict(zip(forecaster.stop_ids, np.rint(boardings[:, hour, :].sum(axis=1)).astype(int).tolist()))
+
+    # Whole columns at once: worst direction per station
+    scheduled_gap = status["scheduled_max_gap_s"]
+    gap_ratio = np.divide(status["max_gap_s"], scheduled_gap, out=np.ones_like(scheduled_gap),
+                          where=scheduled_gap > 0).max(axis=1)
+    missing = (status["scheduled_departures"] - status["departures"]).max(axis=1) > 0
+    delay = status["mean_delay_s"].max(axis=1)
+    scheduled = status["scheduled_departures"].sum(axis=1) > 0
+    label = np.select(
+        [~scheduled, (gap_ratio >= DISRUPTED_GAP_RATIO) | missing,
+         (gap_ratio >= MODERATE_GAP_RATIO) | (delay >= MODERATE_DELAY_S)],
+        ["No service", "Disrupted", "Moderate"],
+        default="Normal"
+    )
+
+    columns = zip(
+        timetable.stop_names.tolist(),
+        timetable.stop_ids.tolist(),
+        status["departures"].sum(axis=1).tolist(),
+        np.round(status["max_gap_s"].max(axis=1) / 60, 1).tolist(),
+        np.round(status["waiting_s"].max(axis=1) / 60, 1).tolist(),
+        np.round(status["scheduled_waiting_s"].max(axis=1) / 60, 1).tolist(),
+        np.round(delay / 60, 1).tolist(),
+        label.tolist()
+    )
+    keys = ("station", "stop_id", "trains", "max_gap_min", "waiting_time_min", "scheduled_waiting_time_min",
+            "delay_min", "status")
+    stations = [dict(zip(keys, row)) for row in columns]
+    for station in stations:
+        station["passengers"] = passengers.get(station["stop_id"], 0)
+    return encoded_response(request, stations)
@@ -0,0 +1,99 @@
+import datetime
+from fastapi import APIRouter
+from pydantic import BaseModel
+from typing import List, Optional
+
+import numpy as np
+
+from utils.scenario_engine import (
+    BASE_TRAINS,
+    baseline_metrics,
+    predict_base_demand,
+    simulate_scenarios
+)
+from utils.service_calendar import get_service_calendar
+
+# -------------------------------------------------
+# Pydantic models
+# -------------------------------------------------
+class Scenario(BaseModel):
+    demand_increase: float = 0.0     # percent
+    unavailable_trains: int = 0
+    rain: bool = False
+    festival: Optional[bool] = None  # None: festival/event days from the calendar
+    date: Optional[datetime.date] = None         # overrides the batch date
+    base_demand: Optional[float] = None # overrides the date-derived base
+
+class ScenarioBatchRequest(BaseModel):
+    scenarios: List[Scenario]
+    date: Optional[datetime.date] = None
+    base_trains: int = BASE_TRAINS
+
+# -------------------------------------------------
+# FastAPI Router
+# -------------------------------------------------
+router = APIRouter()
+
+@router.post("/evaluate")
+def evaluate_scenarios(data: ScenarioBatchRequest):
+    """
+    POST /api/scenarios/evaluate
+
+    Evaluates every scenario in the batch in a single vectorized pass.
+    Results are returned column-wise, one entry per scenario.
+    """
+    batch_date = data.date or datetime.date.today()
+    calendar = get_service_calendar()
+
+    # Base demand is computed once per distinct date
+    base_by_date = {}
+    base_demand = np.empty(len(data.scenarios))
+    festival = np.empty(len(data.scenarios), dtype=bool)
+    for i, scenario in enumerate(data.scenarios):
+        scenario_date = scenario.date or batch_date
+        festival[i] = calendar.is_festival(scenario_date) if scenario.festival is None else scenario.festival
+        if scenario.base_demand is not None:
+            base_demand[i] = scenario.base_demand
+            continue
+        if scenario_date not in base_by_date:
+            base_by_date[scenario_date] = predict_base_demand(
+                scenario_date, weekend=bool(calendar.is_weekend(scenario_date))
+            )
+        base_demand[i] = base_by_date[scenario_date]
+
+    result = simulate_scenarios(
+        base_demand,
+        [s.demand_increase for s in data.scenarios],
+        [s.unavailable_trains for s in data.scenarios],
+        [s.rain for s in data.scenarios],
+        festival,
+        base_trains=data.base_trains
+    )
+
+    return {
+        "count": len(data.scenarios),
+        "base_demand": base_demand.astype(int).tolist(),
+        "festival": festival.tolist(),
+        "demand": result["demand"].astype(int).tolist(),
+        "available_trains": result["available_trains"].tolist(),
+        "load_factor": np.round(result["load_factor"], 3).tolist(),
+        "waiting_time": result["waiting_time"].tolist(),
+        "energy_use": result["energy_use"].tolist(),
+        "risk": result["risk"].tolist()
+    }
+
+@router.get("/baseline")
+def get_baseline(date: Optional[datetime.date] = None, base_trains: int = BASE_TRAINS):
+    """
+    GET /api/scenarios/baseline?date=2025-01-01
+
+    Normal-operations metrics for a date, used for before/after comparisons
+    """
+    scenario_date = date or datetime.date.today()
+    calendar = get_service_calendar()
+    base_demand = predict_base_demand(scenario_date, weekend=bool(calendar.is_weekend(scenario_date)))
+    return {
+        "date": scenario_date.isoformat(),
+        "calendar": calendar.day_info(scenario_date),
+        **baseline_metrics(base_demand, base_trains)
+    }
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter
+from pydantic import BaseModel
+from typing import List, Optional
+
+from utils.surge_detection import surge_detector
+
+# Station hours are local (IST), like the rest of the demand series
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# -------------------------------------------------
+# Pydantic models
+# -------------------------------------------------
+class DemandEvent(BaseModel):
+    station: str
+    demand: float
+    hour: Optional[int] = None
+    timestamp: Optional[datetime] = None
+    kind: str = "observed"  # "observed" or "predicted"
+
+class SurgeIngestRequest(BaseModel):
+    events: List[DemandEvent]
+
+# -------------------------------------------------
+# FastAPI Router
+# -------------------------------------------------
+router = APIRouter()
+
+@router.post("/ingest")
+def ingest_demand_events(data: SurgeIngestRequest):
+    """
+    POST /api/surge/ingest
+
+    Batched demand observations / predictions, e.g. from automatic
+    passenger counters. Each event is scored against its station's
+    rolling baseline for that hour of day.
+    """
+    events = []
+    for event in data.events:
+        if event.hour is not None:
+            hour = event.hour
+        elif event.timestamp is not None:
+            timestamp = event.timestamp
+            hour = (timestamp.astimezone(IST) if timestamp.tzinfo else timestamp).hour
+        else:
+            hour = datetime.now(IST).hour
+
+        events.append({
+            "station": event.station,
+            "hour": hour,
+            "demand": event.demand,
+            "kind": event.kind
+        })
+
+    return surge_detector.ingest_batch(events)
+
+@router.get("/active")
+def get_active_surges(min_severity: str = "Medium"):
+    """
+    GET /api/surge/active?min_severity=Medium
+
+    Returns surges flagged within the detector's TTL window
+    """
+    surges = surge_detector.active_surges(min_severity)
+    return {
+        "surges": surges,
+        "count": len(surges),
+        "detector": surge_detector.stats()
+    }
@@ -1,5 +1,7 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 import os
 import sys
@@ -12,12 +14,28 @@ sys.path.insert(0, os.path.dirname(__file__))
 # -------------------------------------------------
 load_dotenv()
 
+from utils.admission import Rejected, admission, classify
+from utils.request_profiling import request_profiler
+from utils.serialization import FastJSONResponse
+from utils.startup import startup
+
 # -------------------------------------------------
-# Import routers
+# Import routers (timed for the startup profile)
 # -------------------------------------------------
-from api.stations_api import router as stations_router
-from api.demand_api import router as demand_router
-from api.induction_api import router as induction_router
+with startup.timed_import("api.stations_api"):
+    from api.stations_api import router as stations_router
+with startup.timed_import("api.demand_api"):
+    from api.demand_api import router as demand_router
+with startup.timed_import("api.induction_api"):
+    from api.induction_api import router as induction_router
+with startup.timed_import("api.surge_api"):
+    from api.surge_api import router as surge_router
+with startup.timed_import("api.scenarios_api"):
+    from api.scenarios_api import router as scenarios_router
+with startup.timed_import("api.line_api"):
+    from api.line_api import router as line_router
+with startup.timed_import("api.admin_api"):
+    from api.admin_api import router as admin_router
 
 # -------------------------------------------------
 # FastAPI app configuration
@@ -25,7 +43,8 @@ from api.induction_api import router as induction_router
 app = FastAPI(
     title="KMRL AI Backend",
     description="Passenger Demand Forecasting and RL-based Train Induction System",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 app.include_router(
@@ -46,6 +65,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# -------------------------------------------------
+# Admission control: per-class concurrency limits and queues, operations
+# first; shed requests get 429 (503 for operations) with Retry-After.
+# Registered before profiling so profiled durations include queue wait.
+# -------------------------------------------------
+@app.middleware("http")
+async def admit_requests(request: Request, call_next):
+    lane = classify(request.method, request.url.path) if admission.enabled else None
+    if lane is None:
+        return await call_next(request)
+
+    try:
+        wait_ms = await admission.acquire(lane)
+    except Rejected as e:
+        return JSONResponse({"error": e.reason, "lane": e.lane, "retry_after_s": e.retry_after},
+                            status_code=e.status_code, headers={"Retry-After": str(e.retry_after)})
+
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        admission.release(lane, time.perf_counter() - start)
+    response.headers["X-Admission-Lane"] = lane
+    response.headers["X-Queue-Wait-Ms"] = f"{wait_ms:.1f}"
+    return response
+
+# -------------------------------------------------
+# Request profiling (opt-in per request, automatic for slow requests)
+# -------------------------------------------------
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    requested = request.headers.get("x-profile") == "1" or request.query_params.get("profile") == "1"
+    capture = request_profiler.begin(request.method, request.url.path, requested)
+    start = time.perf_counter()
+
+    # The capture must be closed even if the handler raises, or the
+    # sampler keeps sampling for it indefinitely
+    response = None
+    try:
+        response = await call_next(request)
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        status_code = response.status_code if response is not None else 500
+        profile = request_profiler.end(capture, status_code, duration_ms, request.method, request.url.path)
+
+    if profile is not None:
+        response.headers["X-Profile-Id"] = str(profile["id"])
+    return response
+
 # -------------------------------------------------
 # Register API routers
 # -------------------------------------------------
@@ -68,8 +136,56 @@ app.include_router(
     tags=["Train Induction"]
 )
 
+app.include_router(
+    surge_router,
+    prefix="/api/surge",
+    tags=["Surge Detection"]
+)
+
+app.include_router(
+    scenarios_router,
+    prefix="/api/scenarios",
+    tags=["What-If Scenarios"]
+)
+
+app.include_router(
+    line_router,
+    prefix="/api/line",
+    tags=["Line Operations"]
+)
+
+app.include_router(
+    admin_router,
+    prefix="/api/admin",
+    tags=["Admin"]
+)
+
 # -------------------------------------------------
-# Health check
+# Warm-up: load heavy artifacts after the server starts listening
+# -------------------------------------------------
+@app.on_event("startup")
+def warm_up():
+    from api.demand_api import get_historical_data, get_station_forecaster, load_demand_artifacts
+    from api.induction_api import get_trip_summaries
+    from api.line_api import get_load_propagator, get_position_engine, get_realtime_timetable
+
+    startup.start_warmup([
+        ("demand_model", load_demand_artifacts),
+        ("station_forecaster", get_station_forecaster),
+        ("historical_data", get_historical_data),
+        ("load_propagator", get_load_propagator),
+        ("trip_summaries", get_trip_summaries),
+        ("position_engine", get_position_engine),
+        ("realtime_timetable", get_realtime_timetable)
+    ], critical=("demand_model", "station_forecaster"))
+
+@app.on_event("shutdown")
+def flush_audit_log():
+    from utils.audit_log import audit_log
+    audit_log.close()
+
+# -------------------------------------------------
+# Health check (liveness) and readiness
 # -------------------------------------------------
 @app.get("/")
 def health_check():
@@ -78,3 +194,12 @@ def health_check():
         "service": "KMRL AI Backend",
         "version": "1.0.0"
     }
+
+@app.get("/ready")
+def readiness_check():
+    """
+    200 once warm-up has loaded the model and lookup tables; 503 before,
+    and for good if a critical artifact (demand model, station profiles) failed to load
+    """
+    status = startup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Backtest the induction policies over a date range
+
+    python backend/backtest.py --start 2025-01-01 --end 2025-12-31
+    python backend/backtest.py --start 2025-01-01 --end 2025-12-31 \\
+        --candidate reinforcement-learning --max-wait-regression 0.05
+
+Demand is the model's day-type profile with calendar festivals and
+noise (--source synthetic) or ridership from the series store
+(--source observed). With --candidate, the exit code is 1 when the
+candidate policy does worse than the baseline beyond the allowed
+margins, so a model release can be gated on it.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from api.induction_api import backtest_demand, backtest_policies
+from utils.backtest import DEFAULT_CHUNK_DAYS, DEFAULT_NOISE, date_range, run_backtest
+
+COLUMNS = [
+    ("avg_waiting_time_min", "wait min", "{:>9.2f}"),
+    ("avg_trains", "trains", "{:>7.2f}"),
+    ("energy_use", "energy", "{:>10.1f}"),
+    ("mean_load_factor", "mean LF", "{:>8.3f}"),
+    ("p95_load_factor", "p95 LF", "{:>7.2f}"),
+    ("overcrowded_share", "crowded", "{:>8.2%}"),
+    ("total_cost", "cost", "{:>14,.0f}"),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backtest induction policies over historical or synthetic demand")
+    parser.add_argument("--start", required=True, help="First day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="Last day, YYYY-MM-DD (inclusive)")
+    parser.add_argument("--source", choices=["synthetic", "observed"], default="synthetic")
+    parser.add_argument("--policies", default=None, help="Comma-separated policy names (default: all)")
+    parser.add_argument("--baseline", default="rule-based-fallback")
+    parser.add_argument("--noise", type=float, default=DEFAULT_NOISE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS)
+    parser.add_argument("--candidate", default=None, help="Policy to gate against the baseline")
+    parser.add_argument("--max-wait-regression", type=float, default=0.0,
+                        help="Allowed relative increase in average waiting time for the candidate")
+    parser.add_argument("--max-crowding-regression", type=float, default=0.0,
+                        help="Allowed increase in the share of overcrowded hours for the candidate")
+    parser.add_argument("--json", action="store_true", help="Print the raw report as JSON")
+    return parser.parse_args()
+
+
+def gate(report: dict, candidate: str, baseline: str, max_wait: float, max_crowding: float) -> list:
+    """
+    Reasons the candidate fails against the baseline (empty when it passes)
+    """
+    ours, theirs = report["policies"][candidate], report["policies"][baseline]
+    failures = []
+    if ours["avg_waiting_time_min"] > theirs["avg_waiting_time_min"] * (1 + max_wait):
+        failures.append(f"waiting time {ours['avg_waiting_time_min']:.2f} min vs "
+                        f"{theirs['avg_waiting_time_min']:.2f} min")
+    if ours["overcrowded_share"] > theirs["overcrowded_share"] + max_crowding:
+        failures.append(f"overcrowded hours {ours['overcrowded_share']:.2%} vs {theirs['overcrowded_share']:.2%}")
+    return failures
+
+
+def print_report(report: dict):
+    print(f"{report['days']} days ({report['hours']} hours), {report['workers']} worker(s), "
+          f"{report['elapsed_ms']:.0f} ms")
+    print(f"{'policy':<30}" + "".join(f"{label:>{len(fmt.format(0))}}" for _, label, fmt in COLUMNS))
+    for name, kpis in report["policies"].items():
+        marker = " *" if name == report.get("baseline") else ""
+        print(f"{name + marker:<30}" + "".join(fmt.format(kpis[key]) for key, _, fmt in COLUMNS))
+
+
+def main():
+    args = parse_args()
+    start = datetime.strptime(args.start, "%Y-%m-%d").date()
+    end = datetime.strptime(args.end, "%Y-%m-%d").date()
+
+    policies = backtest_policies()
+    if args.policies:
+        names = [p.strip() for p in args.policies.split(",")]
+        missing = [p for p in names if p not in policies]
+        if missing:
+            sys.exit(f"Unknown policies: {missing} (available: {sorted(policies)})")
+        policies = {name: policies[name] for name in names}
+    for name in (args.candidate, args.baseline if args.candidate else None):
+        if name and name not in policies:
+            sys.exit(f"Policy {name} is not part of this backtest")
+
+    demand, days = backtest_demand(args.source, date_range(start, end), args.noise, args.seed)
+    if not days:
+        sys.exit(f"No {args.source} demand between {args.start} and {args.end}")
+
+    report = run_backtest(demand, policies, workers=args.workers, chunk_days=args.chunk_days,
+                          baseline=args.baseline)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.candidate:
+        failures = gate(report, args.candidate, args.baseline,
+                        args.max_wait_regression, args.max_crowding_regression)
+        if failures:
+            print(f"FAIL {args.candidate} vs {args.baseline}: " + "; ".join(failures))
+            sys.exit(1)
+        print(f"PASS {args.candidate} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Flatten demand_forecast_model.pkl into demand_forecast_compiled.npz
+
+    python backend/export_forest.py [--quantize-leaves] [--tolerance 0.5]
+
+The compiled forest is checked against sklearn on the training features
+and the export fails if any prediction moves by more than the tolerance.
+When present, the backend serves it instead of unpickling sklearn.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import joblib
+
+from utils.compiled_forest import DEFAULT_TOLERANCE, export_forest
+from utils.feature_engineering import build_training_frame
+from utils.model_manifest import file_sha256, load_manifest, write_manifest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPILED_FILE = "demand_forecast_compiled.npz"
+
+
+def export_model_dir(model_dir: str, data_path: str, quantize_leaves: bool = False,
+                     tolerance: float = DEFAULT_TOLERANCE) -> dict:
+    model = joblib.load(os.path.join(model_dir, "demand_forecast_model.pkl"))
+    features = joblib.load(os.path.join(model_dir, "model_features.pkl"))
+
+    X_check = build_training_frame(data_path)[features]
+    compiled_path = os.path.join(model_dir, COMPILED_FILE)
+    info = export_forest(model, compiled_path, X_check, quantize_leaves, tolerance)
+    info["compiled_sha256"] = file_sha256(compiled_path)
+
+    manifest = load_manifest(model_dir)
+    if manifest is not None:
+        manifest["compiled"] = info
+        write_manifest(model_dir, manifest)
+    return info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the demand forest to flat NumPy arrays")
+    parser.add_argument("--model-dir", default=os.path.join(BASE_DIR, "model"))
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "data", "processed", "processed-data.csv"))
+    parser.add_argument("--quantize-leaves", action="store_true", help="Store leaf values as 16-bit codes")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Max allowed absolute prediction difference vs sklearn")
+    args = parser.parse_args()
+
+    info = export_model_dir(args.model_dir, args.data, args.quantize_leaves, args.tolerance)
+    print(f"Exported {info['trees']} trees / {info['nodes']} nodes ({info['bytes'] / 1e6:.2f} MB), "
+          f"max abs error {info['max_abs_error']:.6f}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Ingest today's hourly weather forecast (run once a day, e.g. from cron)
+
+    python backend/ingest_weather.py
+    python backend/ingest_weather.py --file forecast.json
+    python backend/ingest_weather.py --write-sample forecast.json --days 2
+
+One bulk forecast.json call covers every hour of the next --days days
+(WEATHER_FORECAST_DAYS). The forecast is stored as hour-aligned arrays
+in WEATHER_FORECAST_DIR, where the API picks it up. --file ingests a
+weatherapi.com-shaped JSON file instead (the same stand-in the API uses
+with WEATHER_FORECAST_FILE), and --write-sample writes a synthetic one.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from api.demand_api import WEATHER_FORECAST_DAYS, WEATHER_FORECAST_DIR, get_forecast_store
+from utils.fake_services import synthetic_forecast
+from utils.weather_forecast import LOCAL_TZ, FileForecastSource, WeatherForecastStore
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest the day-ahead hourly weather forecast")
+    parser.add_argument("--file", default=None, help="Ingest a weatherapi.com-shaped JSON file")
+    parser.add_argument("--dir", default=WEATHER_FORECAST_DIR)
+    parser.add_argument("--days", type=int, default=WEATHER_FORECAST_DAYS)
+    parser.add_argument("--write-sample", default=None, metavar="PATH",
+                        help="Write a synthetic forecast file starting today and exit")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.write_sample:
+        with open(args.write_sample, "w") as f:
+            json.dump(synthetic_forecast(datetime.now(LOCAL_TZ).date(), args.days, args.seed), f)
+        print(f"Wrote {args.days * 24} hours to {args.write_sample}")
+        return
+
+    if args.file:
+        source = FileForecastSource(args.file)
+    else:
+        source = get_forecast_store().source
+        source.days = args.days
+    store = WeatherForecastStore(args.dir, source)
+
+    store.refresh(force=True)
+    status = store.status()
+    if status["last_error"] or store.latest is None:
+        sys.exit(f"Forecast ingestion failed: {status['last_error']}")
+
+    multipliers = store.latest.multipliers
+    print(f"Stored {status['hours']} hours ({status['covers_from']} to {status['covers_to']}) in {args.dir}")
+    print(f"  demand multiplier: min {multipliers.min():.2f}, max {multipliers.max():.2f}, "
+          f"{int((multipliers != 1.0).sum())} hours adjusted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+"""
+Offline load test for the backend API
+
+    python backend/load_test.py --rps 40 --duration 30 --workers 2
+
+Starts local stand-ins for weatherapi.com and the Gemini REST API (with
+configurable latency, error and timeout rates), launches the app under
+uvicorn pointed at them, waits for /ready, then drives an open-loop mix
+of traffic across the routers mounted in app.py at the target rate.
+
+Latency is measured from each request's *scheduled* send time, so a
+saturated server shows up as growing latency rather than as a silently
+lower request rate. Use --url to drive an already running server instead
+(its external services are then whatever it is configured with).
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+import requests
+
+from utils.fake_services import FakeGeminiService, FakeWeatherService
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# -------------------------------------------------
+# Traffic mix: name -> (weight, method, path, body factory)
+# -------------------------------------------------
+def predict_body(rng):
+    hour = rng.randint(5, 23)
+    return {
+        "hour": hour,
+        "is_weekend": int(rng.random() < 0.3),
+        "is_peak_hour": int(hour in (8, 9, 10, 17, 18, 19)),
+        "trains_per_hour": rng.randint(4, 12),
+        "direction_id": rng.randint(0, 1)
+    }
+
+def induction_body(rng):
+    return {"predicted_demand": rng.randrange(1000, 9000, 250), "is_peak_hour": rng.randint(0, 1)}
+
+def plan_body(rng):
+    return {"hourly_demand": [rng.randint(500, 9000) for _ in range(24)]}
+
+def surge_body(rng):
+    stations = ["Aluva", "Edapally", "Kaloor", "MG Road", "Vyttila"]
+    return {"events": [{"station": rng.choice(stations), "demand": rng.randint(100, 4000),
+                        "hour": rng.randint(5, 23)} for _ in range(10)]}
+
+def scenario_body(rng):
+    return {"scenarios": [{"demand_increase": rng.choice([0, 10, 25]), "unavailable_trains": rng.randint(0, 4),
+                           "rain": rng.random() < 0.3} for _ in range(5)]}
+
+def day_type(rng):
+    return rng.choice(["weekday", "weekend"])
+
+ROUTES = {
+    "health": (2, "GET", lambda rng: "/", None),
+    "stations.list": (3, "GET", lambda rng: "/api/stations/list", None),
+    "demand.predict": (30, "POST", lambda rng: "/api/demand/predict", predict_body),
+    "demand.historical": (5, "GET", lambda rng: f"/api/demand/historical?day_type={day_type(rng)}", None),
+    "demand.stations": (5, "GET", lambda rng: f"/api/demand/stations?day_type={day_type(rng)}", None),
+    "demand.weather_forecast": (2, "GET", lambda rng: "/api/demand/weather-forecast", None),
+    "demand.model": (2, "GET", lambda rng: "/api/demand/model", None),
+    "induction.recommend": (20, "POST", lambda rng: "/api/induction/recommend", induction_body),
+    "induction.detailed": (5, "POST", lambda rng: "/api/induction/detailed", induction_body),
+    "induction.plan": (3, "POST", lambda rng: "/api/induction/plan", plan_body),
+    "induction.roster": (1, "POST", lambda rng: "/api/induction/roster", lambda rng: {"service_id": "WK"}),
+    "induction.status": (2, "GET", lambda rng: "/api/induction/status", None),
+    "surge.ingest": (5, "POST", lambda rng: "/api/surge/ingest", surge_body),
+    "surge.active": (3, "GET", lambda rng: "/api/surge/active", None),
+    "scenarios.evaluate": (3, "POST", lambda rng: "/api/scenarios/evaluate", scenario_body),
+    "scenarios.baseline": (2, "GET", lambda rng: "/api/scenarios/baseline", None),
+    "line.load": (5, "GET", lambda rng: f"/api/line/load?day_type={day_type(rng)}", None),
+    "line.positions": (10, "GET", lambda rng: "/api/line/positions", None),
+}
+
+
+def parse_mix(spec: str) -> dict:
+    """
+    "demand.predict=50,line.load=10" -> weights; unknown names are errors
+    """
+    if not spec:
+        return {name: route[0] for name, route in ROUTES.items()}
+    weights = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ROUTES:
+            raise SystemExit(f"Unknown route '{name}'. Known: {', '.join(ROUTES)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+# -------------------------------------------------
+# App under test
+# -------------------------------------------------
+def launch_app(args, weather_url: str, gemini_url: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "WEATHER_API_URL": f"{weather_url}/v1/current.json",
+        "WEATHER_FORECAST_URL": f"{weather_url}/v1/forecast.json",
+        "WEATHER_FORECAST_DIR": os.path.join(tempfile.gettempdir(), "kmrl-load-test-weather"),
+        "WEATHER_API_KEY": "load-test",
+        "GEMINI_API_ENDPOINT": gemini_url,
+        "GEMINI_API_KEY": "load-test",
+        "PYTHONWARNINGS": "ignore"
+    })
+    command = [
+        sys.executable, "-m", "uvicorn", "app:app",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers), "--log-level", "warning"
+    ]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+def wait_ready(base_url: str, timeout_s: float = 120.0):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise SystemExit(f"{base_url} did not become ready within {timeout_s:.0f}s")
+
+# -------------------------------------------------
+# Open-loop driver
+# -------------------------------------------------
+def run_load(base_url: str, weights: dict, rps: float, duration: float, concurrency: int,
+             timeout: float, seed: int) -> list:
+    rng = random.Random(seed)
+    names = list(weights)
+    cumulative = np.cumsum([weights[n] for n in names])
+    total = int(rps * duration)
+
+    # Whole schedule drawn up front so runs with the same seed match
+    plan = []
+    for i in range(total):
+        name = names[int(np.searchsorted(cumulative, rng.random() * cumulative[-1], side="right"))]
+        _, method, path, body = ROUTES[name]
+        plan.append((i / rps, name, method, path(rng), body(rng) if body else None))
+
+    sessions = threading.local()
+    results = []
+    results_lock = threading.Lock()
+    start = time.perf_counter() + 0.1
+
+    def send(item):
+        offset, name, method, path, body = item
+        session = getattr(sessions, "session", None)
+        if session is None:
+            session = sessions.session = requests.Session()
+
+        sent = time.perf_counter()
+        status, ok = 0, False
+        try:
+            response = session.request(method, base_url + path, json=body, timeout=timeout)
+            status = response.status_code
+            ok = status < 400
+            if ok:
+                payload = response.json()
+                ok = not (isinstance(payload, dict) and "error" in payload)
+        except (requests.RequestException, ValueError):
+            pass
+        done = time.perf_counter()
+
+        with results_lock:
+            results.append((name, start + offset, sent, done, status, ok))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for item in plan:
+            delay = start + item[0] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, item)
+    return results
+
+# -------------------------------------------------
+# Report
+# -------------------------------------------------
+def summarize(results: list, rps: float) -> dict:
+    def stats(rows):
+        latency = np.array([(r[3] - r[1]) * 1000 for r in rows])
+        service = np.array([(r[3] - r[2]) * 1000 for r in rows])
+        errors = sum(1 for r in rows if not r[5])
+        p50, p90, p99 = np.percentile(latency, [50, 90, 99])
+        return {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4),
+            "p50_ms": round(float(p50), 1),
+            "p90_ms": round(float(p90), 1),
+            "p99_ms": round(float(p99), 1),
+            "max_ms": round(float(latency.max()), 1),
+            "service_p50_ms": round(float(np.percentile(service, 50)), 1),
+            "shed": sum(1 for r in rows if r[4] in (429, 503)),
+            "statuses": {str(s): sum(1 for r in rows if r[4] == s) for s in sorted({r[4] for r in rows})}
+        }
+
+    if not results:
+        return {"overall": {}, "routes": {}}
+
+    first = min(r[1] for r in results)
+    last = max(r[3] for r in results)
+    overall = stats(results)
+    overall["offered_rps"] = rps
+    overall["achieved_rps"] = round(len(results) / max(last - first, 1e-9), 1)
+    overall["duration_s"] = round(last - first, 1)
+
+    routes = {}
+    for name in sorted({r[0] for r in results}):
+        routes[name] = stats([r for r in results if r[0] == name])
+    return {"overall": overall, "routes": routes}
+
+def print_report(report: dict, fakes: dict):
+    overall = report["overall"]
+    print(f"\nOffered {overall['offered_rps']} rps, achieved {overall['achieved_rps']} rps "
+          f"over {overall['duration_s']}s; {overall['requests']} requests, "
+          f"{overall['errors']} errors ({overall['error_rate']:.2%})")
+    print(f"Latency p50 {overall['p50_ms']} ms, p90 {overall['p90_ms']} ms, "
+          f"p99 {overall['p99_ms']} ms, max {overall['max_ms']} ms\n")
+
+    header = f"{'route':<22}{'reqs':>7}{'err%':>8}{'shed':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, entry in report["routes"].items():
+        print(f"{name:<22}{entry['requests']:>7}{entry['error_rate'] * 100:>7.1f}%{entry['shed']:>6}"
+              f"{entry['p50_ms']:>9.1f}{entry['p90_ms']:>9.1f}{entry['p99_ms']:>9.1f}{entry['max_ms']:>9.1f}")
+
+    if fakes:
+        print()
+    for name, entry in fakes.items():
+        print(f"Fake {name}: {entry['requests']} upstream calls, {entry['errors']} failed")
+    for name, entry in report.get("admission", {}).get("lanes", {}).items():
+        print(f"Admission {name}: {entry['admitted']} admitted, {entry['shed'] + entry['timed_out']} shed, "
+              f"peak queue {entry['peak_queue_depth']}, queue wait p99 {entry['queue_wait_p99_ms']} ms")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the backend against local fake services")
+    parser.add_argument("--rps", type=float, default=20.0, help="Target request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=64, help="Max requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request (s)")
+    parser.add_argument("--mix", default="", help="Route weights, e.g. demand.predict=50,line.load=10")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", default=None, help="Drive an already running server instead of launching one")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--weather-latency-ms", type=float, default=120.0)
+    parser.add_argument("--weather-error-rate", type=float, default=0.02)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.02)
+    parser.add_argument("--timeout-rate", type=float, default=0.0,
+                        help="Fraction of upstream calls that hang (exercises client timeouts)")
+    parser.add_argument("--json", default=None, help="Also write the report to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    weights = parse_mix(args.mix)
+
+    weather = FakeWeatherService(args.weather_latency_ms, args.weather_latency_ms / 4,
+                                 args.weather_error_rate, args.timeout_rate, seed=args.seed)
+    gemini = FakeGeminiService(args.llm_latency_ms, args.llm_latency_ms / 4,
+                               args.llm_error_rate, args.timeout_rate, seed=args.seed + 1)
+
+    app_process = None
+    base_url = args.url
+    try:
+        if base_url is None:
+            weather_url, gemini_url = weather.start(), gemini.start()
+            print(f"Fake weather at {weather_url}, fake Gemini at {gemini_url}")
+            app_process = launch_app(args, weather_url, gemini_url)
+            base_url = f"http://127.0.0.1:{args.port}"
+        wait_ready(base_url)
+
+        print(f"Driving {args.rps} rps for {args.duration}s against {base_url} ...")
+        results = run_load(base_url, weights, args.rps, args.duration, args.concurrency, args.timeout, args.seed)
+        report = summarize(results, args.rps)
+
+        fakes = {} if args.url else {"weather": weather.stats(), "gemini": gemini.stats()}
+        report["fake_services"] = fakes
+        try:
+            report["single_flight"] = requests.get(f"{base_url}/api/admin/single-flight?top=0", timeout=5).json()
+            report["admission"] = requests.get(f"{base_url}/api/admin/admission", timeout=5).json()
+        except (requests.RequestException, ValueError):
+            pass
+        print_report(report, fakes)
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport written to {args.json}")
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait(timeout=15)
+        weather.stop()
+        gemini.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""
+Re-run logged decisions against a new model version
+
+    python backend/replay_audit.py --kind demand.predict --model-dir /tmp/new_model
+    python backend/replay_audit.py --kind induction.recommend --q-table /tmp/rl_q_table.pkl
+
+Inputs come from the decision audit log (AUDIT_DB_PATH). Demand
+forecasts are recomputed in one batched model call and scaled by the
+weather factor that was logged with each response, so the comparison
+isolates the model. Without --model-dir / --q-table the currently
+served artifacts are replayed, which shows drift from online updates.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import joblib
+import numpy as np
+
+from utils.audit_log import AUDIT_DB_PATH, AuditLog
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay audited requests against a candidate model")
+    parser.add_argument("--db", default=AUDIT_DB_PATH)
+    parser.add_argument("--kind", choices=["demand.predict", "induction.recommend"], default="demand.predict")
+    parser.add_argument("--since", default=None, help="ISO timestamp (local time)")
+    parser.add_argument("--until", default=None, help="ISO timestamp (local time)")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--model-dir", default=None, help="Candidate demand model directory")
+    parser.add_argument("--q-table", default=None, help="Candidate RL Q-table pickle")
+    parser.add_argument("--show", type=int, default=5, help="Largest changes to print")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args()
+
+
+def load_demand_model(model_dir: str):
+    """
+    (predict function, version label) for a model directory
+    """
+    from utils.compiled_forest import CompiledForest
+    from utils.model_manifest import load_manifest
+
+    compiled = os.path.join(model_dir, "demand_forecast_compiled.npz")
+    if os.path.exists(compiled):
+        model = CompiledForest.load(compiled)
+    else:
+        model = joblib.load(os.path.join(model_dir, "demand_forecast_model.pkl"))
+    features = joblib.load(os.path.join(model_dir, "model_features.pkl"))
+    manifest = load_manifest(model_dir) or {}
+
+    def predict(rows):
+        import pandas as pd
+        X = pd.DataFrame(rows).reindex(columns=features, fill_value=0)
+        return np.maximum(np.asarray(model.predict(X), dtype=float), 0.0)
+
+    return predict, manifest.get("version", model_dir)
+
+
+def replay_demand(records: list, model_dir: str = None) -> dict:
+    from api.demand_api import get_learner, weather_demand_multiplier, with_calendar_fields
+
+    if model_dir:
+        predict, version = load_demand_model(model_dir)
+    else:
+        serving = get_learner().serving
+        predict, version = (lambda rows: serving.predict(serving.prepare(rows))), serving.version
+
+    rows = [with_calendar_fields(r["request"]) for r in records]
+    factors = np.array([weather_demand_multiplier(r["response"]["weather"]) for r in records])
+    # Same truncation order as predict_passenger_demand: base, then weather
+    replayed = (predict(rows).astype(int) * factors).astype(int)
+    logged = np.array([r["response"]["predicted_demand"] for r in records])
+    diff = replayed - logged
+
+    order = np.argsort(-np.abs(diff))
+    return {
+        "candidate_version": version,
+        "logged_versions": dict(Counter(str(r["model_version"]) for r in records)),
+        "records": len(records),
+        "changed": int((diff != 0).sum()),
+        "mean_abs_change": round(float(np.abs(diff).mean()), 2),
+        "mean_change": round(float(diff.mean()), 2),
+        "max_abs_change": int(np.abs(diff).max()),
+        "largest_changes": [
+            {"id": records[i]["id"], "request": records[i]["request"],
+             "logged": int(logged[i]), "replayed": int(replayed[i])}
+            for i in order
+        ]
+    }
+
+
+def replay_induction(records: list, q_table_path: str = None) -> dict:
+    import api.induction_api as induction
+
+    if q_table_path:
+        induction.q_table = joblib.load(q_table_path)
+        induction.rl_ready = True
+
+    logged = np.array([r["response"]["recommended_trains"] for r in records])
+    replayed = np.array([
+        induction.build_recommendation(induction.InductionRequest(**r["request"]))["recommended_trains"]
+        for r in records
+    ])
+    diff = replayed - logged
+
+    order = np.argsort(-np.abs(diff))
+    return {
+        "candidate_version": q_table_path or "served",
+        "logged_versions": dict(Counter(str(r["model_version"]) for r in records)),
+        "records": len(records),
+        "changed": int((diff != 0).sum()),
+        "agreement": round(float((diff == 0).mean()), 4),
+        "mean_change": round(float(diff.mean()), 3),
+        "transitions": {f"{a}->{b}": n for (a, b), n in Counter(zip(logged.tolist(), replayed.tolist())).most_common()
+                        if a != b},
+        "largest_changes": [
+            {"id": records[i]["id"], "request": records[i]["request"],
+             "logged": int(logged[i]), "replayed": int(replayed[i])}
+            for i in order
+        ]
+    }
+
+
+def main():
+    args = parse_args()
+    since = datetime.fromisoformat(args.since).timestamp() if args.since else None
+    until = datetime.fromisoformat(args.until).timestamp() if args.until else None
+
+    records = AuditLog(args.db, enabled=False).records(
+        kind=args.kind, since=since, until=until, limit=args.limit, newest_first=False
+    )
+    if not records:
+        sys.exit(f"No {args.kind} records in {args.db}")
+
+    if args.kind == "demand.predict":
+        report = replay_demand(records, args.model_dir)
+    else:
+        report = replay_induction(records, args.q_table)
+    report["largest_changes"] = [c for c in report["largest_changes"] if c["logged"] != c["replayed"]][:args.show]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Replayed {report['records']} {args.kind} records against {report['candidate_version']} "
+          f"(logged with {report['logged_versions']})")
+    print(f"  changed: {report['changed']} ({report['changed'] / report['records']:.1%})")
+    for key in ("mean_abs_change", "mean_change", "max_abs_change", "agreement", "transitions"):
+        if key in report:
+            print(f"  {key}: {report[key]}")
+    for change in report["largest_changes"]:
+        print(f"  #{change['id']}: {change['logged']} -> {change['replayed']}  {json.dumps(change['request'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Replay GTFS-realtime trip updates into the backend
+
+    python backend/replay_realtime.py --write-sample disruption.jsonl --stop EDAP --hour 8
+    python backend/replay_realtime.py disruption.jsonl --speed 60
+    python backend/replay_realtime.py disruption.jsonl --local
+
+The replay file has one FeedMessage per line (JSON, GTFS-realtime field
+names). Messages are POSTed to /api/line/realtime, spaced by their header
+timestamps divided by --speed (0 sends them back to back). --local
+applies them to an in-process timetable instead and prints how line
+status changes. --write-sample writes a synthetic incident: trains
+through one stop are held for a growing delay over an hour, and one
+is canceled.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+
+from utils.realtime_timetable import LOCAL_TZ, RealtimeTimetable
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay GTFS-realtime trip updates")
+    parser.add_argument("file", nargs="?", help="JSON-lines file of FeedMessages")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--speed", type=float, default=0.0, help="Replay speed-up (0: no waiting)")
+    parser.add_argument("--local", action="store_true", help="Apply in-process and print line status")
+    parser.add_argument("--write-sample", default=None, metavar="PATH")
+    parser.add_argument("--service", default="WK")
+    parser.add_argument("--stop", default="EDAP", help="Stop where the incident happens")
+    parser.add_argument("--hour", type=int, default=8, help="Hour the incident starts")
+    parser.add_argument("--max-delay", type=int, default=15, help="Peak delay in minutes")
+    parser.add_argument("--messages", type=int, default=12, help="Feed messages in the sample (5 min apart)")
+    return parser.parse_args()
+
+
+def load_timetable() -> RealtimeTimetable:
+    return RealtimeTimetable(os.path.join(RAW_DIR, "stops.csv"), os.path.join(RAW_DIR, "stop_times.csv"),
+                             os.path.join(RAW_DIR, "trips.csv"))
+
+
+def sample_incident(timetable: RealtimeTimetable, service: str, stop_id: str, hour: int,
+                    max_delay_min: int, messages: int) -> list:
+    """
+    FeedMessages for a growing hold-up at one stop, then recovery
+    """
+    stop = timetable.stop_index[stop_id]
+    service_code = timetable.service_ids.index(service)
+    start = hour * 3600
+    day = datetime.now(LOCAL_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    feeds = []
+    for m in range(messages):
+        now = start + m * 300
+        # Delay ramps up for the first two thirds, then clears
+        peak = messages * 2 // 3
+        if m < peak:
+            delay = int(max_delay_min * 60 * (m + 1) / peak)
+        else:
+            delay = int(max_delay_min * 60 * (messages - m) / (messages - peak))
+        entities = []
+        for rank in np.flatnonzero(timetable.trip_service == service_code):
+            a, b = timetable.trip_start[rank], timetable.trip_end[rank]
+            at_stop = np.flatnonzero(timetable.ev_stop[a:b] == stop)
+            if not len(at_stop):
+                continue
+            passes = int(timetable.sched_dep[a + at_stop[0]])
+            if not now - 600 <= passes <= now + 1800:
+                continue
+            trip = {"trip_id": timetable.trip_ids[rank], "start_date": day.strftime("%Y%m%d")}
+            if m == peak - 1 and not any(e["trip_update"]["trip"].get("schedule_relationship") for e in entities):
+                trip["schedule_relationship"] = "CANCELED"
+                entities.append({"id": f"{m}-{rank}", "trip_update": {"trip": trip}})
+                continue
+            entities.append({"id": f"{m}-{rank}", "trip_update": {
+                "trip": trip,
+                "stop_time_update": [{"stop_sequence": int(timetable.ev_seq[a + at_stop[0]]),
+                                      "departure": {"delay": delay}}]
+            }})
+        feeds.append({
+            "header": {"gtfs_realtime_version": "2.0", "timestamp": int((day + timedelta(seconds=now)).timestamp())},
+            "entity": entities
+        })
+    return feeds
+
+
+def main():
+    args = parse_args()
+
+    if args.write_sample:
+        feeds = sample_incident(load_timetable(), args.service, args.stop, args.hour, args.max_delay, args.messages)
+        with open(args.write_sample, "w") as f:
+            for feed in feeds:
+                f.write(json.dumps(feed) + "\n")
+        print(f"Wrote {len(feeds)} messages ({sum(len(f['entity']) for f in feeds)} trip updates) "
+              f"to {args.write_sample}")
+        return
+    if not args.file:
+        sys.exit("A replay file is required (or --write-sample)")
+
+    with open(args.file) as f:
+        feeds = [json.loads(line) for line in f if line.strip()]
+
+    if args.local:
+        timetable = load_timetable()
+        for feed in feeds:
+            result = timetable.apply(feed)
+            ts = datetime.fromtimestamp(feed["header"]["timestamp"], LOCAL_TZ)
+            line = timetable.line_headway(args.service, ts.hour)
+            print(f"{ts:%H:%M}  {result['trip_updates']:>3} trips  {result['groups_recomputed']:>3} groups "
+                  f"{result['apply_ms']:>7.2f} ms   headway {line['live']['headway']} min "
+                  f"(sched {line['scheduled']['headway']}), wait {line['live']['waiting_time']} min, "
+                  f"max gap {line['live']['max_gap']} min")
+        return
+
+    import requests
+
+    session = requests.Session()
+    previous = None
+    for feed in feeds:
+        ts = feed.get("header", {}).get("timestamp")
+        if args.speed > 0 and previous is not None and ts is not None:
+            time.sleep(max(ts - previous, 0) / args.speed)
+        previous = ts if ts is not None else previous
+        result = session.post(f"{args.url}/api/line/realtime", json=feed, timeout=10).json()
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,10 +16,32 @@ if __name__ == "__main__":
     print("📍 API running on: http://127.0.0.1:8001")
     print("📚 API Documentation: http://127.0.0.1:8001/docs")
     print("\nEndpoints:")
+    print("  - GET  /ready - Readiness (200 once models and lookup tables are warm)")
     print("  - POST /api/induction/recommend - Get train deployment recommendation")
     print("  - POST /api/induction/detailed - Get detailed RL analysis")
+    print("  - POST /api/induction/plan - Plan a day of hourly train deployments")
+    print("  - POST /api/induction/roster - Rake blocks, assignment and depot induction order")
+    print("  - POST /api/induction/backtest - Compare induction policies over a date range")
     print("  - GET  /api/induction/status - Check RL model status")
     print("  - POST /api/demand/predict - Get demand forecast")
+    print("  - GET  /api/demand/stations - Stop x hour x direction demand forecast")
+    print("  - GET  /api/demand/weather-forecast - Ingested hourly weather forecast and demand multipliers")
+    print("  - POST /api/demand/observations - Feed actual ridership to the online model")
+    print("  - GET  /api/line/load - Segment on-board load per hour and direction")
+    print("  - GET  /api/line/positions - Live train positions along the line shapes")
+    print("  - GET  /api/line/calendar - Service days, holidays and festivals by date")
+    print("  - GET  /api/line/status - Station status per hour with live delays applied")
+    print("  - POST /api/line/realtime - Ingest GTFS-realtime trip updates (JSON or protobuf)")
+    print("  - POST /api/surge/ingest - Stream demand events into surge detection")
+    print("  - GET  /api/surge/active - List active demand surges")
+    print("  - POST /api/scenarios/evaluate - Evaluate a batch of what-if scenarios")
+    print("  - GET  /api/admin/single-flight - Request coalescing metrics")
+    print("  - GET  /api/admin/admission - Admission lanes: queue depth, shed requests, queue wait")
+    print("  - GET  /api/admin/profiles - Recent request profiles (X-Profile: 1 with PROFILING_ENABLED=1)")
+    print("  - GET  /api/admin/slow-requests - Requests slower than SLOW_REQUEST_MS")
+    print("  - GET  /api/admin/audit - Decision audit log writer metrics (records at /api/admin/audit/records)")
+    print("  - GET  /api/admin/memory - Per-column footprint of the in-process timetable dataset")
+    print("  - POST /api/admin/weather-forecast/refresh - Re-fetch today's hourly weather forecast now")
     print("\nPress CTRL+C to stop the server.\n")
     
     uvicorn.run(app, host="127.0.0.1", port=8001)
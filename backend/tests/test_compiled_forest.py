@@ -0,0 +1,66 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compiled_forest import DEFAULT_TOLERANCE, CompiledForest, export_forest
+
+
+def demand_like(n: int, seed: int):
+    """
+    Rows shaped like the demand features (hour, weekend, peak, trains/hour,
+    direction, plus a continuous column) and a noisy hourly demand target
+    """
+    rng = np.random.default_rng(seed)
+    hour = rng.integers(0, 24, n)
+    weekend = rng.integers(0, 2, n)
+    peak = np.isin(hour, [8, 9, 17, 18, 19]).astype(int)
+    trains = rng.integers(4, 13, n)
+    direction = rng.integers(0, 2, n)
+    temp = rng.normal(30, 3, n)
+    X = np.column_stack([hour, weekend, peak, trains, direction, temp]).astype(float)
+    y = 800 + 1500 * peak - 300 * weekend + 40 * trains - 10 * (temp - 30) + rng.normal(0, 80, n)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def forest():
+    X, y = demand_like(4000, seed=0)
+    return RandomForestRegressor(n_estimators=30, max_depth=12, random_state=0).fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def held_out():
+    X, _ = demand_like(2000, seed=1)
+    return X
+
+
+@pytest.mark.parametrize("quantize_leaves", [False, True])
+def test_matches_sklearn_on_held_out_rows(forest, held_out, quantize_leaves):
+    compiled = CompiledForest.from_sklearn(forest, quantize_leaves=quantize_leaves)
+    error = np.abs(forest.predict(held_out) - compiled.predict(held_out))
+    assert error.max() <= DEFAULT_TOLERANCE
+
+
+def test_per_tree_values_match_sklearn_trees(forest, held_out):
+    compiled = CompiledForest.from_sklearn(forest)
+    expected = np.stack([tree.predict(held_out.astype(np.float32)) for tree in forest.estimators_])
+    np.testing.assert_allclose(compiled.predict_per_tree(held_out), expected, rtol=1e-6)
+
+
+def test_saved_forest_predicts_the_same(forest, held_out, tmp_path):
+    path = str(tmp_path / "compiled.npz")
+    info = export_forest(forest, path, held_out, tolerance=DEFAULT_TOLERANCE)
+    assert info["max_abs_error"] <= DEFAULT_TOLERANCE
+
+    loaded = CompiledForest.load(path)
+    np.testing.assert_array_equal(loaded.predict(held_out), CompiledForest.from_sklearn(forest).predict(held_out))
+
+
+def test_export_rejects_deviation_beyond_tolerance(forest, held_out, tmp_path):
+    with pytest.raises(ValueError):
+        export_forest(forest, str(tmp_path / "compiled.npz"), held_out, quantize_leaves=True, tolerance=0.0)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Offline training pipeline for the passenger demand model
+
+Reproduces demand-forecasting.ipynb outside Jupyter:
+
+    python backend/train_model.py --data data/processed/processed-data.csv
+
+Writes demand_forecast_model.pkl, its compiled copy
+demand_forecast_compiled.npz, model_features.pkl and model_manifest.json
+into the model directory.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import KFold, RandomizedSearchCV, train_test_split
+
+from export_forest import COMPILED_FILE
+from utils.compiled_forest import export_forest
+from utils.feature_engineering import FEATURES, build_training_frame
+from utils.model_manifest import file_sha256, write_manifest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Notebook defaults, used when the search is disabled
+DEFAULT_PARAMS = {"n_estimators": 150, "max_depth": 12}
+
+SEARCH_SPACE = {
+    "n_estimators": [100, 150, 200],
+    "max_depth": [8, 10, 12, 16],
+    "min_samples_leaf": [1, 2, 5],
+    "max_features": [1.0, 0.8, 0.6]
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the passenger demand forecasting model")
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "data", "processed", "processed-data.csv"))
+    parser.add_argument("--model-dir", default=os.path.join(BASE_DIR, "model"))
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Rows per chunk when the feed does not fit in memory")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes (-1 = all cores)")
+    parser.add_argument("--search-iter", type=int, default=0,
+                        help="Hyperparameter candidates to try (0 = notebook defaults)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--version", default=None, help="Model version label (default: UTC timestamp)")
+    return parser.parse_args()
+
+
+def train(args):
+    started = time.perf_counter()
+
+    print(f"Building features from {args.data}")
+    df = build_training_frame(args.data, chunksize=args.chunksize, seed=args.seed, n_jobs=args.n_jobs)
+    print(f"Dataset Shape: {df.shape}")
+
+    X = df[FEATURES].astype(np.float32)
+    y = df["estimated_demand"]
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=args.seed
+    )
+
+    if args.search_iter > 0:
+        # Parallelism lives in the search; each forest fits single-threaded
+        search = RandomizedSearchCV(
+            RandomForestRegressor(random_state=args.seed, n_jobs=1),
+            SEARCH_SPACE,
+            n_iter=args.search_iter,
+            cv=KFold(n_splits=3, shuffle=True, random_state=args.seed),
+            scoring="neg_mean_absolute_error",
+            n_jobs=args.n_jobs,
+            random_state=args.seed
+        )
+        search.fit(X_train, y_train)
+        params = search.best_params_
+        print(f"Best params: {params} (CV MAE {-search.best_score_:.2f})")
+    else:
+        params = dict(DEFAULT_PARAMS)
+
+    model = RandomForestRegressor(random_state=args.seed, n_jobs=args.n_jobs, **params)
+    model.fit(X_train, y_train)
+
+    y_pred = model.predict(X_test)
+    metrics = {
+        "mae": round(float(mean_absolute_error(y_test, y_pred)), 3),
+        "r2": round(float(r2_score(y_test, y_pred)), 4)
+    }
+    print(f"Demand Forecast MAE: {metrics['mae']}")
+
+    # Serving is single-request; do not fan out threads per prediction
+    model.set_params(n_jobs=1)
+
+    os.makedirs(args.model_dir, exist_ok=True)
+    model_path = os.path.join(args.model_dir, "demand_forecast_model.pkl")
+    joblib.dump(model, model_path)
+    joblib.dump(FEATURES, os.path.join(args.model_dir, "model_features.pkl"))
+
+    # Flat-array copy of the forest for serving, checked against sklearn
+    compiled_path = os.path.join(args.model_dir, COMPILED_FILE)
+    compiled = export_forest(model, compiled_path, X_test, tolerance=0.5)
+    compiled["compiled_sha256"] = file_sha256(compiled_path)
+
+    write_manifest(args.model_dir, {
+        "version": args.version or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"),
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "features": FEATURES,
+        "params": params,
+        "metrics": metrics,
+        "rows": int(len(df)),
+        "seed": args.seed,
+        "data_file": os.path.basename(args.data),
+        "data_sha256": file_sha256(args.data),
+        "model_file": "demand_forecast_model.pkl",
+        "model_sha256": file_sha256(model_path),
+        "compiled": compiled,
+        "sklearn_version": sklearn.__version__,
+        "training_seconds": round(time.perf_counter() - started, 1)
+    })
+    print(f"Model and manifest saved to {args.model_dir}")
+
+
+if __name__ == "__main__":
+    train(parse_args())
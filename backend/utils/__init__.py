@@ -0,0 +1 @@
+# Shared backend utilities
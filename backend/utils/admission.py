@@ -0,0 +1,253 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# -------------------------------------------------
+# Configuration (environment)
+# -------------------------------------------------
+# ADMISSION_MAX_CONCURRENCY caps requests executing at once across all
+# lanes; keep it below the threadpool size (40 by default) so every
+# admitted sync endpoint gets a thread straight away. Interactive and
+# analytics lanes are capped lower, so the difference is always left for
+# operations.
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+ADMISSION_INTERACTIVE_CONCURRENCY = int(os.getenv("ADMISSION_INTERACTIVE_CONCURRENCY", "16"))
+ADMISSION_INTERACTIVE_QUEUE = int(os.getenv("ADMISSION_INTERACTIVE_QUEUE", "64"))
+ADMISSION_ANALYTICS_CONCURRENCY = int(os.getenv("ADMISSION_ANALYTICS_CONCURRENCY", "6"))
+ADMISSION_ANALYTICS_QUEUE = int(os.getenv("ADMISSION_ANALYTICS_QUEUE", "16"))
+
+OPERATIONS_QUEUE = 256
+WAIT_SAMPLES_KEPT = 500
+
+# -------------------------------------------------
+# Route classes
+# -------------------------------------------------
+# (method or None, path prefix, lane); first match wins, the rest is
+# interactive. Admin, docs and health checks bypass admission so they
+# stay reachable when the lanes are full.
+BYPASS_PREFIXES = ("/api/admin", "/docs", "/redoc", "/openapi.json", "/ready")
+
+# The demand router is mounted at both /api/demand and /api (app.py), so
+# its routes are listed once and expanded under each prefix.
+DEMAND_PREFIXES = ("/api/demand", "/api")
+
+DEMAND_ROUTE_LANES: List[Tuple[Optional[str], str, str]] = [
+    ("POST", "/predict", "operations"),
+    ("POST", "/observations", "operations"),
+    (None, "/historical", "analytics"),
+    (None, "/series", "analytics"),
+]
+
+ROUTE_LANES: List[Tuple[Optional[str], str, str]] = [
+    ("POST", "/api/induction/recommend", "operations"),
+    ("POST", "/api/induction/detailed", "operations"),
+    (None, "/api/line/status", "operations"),
+    (None, "/api/line/positions", "operations"),
+    (None, "/api/line/realtime", "operations"),
+    (None, "/api/surge", "operations"),
+    *[(method, prefix + path, lane) for prefix in DEMAND_PREFIXES for method, path, lane in DEMAND_ROUTE_LANES],
+    (None, "/api/scenarios", "analytics"),
+    ("POST", "/api/induction/plan", "analytics"),
+    ("POST", "/api/induction/roster", "analytics"),
+    ("POST", "/api/induction/backtest", "analytics"),
+    (None, "/api/line/load", "analytics"),
+    (None, "/api/admin/memory", "analytics"),
+]
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """
+    Lane for a request, or None when it bypasses admission
+    """
+    for route_method, prefix, lane in ROUTE_LANES:
+        if path.startswith(prefix) and route_method in (None, method):
+            return lane
+    if path == "/" or path.startswith(BYPASS_PREFIXES):
+        return None
+    return "interactive"
+
+
+class _Lane:
+    __slots__ = ("name", "priority", "max_concurrency", "max_queue", "queue_timeout_s", "reject_status",
+                 "running", "queue", "admitted", "queued", "shed", "timed_out", "peak_queue",
+                 "service_s", "waits_ms")
+
+    def __init__(self, name, priority, max_concurrency, max_queue, queue_timeout_s, reject_status):
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.reject_status = reject_status
+        self.running = 0
+        self.queue: "deque[asyncio.Future]" = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.peak_queue = 0
+        self.service_s = 0.0
+        self.waits_ms: "deque[float]" = deque(maxlen=WAIT_SAMPLES_KEPT)
+
+
+class Rejected(Exception):
+    """
+    A request was not admitted; carries the HTTP status and Retry-After
+    """
+
+    def __init__(self, lane: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.lane = lane
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+# -------------------------------------------------
+# Admission controller
+# -------------------------------------------------
+class AdmissionController:
+    """
+    Per-lane concurrency limits and bounded queues with strict priority.
+
+    Every lane has its own cap on executing requests and its own FIFO
+    queue; all lanes together are capped at `max_concurrency`. When a
+    request finishes, the freed slot goes to the highest-priority lane
+    with a waiter that is under its own cap, so operations never queue
+    behind analytics. A full queue, or a wait past the lane's timeout,
+    sheds the request: 429 with Retry-After for interactive and analytics
+    work, 503 for operations (which only happens under overload).
+
+    State is only touched from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+                 interactive: Tuple[int, int] = (ADMISSION_INTERACTIVE_CONCURRENCY, ADMISSION_INTERACTIVE_QUEUE),
+                 analytics: Tuple[int, int] = (ADMISSION_ANALYTICS_CONCURRENCY, ADMISSION_ANALYTICS_QUEUE),
+                 enabled: bool = ADMISSION_ENABLED):
+        self.enabled = enabled
+        self.max_concurrency = max_concurrency
+        self.running = 0
+        lanes = [
+            _Lane("operations", 0, max_concurrency, OPERATIONS_QUEUE, 30.0, 503),
+            _Lane("interactive", 1, min(interactive[0], max_concurrency), interactive[1], 10.0, 429),
+            _Lane("analytics", 2, min(analytics[0], max_concurrency), analytics[1], 5.0, 429),
+        ]
+        self.lanes: Dict[str, _Lane] = {lane.name: lane for lane in lanes}
+        self._by_priority = sorted(lanes, key=lambda lane: lane.priority)
+
+    def _has_slot(self, lane: _Lane) -> bool:
+        return lane.running < lane.max_concurrency and self.running < self.max_concurrency
+
+    def _start(self, lane: _Lane):
+        lane.running += 1
+        lane.admitted += 1
+        self.running += 1
+
+    def _dispatch(self):
+        for lane in self._by_priority:
+            while lane.queue and self._has_slot(lane):
+                waiter = lane.queue.popleft()
+                if not waiter.done():
+                    self._start(lane)
+                    waiter.set_result(True)
+
+    def retry_after(self, lane: _Lane) -> int:
+        """
+        Seconds until a retry is likely to be admitted: the lane's queue
+        drained at its average service time, at least one second
+        """
+        backlog = (len(lane.queue) + 1) / max(lane.max_concurrency, 1)
+        return max(1, math.ceil(backlog * lane.service_s))
+
+    def _reject(self, lane: _Lane, reason: str) -> Rejected:
+        return Rejected(lane.name, lane.reject_status, self.retry_after(lane), reason)
+
+    async def acquire(self, name: str) -> float:
+        """
+        Wait for a slot in the lane; returns the queue wait in ms or
+        raises Rejected
+        """
+        lane = self.lanes[name]
+        if not lane.queue and self._has_slot(lane):
+            self._start(lane)
+            lane.waits_ms.append(0.0)
+            return 0.0
+
+        if len(lane.queue) >= lane.max_queue:
+            lane.shed += 1
+            raise self._reject(lane, f"{lane.name} queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.queue.append(waiter)
+        lane.queued += 1
+        lane.peak_queue = max(lane.peak_queue, len(lane.queue))
+        start = time.perf_counter()
+        try:
+            await asyncio.wait({waiter}, timeout=lane.queue_timeout_s)
+        except asyncio.CancelledError:
+            # Client went away: give back a slot granted in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            else:
+                waiter.cancel()
+                lane.queue.remove(waiter)
+            raise
+
+        if not waiter.done():
+            waiter.cancel()
+            lane.queue.remove(waiter)
+            lane.timed_out += 1
+            raise self._reject(lane, f"Waited {lane.queue_timeout_s:.0f}s in the {lane.name} queue")
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        lane.waits_ms.append(wait_ms)
+        return wait_ms
+
+    def release(self, name: str, service_s: Optional[float] = None):
+        lane = self.lanes[name]
+        lane.running -= 1
+        self.running -= 1
+        # Moving average of service time, for Retry-After estimates
+        if service_s is not None:
+            lane.service_s = service_s if lane.service_s == 0.0 else 0.9 * lane.service_s + 0.1 * service_s
+        self._dispatch()
+
+    # ---------------------------------------------
+    # Reporting
+    # ---------------------------------------------
+    def stats(self) -> dict:
+        lanes = {}
+        for lane in self._by_priority:
+            waits = np.array(lane.waits_ms) if lane.waits_ms else np.zeros(1)
+            lanes[lane.name] = {
+                "priority": lane.priority,
+                "running": lane.running,
+                "queue_depth": len(lane.queue),
+                "max_concurrency": lane.max_concurrency,
+                "max_queue": lane.max_queue,
+                "queue_timeout_s": lane.queue_timeout_s,
+                "admitted": lane.admitted,
+                "queued": lane.queued,
+                "shed": lane.shed,
+                "timed_out": lane.timed_out,
+                "peak_queue_depth": lane.peak_queue,
+                "queue_wait_p50_ms": round(float(np.percentile(waits, 50)), 2),
+                "queue_wait_p99_ms": round(float(np.percentile(waits, 99)), 2),
+                "avg_service_ms": round(lane.service_s * 1000, 1),
+                "retry_after_s": self.retry_after(lane)
+            }
+        return {
+            "enabled": self.enabled,
+            "max_concurrency": self.max_concurrency,
+            "running": self.running,
+            "lanes": lanes
+        }
+
+
+admission = AdmissionController()
@@ -0,0 +1,264 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from utils.serialization import dumps_json
+
+# -------------------------------------------------
+# Configuration (environment)
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "1") == "1"
+AUDIT_DB_PATH = os.getenv("AUDIT_DB_PATH", os.path.join(BASE_DIR, "data", "audit", "decisions.sqlite"))
+AUDIT_MAX_QUEUE = int(os.getenv("AUDIT_MAX_QUEUE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_MS = float(os.getenv("AUDIT_FLUSH_MS", "200"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    model_version TEXT,
+    shared INTEGER NOT NULL DEFAULT 0,
+    duration_ms REAL,
+    request TEXT NOT NULL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS decisions_kind_ts ON decisions (kind, ts);
+"""
+
+_STOP = object()
+
+
+class AuditLog:
+    """
+    Request/response audit trail written off the request path.
+
+    record() only appends a tuple to a bounded in-process queue; a
+    background thread drains it and writes batches to SQLite in WAL mode,
+    one transaction per batch (encoding to JSON happens there too). When
+    the queue is full, records are dropped and counted rather than
+    blocking the request: the audit log never adds backpressure to the
+    API, it reports it (queue depth, high-water mark, drops).
+    """
+
+    def __init__(self, path: str = AUDIT_DB_PATH, max_queue: int = AUDIT_MAX_QUEUE,
+                 batch_size: int = AUDIT_BATCH_SIZE, flush_ms: float = AUDIT_FLUSH_MS,
+                 enabled: bool = AUDIT_ENABLED):
+        self.path = path
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.last_error: Optional[str] = None
+        self.high_water = 0
+        self.last_batch_ms = 0.0
+        self.total_write_ms = 0.0
+
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+
+    # ---------------------------------------------
+    # Hot path
+    # ---------------------------------------------
+    def record(self, kind: str, request, response, model_version: Optional[str] = None,
+               shared: bool = False, duration_ms: Optional[float] = None) -> bool:
+        """
+        Queue one request/response pair; False when disabled or dropped
+        """
+        if not self.enabled:
+            return False
+        if self._thread is None:
+            self._start()
+
+        try:
+            self.queue.put_nowait((time.time(), kind, model_version, int(shared), duration_ms, request, response))
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            return False
+
+        depth = self.queue.qsize()
+        with self._counter_lock:
+            self.enqueued += 1
+            if depth > self.high_water:
+                self.high_water = depth
+        return True
+
+    # ---------------------------------------------
+    # Writer thread
+    # ---------------------------------------------
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _run(self):
+        connection = self._connect()
+        stopping = False
+
+        while not stopping:
+            batch = []
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(connection, batch)
+
+        connection.close()
+
+    def _write(self, connection: sqlite3.Connection, batch: list):
+        started = time.perf_counter()
+        rows = []
+        for ts, kind, version, shared, duration, request, response in batch:
+            try:
+                rows.append((ts, kind, version, shared, duration,
+                             dumps_json(request).decode(), dumps_json(response).decode()))
+            except TypeError as e:
+                self.write_errors += 1
+                self.last_error = str(e)
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO decisions (ts, kind, model_version, shared, duration_ms, request, response) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+            self.written += len(rows)
+            self.batches += 1
+        except sqlite3.Error as e:
+            self.write_errors += len(rows)
+            self.last_error = str(e)
+
+        self.last_batch_ms = (time.perf_counter() - started) * 1000
+        self.total_write_ms += self.last_batch_ms
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until everything queued so far is written (or failed)
+        """
+        target = self.enqueued
+        deadline = time.monotonic() + timeout
+        while self.written + self.write_errors < target:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """
+        Write what is queued, then stop the writer thread
+        """
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ---------------------------------------------
+    # Reading
+    # ---------------------------------------------
+    def records(self, kind: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+                limit: Optional[int] = 100, newest_first: bool = True) -> List[dict]:
+        """
+        Logged decisions with request/response decoded
+        """
+        if not os.path.exists(self.path):
+            return []
+
+        clauses, params = [], []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT id, ts, kind, model_version, shared, duration_ms, request, response FROM decisions {where} ORDER BY id {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+        return [
+            {
+                "id": row[0],
+                "ts": row[1],
+                "kind": row[2],
+                "model_version": row[3],
+                "shared": bool(row[4]),
+                "duration_ms": row[5],
+                "request": json.loads(row[6]),
+                "response": json.loads(row[7])
+            }
+            for row in rows
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "queue_high_water": self.high_water,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+            "last_error": self.last_error,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 1) if self.batches else 0.0,
+            "last_batch_ms": round(self.last_batch_ms, 3),
+            "avg_batch_ms": round(self.total_write_ms / self.batches, 3) if self.batches else 0.0
+        }
+
+
+audit_log = AuditLog()
@@ -0,0 +1,264 @@
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.feature_engineering import peak_hour_flag
+from utils.fleet_optimizer import DEFAULT_ENERGY_COST, TRAIN_CAPACITY, cost_table, plan_deployment
+from utils.scenario_engine import ENERGY_PER_TRAIN, FESTIVAL_FACTOR
+
+# -------------------------------------------------
+# Backtest defaults
+# -------------------------------------------------
+HOURS = np.arange(24)
+IS_PEAK = peak_hour_flag(HOURS)
+DEFAULT_NOISE = 0.15          # lognormal sigma of synthetic hour-to-hour variation
+DEFAULT_CHUNK_DAYS = 32       # days per worker task
+LOAD_FACTOR_BINS = np.linspace(0.0, 3.0, 61)
+
+# A policy maps (days x 24) demand and the 24-hour peak flag to an integer
+# (days x 24) train deployment
+Policy = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+# -------------------------------------------------
+# Demand sources
+# -------------------------------------------------
+def date_range(start: datetime.date, end: datetime.date) -> List[datetime.date]:
+    return [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+
+def demand_profiles(serving, forecaster) -> Dict[int, np.ndarray]:
+    """
+    Mean hourly demand per stop and direction (the scale /predict returns),
+    for weekdays (0) and weekends (1)
+    """
+    return {w: forecaster.forecast(serving, is_weekend=w).mean(axis=(0, 2)) for w in (0, 1)}
+
+def synthetic_demand(days: Sequence[datetime.date], profiles: Dict[int, np.ndarray], calendar,
+                     noise: float = DEFAULT_NOISE, seed: int = 0) -> np.ndarray:
+    """
+    (days x 24) demand: the model's day-type profile, festival uplift and
+    lognormal noise
+
+    Each day's noise is seeded by (seed, date), so a date draws the same
+    demand whatever range it is backtested in.
+    """
+    weekend = np.array([calendar.is_weekend(d) for d in days], dtype=int)
+    festival = np.array([calendar.is_festival(d) for d in days], dtype=bool)
+
+    base = np.stack([profiles[0], profiles[1]])[weekend]
+    base = base * np.where(festival, FESTIVAL_FACTOR, 1.0)[:, None]
+    draws = np.stack([
+        np.random.default_rng([seed, d.toordinal()]).standard_normal(len(HOURS)) for d in days
+    ]) if len(days) else np.empty((0, len(HOURS)))
+    return base * np.exp(noise * draws - noise ** 2 / 2)
+
+def observed_demand(store, days: Sequence[datetime.date], utc_offset_seconds: int):
+    """
+    (days x 24) observed demand averaged over every (stop, direction)
+    series, and a mask of the days that have any observations
+    """
+    origin = datetime.datetime.combine(days[0], datetime.time()).replace(tzinfo=datetime.timezone.utc)
+    start = int(origin.timestamp()) - utc_offset_seconds
+    end = start + len(days) * 86400
+
+    totals = np.zeros(len(days) * 24)
+    series = 0
+    for stop_id, direction_id in store.keys("observed"):
+        t, v = store.query("observed", stop_id, direction_id, start, end, "hour")
+        if len(t) == 0:
+            continue
+        np.add.at(totals, (t - start) // 3600, v)
+        series += 1
+
+    demand = totals.reshape(len(days), 24) / max(series, 1)
+    return demand, demand.sum(axis=1) > 0
+
+# -------------------------------------------------
+# Policies
+# -------------------------------------------------
+class StatePolicy:
+    """
+    A policy over the induction RL state (demand level, peak flag and,
+    when `hourly`, hour of day), evaluated once into a lookup table so a
+    year of hours is one index.
+    """
+
+    def __init__(self, table: np.ndarray, thresholds: Sequence[float]):
+        self.table = np.asarray(table, dtype=np.int64)
+        self.thresholds = np.asarray(thresholds, dtype=float)
+
+    @classmethod
+    def from_function(cls, fn: Callable[..., int], thresholds: Sequence[float], hourly: bool = False):
+        levels = range(len(thresholds) + 1)
+        if hourly:
+            table = [[[fn(level, peak, hour) for hour in HOURS] for peak in (0, 1)] for level in levels]
+        else:
+            table = [[fn(level, peak) for peak in (0, 1)] for level in levels]
+        return cls(table, thresholds)
+
+    def __call__(self, demand: np.ndarray, is_peak: np.ndarray) -> np.ndarray:
+        level = np.searchsorted(self.thresholds, demand, side="right")
+        peak = np.broadcast_to(is_peak, demand.shape)
+        if self.table.ndim == 3:
+            return self.table[level, peak, np.broadcast_to(HOURS, demand.shape)]
+        return self.table[level, peak]
+
+
+class FixedPolicy:
+    """
+    The same number of trains every hour
+    """
+
+    def __init__(self, trains: int):
+        self.trains = int(trains)
+
+    def __call__(self, demand, is_peak):
+        return np.full(demand.shape, self.trains, dtype=np.int64)
+
+
+class CostGreedyPolicy:
+    """
+    Per-hour argmin of the fleet optimizer's waiting + energy cost,
+    knowing the hour's demand
+    """
+
+    def __init__(self, actions: Sequence[int], energy_cost: float = DEFAULT_ENERGY_COST):
+        self.actions = np.asarray(actions, dtype=np.int64)
+        self.energy_cost = energy_cost
+
+    def __call__(self, demand, is_peak):
+        table = cost_table(demand.ravel(), int(self.actions.max()), energy_cost=self.energy_cost)
+        best = np.argmin(table[:, self.actions], axis=1)
+        return self.actions[best].reshape(demand.shape)
+
+
+class DayPlanPolicy:
+    """
+    Whole-day dynamic-programming plan with perfect foresight of the
+    day's demand, under the optimizer's headway and ramp limits
+    """
+
+    def __init__(self, fleet_size: int, max_ramp: int, energy_cost: float = DEFAULT_ENERGY_COST):
+        self.fleet_size = fleet_size
+        self.max_ramp = max_ramp
+        self.energy_cost = energy_cost
+
+    def __call__(self, demand, is_peak):
+        return np.stack([
+            plan_deployment(day, fleet_size=self.fleet_size, max_ramp=self.max_ramp,
+                            energy_cost=self.energy_cost)["trains"]
+            for day in demand
+        ]) if len(demand) else np.empty(demand.shape, dtype=np.int64)
+
+# -------------------------------------------------
+# KPIs
+# -------------------------------------------------
+def evaluate_deployment(demand: np.ndarray, trains: np.ndarray, capacity: int = TRAIN_CAPACITY,
+                        energy_cost: float = DEFAULT_ENERGY_COST) -> dict:
+    """
+    Additive KPI totals for one deployment, so chunks can be summed
+
+    Waiting follows the fleet optimizer's cost model: headway / 2 per
+    passenger, plus one more headway for passengers left behind when the
+    hour's demand exceeds capacity.
+    """
+    trains = np.asarray(trains, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        headway = np.where(trains > 0, 60.0 / trains, np.inf)
+        load_factor = np.where(trains > 0, demand / (trains * capacity), np.inf)
+    left_behind = np.maximum(demand - trains * capacity, 0.0)
+    waiting = np.where(demand > 0, demand * headway / 2 + left_behind * headway, 0.0)
+
+    return {
+        "hours": int(demand.size),
+        "passengers": float(demand.sum()),
+        "passenger_wait_min": float(waiting.sum()),
+        "left_behind": float(left_behind.sum()),
+        "overcrowded_hours": int((load_factor > 1.0).sum()),
+        "train_hours": float(trains.sum()),
+        "cost": float(waiting.sum() + energy_cost * trains.sum()),
+        "load_factor_hist": np.histogram(np.minimum(load_factor, LOAD_FACTOR_BINS[-1]), LOAD_FACTOR_BINS)[0]
+    }
+
+def _merge(a: dict, b: dict) -> dict:
+    return {key: a[key] + b[key] for key in a}
+
+def _quantile_from_hist(hist: np.ndarray, q: float) -> float:
+    cumulative = np.cumsum(hist)
+    if cumulative[-1] == 0:
+        return 0.0
+    return float(LOAD_FACTOR_BINS[1:][np.searchsorted(cumulative, q * cumulative[-1])])
+
+def summarize_kpis(totals: dict) -> dict:
+    hours = max(totals["hours"], 1)
+    passengers = max(totals["passengers"], 1e-9)
+    return {
+        "avg_waiting_time_min": round(totals["passenger_wait_min"] / passengers, 3),
+        "avg_trains": round(totals["train_hours"] / hours, 2),
+        "train_hours": round(totals["train_hours"], 1),
+        "energy_use": round(totals["train_hours"] * ENERGY_PER_TRAIN, 1),
+        "mean_load_factor": round(totals["passengers"] / max(totals["train_hours"] * TRAIN_CAPACITY, 1e-9), 3),
+        "p95_load_factor": _quantile_from_hist(totals["load_factor_hist"], 0.95),
+        "overcrowded_hours": totals["overcrowded_hours"],
+        "overcrowded_share": round(totals["overcrowded_hours"] / hours, 4),
+        "passengers_left_behind": int(totals["left_behind"]),
+        "total_cost": round(totals["cost"], 1)
+    }
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+def _evaluate_chunk(args) -> Dict[str, dict]:
+    demand, policies = args
+    return {name: evaluate_deployment(demand, policy(demand, IS_PEAK)) for name, policy in policies.items()}
+
+def run_backtest(demand: np.ndarray, policies: Dict[str, Policy], workers: Optional[int] = None,
+                 chunk_days: int = DEFAULT_CHUNK_DAYS, baseline: Optional[str] = None) -> dict:
+    """
+    Replay (days x 24) demand through every policy and report KPIs
+
+    Days are split into chunks evaluated in worker processes; each chunk
+    returns additive totals, so results do not depend on the split.
+    """
+    started = time.perf_counter()
+    demand = np.asarray(demand, dtype=float)
+    if demand.ndim != 2 or not len(demand):
+        raise ValueError("demand must be a non-empty (days x 24) array")
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1")
+    chunks = [(demand[i:i + chunk_days], policies) for i in range(0, len(demand), chunk_days)]
+
+    cores = os.cpu_count() or 1
+    workers = max(1, min(workers or cores, cores, len(chunks)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_evaluate_chunk, chunks))
+    else:
+        results = [_evaluate_chunk(chunk) for chunk in chunks]
+
+    kpis = {}
+    for name in policies:
+        parts = [r[name] for r in results]
+        totals = parts[0]
+        for part in parts[1:]:
+            totals = _merge(totals, part)
+        kpis[name] = summarize_kpis(totals)
+
+    report = {
+        "days": int(len(demand)),
+        "hours": int(demand.size),
+        "policies": kpis,
+        "workers": max(workers, 1),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+    if baseline in kpis:
+        report["baseline"] = baseline
+        report["vs_baseline"] = {
+            name: {key: round(value - kpis[baseline][key], 4) for key, value in policy_kpis.items()}
+            for name, policy_kpis in kpis.items() if name != baseline
+        }
+    return report
@@ -0,0 +1,140 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils.feature_engineering import DAY_COLUMNS
+
+# -------------------------------------------------
+# Column layout
+# -------------------------------------------------
+# Repeated identifiers: stored once per distinct value, rows hold codes
+CATEGORY_COLUMNS = ["trip_id", "stop_id", "stop_name", "route_id", "service_id"]
+
+# GTFS HH:MM:SS (hours may pass 24) -> seconds after the service day starts
+TIME_COLUMNS = {"arrival_time": "arrival_s", "departure_time": "departure_s"}
+
+# The seven 0/1 day columns collapse into one bitmask, Monday = bit 0
+DAY_BITS = {day: np.uint8(1 << i) for i, day in enumerate(DAY_COLUMNS)}
+WEEKDAY_MASK = np.uint8(0b0011111)
+WEEKEND_MASK = np.uint8(0b1100000)
+
+NUMERIC_DTYPES = {
+    "stop_sequence": np.uint16,
+    "direction_id": np.uint8,
+    "stop_lat": np.float32,
+    "stop_lon": np.float32
+}
+
+DEFAULT_CHUNK_ROWS = 250_000
+
+
+def _time_seconds(times: pd.Series) -> np.ndarray:
+    """
+    Seconds for a categorical HH:MM:SS column
+
+    Timetables repeat the same few thousand clock times, so only the
+    categories are parsed and the row codes index into the result.
+    """
+    categories = pd.Series(times.cat.categories.astype(str))
+    parts = categories.str.split(":", expand=True).astype(np.int32).to_numpy()
+    seconds = (parts * np.array([3600, 60, 1], dtype=np.int32)).sum(axis=1).astype(np.int32)
+    codes = times.cat.codes.to_numpy()
+    # Missing times (code -1) become -1 rather than a wrapped lookup
+    return np.where(codes >= 0, seconds[codes], -1).astype(np.int32)
+
+
+def _compact_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    out = {}
+    for column in chunk.columns:
+        if column in CATEGORY_COLUMNS:
+            out[column] = chunk[column]
+        elif column in TIME_COLUMNS:
+            out[TIME_COLUMNS[column]] = _time_seconds(chunk[column])
+        elif column in NUMERIC_DTYPES:
+            out[column] = chunk[column].fillna(0).to_numpy(dtype=NUMERIC_DTYPES[column])
+
+    days = [day for day in DAY_COLUMNS if day in chunk.columns]
+    if days:
+        matrix = chunk[days].fillna(0).to_numpy(dtype=np.uint8)
+        weights = np.array([DAY_BITS[day] for day in days], dtype=np.uint8)
+        out["days"] = (matrix * weights).sum(axis=1, dtype=np.uint8)
+    return pd.DataFrame(out)
+
+
+def load_compact_processed(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
+    """
+    processed-data.csv with compact dtypes
+
+    Identifiers are categoricals, times int32 seconds, coordinates
+    float32 and the day columns a single uint8 `days` bitmask. The file
+    is read in chunks, so peak memory is one raw chunk plus the compact
+    result rather than the whole default-typed frame.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {c: "category" for c in header if c in CATEGORY_COLUMNS or c in TIME_COLUMNS}
+    dtypes.update({c: np.uint8 for c in header if c in DAY_COLUMNS})
+
+    chunks = [_compact_chunk(chunk) for chunk in pd.read_csv(path, dtype=dtypes, chunksize=chunk_rows)]
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+
+    # Chunks see different category sets; merge them before concatenating
+    combined = {}
+    for column in chunks[0].columns:
+        if column in CATEGORY_COLUMNS:
+            combined[column] = pd.Series(union_categoricals([c[column] for c in chunks]))
+        else:
+            combined[column] = np.concatenate([c[column].to_numpy() for c in chunks])
+    return pd.DataFrame(combined)
+
+
+def runs_on(days: pd.Series, mask: np.uint8) -> np.ndarray:
+    """
+    Rows whose service runs on any day in the mask
+    """
+    return (days.to_numpy() & mask) != 0
+
+
+def expand_days(days: pd.Series) -> pd.DataFrame:
+    """
+    The original 0/1 day columns, for code that still needs them
+    """
+    values = days.to_numpy()
+    return pd.DataFrame({day: ((values & bit) != 0).astype(np.int8) for day, bit in DAY_BITS.items()},
+                        index=days.index)
+
+# -------------------------------------------------
+# Memory accounting
+# -------------------------------------------------
+def memory_report(df: pd.DataFrame, baseline: Optional[pd.DataFrame] = None) -> Dict:
+    """
+    Per-column footprint in bytes (deep, so strings and category tables
+    count); with a baseline frame, the default-typed footprint alongside
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    columns: List[dict] = []
+    for column in df.columns:
+        entry = {"column": column, "dtype": str(df[column].dtype), "bytes": int(usage[column])}
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            entry["categories"] = len(df[column].cat.categories)
+        columns.append(entry)
+
+    report = {
+        "rows": len(df),
+        "total_bytes": int(usage.sum()),
+        "bytes_per_row": round(float(usage.sum()) / len(df), 1) if len(df) else 0.0,
+        "columns": columns
+    }
+    if baseline is not None:
+        base_usage = baseline.memory_usage(deep=True, index=False)
+        report["baseline"] = {
+            "total_bytes": int(base_usage.sum()),
+            "columns": {column: {"dtype": str(baseline[column].dtype), "bytes": int(base_usage[column])}
+                        for column in baseline.columns}
+        }
+        report["reduction"] = round(1 - report["total_bytes"] / max(int(base_usage.sum()), 1), 4)
+    return report
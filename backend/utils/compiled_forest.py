@@ -0,0 +1,195 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+# -------------------------------------------------
+# Flattened tree ensemble
+# -------------------------------------------------
+class CompiledForest:
+    """
+    A fitted RandomForestRegressor flattened into contiguous arrays.
+
+    All trees share one node table (feature, threshold, left, right, leaf
+    value); `roots` holds each tree's first node. Leaves point to
+    themselves, so a batch is predicted by advancing every (tree, sample)
+    cursor `max_depth` times in lock-step with plain NumPy indexing.
+
+    Thresholds are stored as float32 rounded *down*, and inputs are cast
+    to float32 exactly as sklearn does, so `x <= threshold` takes the same
+    branch as sklearn's float64 comparison. Only the leaf averaging (and
+    optional leaf quantization) can move predictions.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 n_features, value_scale: float = 1.0, value_offset: float = 0.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.value_scale = float(value_scale)
+        self.value_offset = float(value_offset)
+
+        # Interleaved (left, right) pairs: one gather per step instead of two
+        self.children = np.stack([left, right], axis=1).ravel()
+
+    @classmethod
+    def from_sklearn(cls, model, quantize_leaves: bool = False) -> "CompiledForest":
+        trees = [est.tree_ for est in model.estimators_]
+        sizes = np.array([t.node_count for t in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        total = int(sizes.sum())
+
+        index_dtype = np.int32 if total < 2 ** 31 else np.int64
+        feature = np.zeros(total, dtype=np.int16)
+        threshold = np.full(total, np.inf, dtype=np.float32)
+        left = np.empty(total, dtype=index_dtype)
+        right = np.empty(total, dtype=index_dtype)
+        value = np.empty(total, dtype=np.float64)
+
+        for tree, offset, size in zip(trees, offsets, sizes):
+            nodes = slice(offset, offset + size)
+            own = np.arange(offset, offset + size, dtype=index_dtype)
+            is_leaf = tree.children_left < 0
+
+            left[nodes] = np.where(is_leaf, own, tree.children_left + offset)
+            right[nodes] = np.where(is_leaf, own, tree.children_right + offset)
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+
+            split = tree.threshold.astype(np.float32)
+            rounded_up = split > tree.threshold
+            split[rounded_up] = np.nextafter(split[rounded_up], np.float32(-np.inf))
+            threshold[nodes] = np.where(is_leaf, np.float32(np.inf), split)
+
+            value[nodes] = tree.value[:, 0, 0]
+
+        scale, offset_value = 1.0, 0.0
+        if quantize_leaves:
+            # 16-bit codes over the leaf value range
+            offset_value = float(value.min())
+            scale = max(float(value.max()) - offset_value, 1e-12) / 65535.0
+            value = np.round((value - offset_value) / scale).astype(np.uint16)
+        else:
+            value = value.astype(np.float32)
+
+        return cls(
+            feature, threshold, left, right, value,
+            roots=offsets.astype(index_dtype),
+            max_depth=max(t.max_depth for t in trees),
+            n_features=model.n_features_in_,
+            value_scale=scale,
+            value_offset=offset_value
+        )
+
+    # ---------------------------------------------
+    # Inference
+    # ---------------------------------------------
+    def _leaf_index(self, X, block: int = 1024) -> np.ndarray:
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+        n_samples = X.shape[0]
+        flat_X = X.ravel()
+        leaves = np.empty((self.n_trees, n_samples), dtype=self.roots.dtype)
+
+        # Sample blocks keep the (trees x block) working set cache-sized
+        for start in range(0, n_samples, block):
+            stop = min(start + block, n_samples)
+            row_base = (np.arange(start, stop, dtype=np.int64) * X.shape[1])[None, :]
+            node = np.repeat(self.roots[:, None], stop - start, axis=1)
+            for _ in range(self.max_depth):
+                go_right = flat_X[row_base + self.feature[node]] > self.threshold[node]
+                node = self.children[2 * node + go_right]
+            leaves[:, start:stop] = node
+        return leaves
+
+    def predict_per_tree(self, X, dedupe_above: int = 64) -> np.ndarray:
+        """
+        Leaf value of every tree for every sample, shape (n_trees, n_samples)
+
+        Demand features are low-cardinality (hour, flags, trains/hour), so
+        large batches repeat rows heavily; those are traversed once each.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) > dedupe_above:
+            unique_rows, inverse = np.unique(X, axis=0, return_inverse=True)
+            return self.predict_per_tree(unique_rows, dedupe_above=len(X))[:, inverse.ravel()]
+
+        leaves = self.value[self._leaf_index(X)].astype(np.float64)
+        if self.value.dtype == np.uint16:
+            leaves = leaves * self.value_scale + self.value_offset
+        return leaves
+
+    def predict(self, X) -> np.ndarray:
+        return self.predict_per_tree(X).mean(axis=0)
+
+    # ---------------------------------------------
+    # Persistence
+    # ---------------------------------------------
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                feature=self.feature, threshold=self.threshold,
+                left=self.left, right=self.right, value=self.value, roots=self.roots,
+                meta=np.array([self.max_depth, self.n_features], dtype=np.int64),
+                value_scale=self.value_scale, value_offset=self.value_offset
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        with np.load(path) as data:
+            max_depth, n_features = data["meta"]
+            return cls(
+                data["feature"], data["threshold"], data["left"], data["right"],
+                data["value"], data["roots"], max_depth, n_features,
+                float(data["value_scale"]), float(data["value_offset"])
+            )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right,
+                                      self.children, self.value, self.roots))
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+# -------------------------------------------------
+# Export + verification
+# -------------------------------------------------
+# Max absolute prediction gap vs sklearn (riders/hour) an export may have
+DEFAULT_TOLERANCE = 0.5
+
+def max_prediction_error(model, compiled: CompiledForest, X) -> float:
+    """
+    Largest absolute gap between sklearn and compiled predictions on X
+    """
+    return float(np.max(np.abs(model.predict(X) - compiled.predict(X))))
+
+def export_forest(model, path: str, X_check=None, quantize_leaves: bool = False,
+                  tolerance: Optional[float] = None) -> dict:
+    """
+    Compile `model`, verify it against sklearn on X_check and save it
+    """
+    compiled = CompiledForest.from_sklearn(model, quantize_leaves=quantize_leaves)
+
+    error = None
+    if X_check is not None:
+        error = max_prediction_error(model, compiled, X_check)
+        if tolerance is not None and error > tolerance:
+            raise ValueError(f"Compiled forest deviates by {error:.4f} (tolerance {tolerance})")
+
+    compiled.save(path)
+    return {
+        "compiled_file": os.path.basename(path),
+        "trees": compiled.n_trees,
+        "nodes": int(len(compiled.feature)),
+        "bytes": compiled.nbytes,
+        "quantized_leaves": quantize_leaves,
+        "max_abs_error": error
+    }
@@ -0,0 +1,199 @@
+import json
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# -------------------------------------------------
+# Local stand-ins for weatherapi.com and the Gemini REST API
+# -------------------------------------------------
+WEATHER_CONDITIONS = [
+    ("Sunny", 0.0, 33.0),
+    ("Partly cloudy", 0.0, 31.0),
+    ("Patchy rain possible", 1.2, 29.0),
+    ("Moderate rain", 6.5, 27.0),
+    ("Heavy rain", 18.0, 26.0),
+]
+
+LLM_TEXT = (
+    "Passenger demand is elevated due to peak-hour travel. "
+    "Current service levels are expected to keep platforms within comfortable limits."
+)
+
+
+def synthetic_forecast(start: date, days: int = 2, seed: int = 0, city: str = "Kochi") -> dict:
+    """
+    An hourly forecast in weatherapi.com's forecast.json shape, local
+    time (UTC+05:30); afternoons are hotter and rain comes in spells
+    """
+    rng = random.Random(seed)
+    local = timezone(timedelta(hours=5, minutes=30))
+    forecast_days = []
+    condition, rain, temp = rng.choice(WEATHER_CONDITIONS)
+
+    for d in range(days):
+        day = start + timedelta(days=d)
+        hours = []
+        for h in range(24):
+            if rng.random() < 0.25:
+                condition, rain, temp = rng.choice(WEATHER_CONDITIONS)
+            moment = datetime(day.year, day.month, day.day, h, tzinfo=local)
+            heat = 3.0 if 12 <= h <= 16 else -2.0 if h < 6 else 0.0
+            hours.append({
+                "time_epoch": int(moment.timestamp()),
+                "time": moment.strftime("%Y-%m-%d %H:%M"),
+                "temp_c": round(temp + heat + rng.uniform(-1, 1), 1),
+                "precip_mm": rain,
+                "condition": {"text": condition}
+            })
+        forecast_days.append({"date": day.isoformat(), "hour": hours})
+
+    return {"location": {"name": city, "tz_id": "Asia/Kolkata"}, "forecast": {"forecastday": forecast_days}}
+
+
+class FakeService(ABC):
+    """
+    A threaded HTTP server answering like one external API.
+
+    Every response waits `latency_ms` (+/- `jitter_ms`, uniform) and fails
+    with HTTP 500 with probability `error_rate`; `timeout_rate` holds the
+    connection for `hang_ms` instead, to exercise client timeouts.
+    """
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 20.0, error_rate: float = 0.0,
+                 timeout_rate: float = 0.0, hang_ms: float = 10000.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_ms = hang_ms
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self.server = None
+
+    @abstractmethod
+    def respond(self, method: str, path: str, query: dict, body: bytes):
+        """
+        (status, payload dict) for one request, per service
+        """
+
+    def _handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                url = urlparse(self.path)
+
+                with service._lock:
+                    service.requests += 1
+                    roll = service.random.random()
+                    delay = service.latency_ms + service.random.uniform(-service.jitter_ms, service.jitter_ms)
+
+                if roll < service.timeout_rate:
+                    time.sleep(service.hang_ms / 1000)
+                    status, payload = 504, {"error": {"code": 504, "message": "upstream timeout"}}
+                elif roll < service.timeout_rate + service.error_rate:
+                    time.sleep(max(delay, 0) / 1000)
+                    status, payload = 500, {"error": {"code": 500, "message": "injected failure"}}
+                else:
+                    time.sleep(max(delay, 0) / 1000)
+                    status, payload = service.respond(method, url.path, parse_qs(url.query), body)
+
+                if status >= 400:
+                    with service._lock:
+                        service.errors += 1
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Serve on a background thread; returns the base URL
+        """
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors}
+
+
+class FakeWeatherService(FakeService):
+    """
+    GET /v1/current.json and /v1/forecast.json?key=...&q=...&days=N in
+    weatherapi.com's shape
+    """
+
+    def respond(self, method, path, query, body):
+        if not path.endswith(("/current.json", "/forecast.json")):
+            return 404, {"error": {"code": 1005, "message": "API URL is invalid."}}
+        if not query.get("key"):
+            return 401, {"error": {"code": 1002, "message": "API key is invalid or not provided."}}
+
+        if path.endswith("/forecast.json"):
+            with self._lock:
+                seed = self.random.randrange(2 ** 32)
+            days = int(query.get("days", ["1"])[0])
+            today = datetime.now(timezone(timedelta(hours=5, minutes=30))).date()
+            return 200, synthetic_forecast(today, days, seed, query.get("q", ["Kochi"])[0])
+
+        with self._lock:
+            condition, rain, temp = self.random.choice(WEATHER_CONDITIONS)
+            temp += self.random.uniform(-2, 2)
+        return 200, {
+            "location": {"name": query.get("q", ["Kochi"])[0]},
+            "current": {
+                "temp_c": round(temp, 1),
+                "precip_mm": rain,
+                "condition": {"text": condition}
+            }
+        }
+
+
+class FakeGeminiService(FakeService):
+    """
+    POST /v1beta/models/{model}:generateContent in the Gemini REST shape
+    """
+
+    def respond(self, method, path, query, body):
+        if method != "POST" or not path.endswith(":generateContent"):
+            return 404, {"error": {"code": 404, "message": f"Unknown path {path}", "status": "NOT_FOUND"}}
+
+        return 200, {
+            "candidates": [{
+                "content": {"parts": [{"text": LLM_TEXT}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0
+            }],
+            "usageMetadata": {"promptTokenCount": 80, "candidatesTokenCount": 30, "totalTokenCount": 110}
+        }
@@ -0,0 +1,142 @@
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+# -------------------------------------------------
+# Feature constants
+# -------------------------------------------------
+FEATURES = [
+    "hour",
+    "is_weekend",
+    "is_peak_hour",
+    "trains_per_hour",
+    "direction_id"
+]
+
+DAY_COLUMNS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Columns the pipeline needs from processed-data.csv
+SOURCE_COLUMNS = ["trip_id", "stop_id", "arrival_time", "direction_id"] + DAY_COLUMNS
+
+# -------------------------------------------------
+# Vectorized feature builders
+# -------------------------------------------------
+def parse_hour(arrival_time: pd.Series) -> np.ndarray:
+    """
+    Hour of day from GTFS HH:MM:SS (hours past 24 wrap to the next day)
+    """
+    hours = pd.to_numeric(arrival_time.astype(str).str.partition(":")[0], errors="coerce")
+    return (hours.fillna(0).to_numpy(dtype=np.int64) % 24).astype(np.int8)
+
+def peak_hour_flag(hours: np.ndarray) -> np.ndarray:
+    """
+    1 during the morning (8-10) and evening (17-20) peaks
+    """
+    hours = np.asarray(hours)
+    return (((hours >= 8) & (hours <= 10)) | ((hours >= 17) & (hours <= 20))).astype(np.int8)
+
+def weekend_flag(days: pd.DataFrame) -> np.ndarray:
+    """
+    Weekend flag from GTFS calendar columns
+
+    Matches the notebook's idxmax rule: a service counts as weekend when
+    the first day it runs on is Saturday or Sunday.
+    """
+    matrix = days[DAY_COLUMNS].to_numpy(dtype=np.int8)
+    first_day = np.argmax(matrix, axis=1)
+    return (first_day >= 5).astype(np.int8)
+
+def base_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-row features that do not need the whole dataset
+    """
+    hours = parse_hour(df["arrival_time"])
+    return pd.DataFrame({
+        "stop_id": df["stop_id"].to_numpy(),
+        "trip_id": df["trip_id"].to_numpy(),
+        "hour": hours,
+        "is_weekend": weekend_flag(df),
+        "is_peak_hour": peak_hour_flag(hours),
+        "direction_id": df["direction_id"].fillna(0).to_numpy(dtype=np.int8)
+    })
+
+def trains_per_hour_table(frames) -> pd.Series:
+    """
+    Distinct trips per (stop_id, hour) across any number of frames
+    """
+    keys = pd.concat(
+        [f[["stop_id", "hour", "trip_id"]].drop_duplicates() for f in frames],
+        ignore_index=True
+    ).drop_duplicates()
+    return keys.groupby(["stop_id", "hour"]).size()
+
+def lookup_trains_per_hour(df: pd.DataFrame, table: pd.Series) -> np.ndarray:
+    index = pd.MultiIndex.from_arrays([df["stop_id"], df["hour"]])
+    return table.reindex(index).fillna(1).to_numpy(dtype=np.int16)
+
+def synthetic_demand(df: pd.DataFrame, seed: int = 42) -> np.ndarray:
+    """
+    Synthetic training target, identical to demand-forecasting.ipynb
+    """
+    rng = np.random.RandomState(seed)
+    demand = (
+        500 +
+        df["is_peak_hour"].to_numpy(dtype=float) * 2500 +
+        df["trains_per_hour"].to_numpy(dtype=float) * 200 +
+        rng.normal(0, 100, len(df))
+    )
+    return np.clip(demand, 50, None)
+
+# -------------------------------------------------
+# Dataset builders
+# -------------------------------------------------
+def iter_feature_chunks(path: str, chunksize: Optional[int] = None, n_jobs: int = 1) -> Iterator[pd.DataFrame]:
+    """
+    Stream processed data through base_features in fixed-size chunks
+
+    With n_jobs != 1, chunks are featurized in parallel worker processes
+    while the reader keeps a bounded number of chunks in flight.
+    """
+    if chunksize is None:
+        yield base_features(pd.read_csv(path, usecols=SOURCE_COLUMNS))
+        return
+
+    reader = pd.read_csv(path, usecols=SOURCE_COLUMNS, chunksize=chunksize)
+    if n_jobs == 1:
+        for chunk in reader:
+            yield base_features(chunk)
+        return
+
+    parallel = Parallel(n_jobs=n_jobs, pre_dispatch="2*n_jobs", return_as="generator")
+    yield from parallel(delayed(base_features)(chunk) for chunk in reader)
+
+def build_training_frame(path: str, chunksize: Optional[int] = None, seed: int = 42,
+                         target_column: str = "observed_demand", n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Full feature table plus `estimated_demand` target
+
+    Rows are processed chunk by chunk and only compact per-row features
+    are kept, so the raw feed never has to fit in memory at once.
+    Uses `observed_demand` as the target when the file provides it.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    has_target = target_column in header
+
+    frames, targets = [], []
+    for chunk in iter_feature_chunks(path, chunksize, n_jobs):
+        frames.append(chunk)
+    if has_target:
+        for chunk in pd.read_csv(path, usecols=[target_column], chunksize=chunksize or 10 ** 9):
+            targets.append(chunk[target_column].to_numpy(dtype=float))
+
+    table = trains_per_hour_table(frames)
+    df = pd.concat(frames, ignore_index=True)
+    df["trains_per_hour"] = lookup_trains_per_hour(df, table)
+
+    if has_target:
+        df["estimated_demand"] = np.concatenate(targets)
+    else:
+        df["estimated_demand"] = synthetic_demand(df, seed)
+    return df
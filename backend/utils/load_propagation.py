@@ -0,0 +1,97 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# On-board load propagation
+# -------------------------------------------------
+class LoadPropagator:
+    """
+    Turns boardings per stop into on-board load per inter-station segment.
+
+    Stop order per direction comes from the longest trip in stop_times.csv.
+    Alightings are estimated from an origin-destination share matrix over
+    the fare_rules.csv pairs: a gravity model where a destination attracts
+    riders in proportion to its own daily boardings and inversely to the
+    fare between the two stops. Load on each segment is then the running
+    sum of (boardings - alightings) along the direction of travel, done
+    for every hour at once with one matmul and one cumsum.
+    """
+
+    def __init__(self, stop_ids: List[str], stop_times_path: str, trips_path: str,
+                 fare_rules_path: str, fare_attributes_path: str):
+        self.stop_ids = list(stop_ids)
+        index = {stop: i for i, stop in enumerate(self.stop_ids)}
+        n = len(self.stop_ids)
+
+        stop_times = pd.read_csv(stop_times_path, usecols=["trip_id", "stop_sequence", "stop_id"])
+        trips = pd.read_csv(trips_path, usecols=["trip_id", "direction_id"])
+        stop_times = stop_times.merge(trips, on="trip_id").sort_values(["trip_id", "stop_sequence"])
+
+        # Travel order per direction = stops of that direction's longest trip
+        self.order: Dict[int, np.ndarray] = {}
+        for direction, group in stop_times.groupby("direction_id"):
+            longest = group.groupby("trip_id").size().idxmax()
+            stops = group.loc[group["trip_id"] == longest, "stop_id"]
+            self.order[int(direction)] = np.array([index[s] for s in stops])
+
+        fares = pd.read_csv(fare_rules_path).merge(
+            pd.read_csv(fare_attributes_path, usecols=["fare_id", "price"]), on="fare_id"
+        )
+        self.fare = np.full((n, n), np.nan)
+        known = fares["origin_id"].isin(index) & fares["destination_id"].isin(index)
+        fares = fares[known]
+        self.fare[fares["origin_id"].map(index), fares["destination_id"].map(index)] = fares["price"]
+
+    def segments(self, direction: int) -> List[str]:
+        stops = [self.stop_ids[i] for i in self.order[direction]]
+        return [f"{a}-{b}" for a, b in zip(stops[:-1], stops[1:])]
+
+    def od_shares(self, direction: int, attractiveness: np.ndarray) -> np.ndarray:
+        """
+        Row-stochastic (stops x stops) destination shares in travel order
+        """
+        order = self.order[direction]
+        fare = self.fare[np.ix_(order, order)]
+        n = len(order)
+
+        downstream = np.triu(np.ones((n, n), dtype=bool), k=1) & np.isfinite(fare)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(downstream, attractiveness[order][None, :] / fare, 0.0)
+        totals = weight.sum(axis=1, keepdims=True)
+        return np.divide(weight, totals, out=np.zeros_like(weight), where=totals > 0)
+
+    def propagate(self, boardings: np.ndarray, capacity_per_hour=None) -> Dict[int, dict]:
+        """
+        Segment loads for every hour and direction
+
+        boardings: (stops, hours, directions) in self.stop_ids order.
+        capacity_per_hour: optional (hours,) seats offered per direction,
+        used to report utilization and the trains the peak segment needs.
+        """
+        attractiveness = boardings.sum(axis=(1, 2))
+        result = {}
+
+        for direction, order in self.order.items():
+            # (hours, stops) in travel order; nobody boards at the last stop
+            board = boardings[order, :, direction].T.astype(float)
+            board[:, -1] = 0.0
+
+            alight = board @ self.od_shares(direction, attractiveness)
+            load = np.cumsum(board - alight, axis=1)[:, :-1]
+
+            peak = np.argmax(load, axis=1)
+            entry = {
+                "segments": self.segments(direction),
+                "boardings": board,
+                "alightings": alight,
+                "load": load,
+                "peak_segment": peak,
+                "peak_load": load[np.arange(len(load)), peak]
+            }
+            if capacity_per_hour is not None:
+                capacity = np.asarray(capacity_per_hour, dtype=float)
+                entry["peak_utilization"] = entry["peak_load"] / np.maximum(capacity, 1.0)
+            result[direction] = entry
+        return result
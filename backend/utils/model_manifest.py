@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+MANIFEST_FILE = "model_manifest.json"
+
+# -------------------------------------------------
+# Artifact manifest
+# -------------------------------------------------
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_manifest(model_dir: str, manifest: dict):
+    """
+    Write model_manifest.json atomically next to the artifacts
+    """
+    path = os.path.join(model_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def load_manifest(model_dir: str) -> Optional[dict]:
+    path = os.path.join(model_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def verify_manifest(manifest: Optional[dict], model_dir: str, features: List[str]) -> List[str]:
+    """
+    Problems between the manifest and the artifacts on disk (empty if none)
+    """
+    if manifest is None:
+        return ["no model manifest found; artifacts were not produced by the training pipeline"]
+
+    problems = []
+    if manifest.get("features") != list(features):
+        problems.append(f"feature mismatch: manifest {manifest.get('features')} vs loaded {list(features)}")
+
+    model_file = os.path.join(model_dir, manifest.get("model_file", ""))
+    if not os.path.exists(model_file):
+        problems.append(f"model file missing: {manifest.get('model_file')}")
+    elif manifest.get("model_sha256") and file_sha256(model_file) != manifest["model_sha256"]:
+        problems.append("model file checksum does not match the manifest")
+
+    compiled = manifest.get("compiled")
+    if compiled:
+        compiled_file = os.path.join(model_dir, compiled["compiled_file"])
+        if os.path.exists(compiled_file) and file_sha256(compiled_file) != compiled.get("compiled_sha256"):
+            problems.append("compiled forest checksum does not match the manifest")
+    return problems
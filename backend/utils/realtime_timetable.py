@@ -0,0 +1,452 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.rostering import gtfs_seconds
+
+# Optional protobuf bindings (gtfs-realtime-bindings); JSON feeds need none
+try:
+    from google.protobuf.json_format import MessageToDict
+    from google.transit import gtfs_realtime_pb2
+except ImportError:
+    gtfs_realtime_pb2 = None
+
+LOCAL_TZ = timezone(timedelta(hours=5, minutes=30))
+HOURS = 24
+
+# GTFS-realtime enum names, as JSON feeds and MessageToDict spell them
+CANCELED = "CANCELED"
+SKIPPED = "SKIPPED"
+NO_DATA = "NO_DATA"
+
+# Delays are stored as int32 seconds; anything a day or more off is bad data
+MAX_DELAY_S = 86400
+
+
+def parse_feed_protobuf(payload: bytes) -> dict:
+    """
+    A binary GTFS-realtime FeedMessage as the JSON-shaped dict apply() takes
+    """
+    if gtfs_realtime_pb2 is None:
+        raise RuntimeError("Protobuf feeds need gtfs-realtime-bindings (pip install gtfs-realtime-bindings)")
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.ParseFromString(payload)
+    return MessageToDict(message, preserving_proto_field_name=True)
+
+
+def _service_day_start(trip: dict) -> int:
+    """
+    Epoch of local midnight for a trip's start_date (YYYYMMDD, default today)
+    """
+    if trip.get("start_date"):
+        day = datetime.strptime(str(trip["start_date"]), "%Y%m%d").date()
+    else:
+        day = datetime.now(LOCAL_TZ).date()
+    return int(datetime.combine(day, datetime.min.time(), LOCAL_TZ).timestamp())
+
+
+def _optional_int(value, field: str) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{field} must be an integer")
+    try:
+        return int(value)
+    except (ValueError, OverflowError):
+        raise ValueError(f"{field} must be an integer") from None
+
+
+def _check_event(event, field: str, day_start: int) -> Optional[dict]:
+    if not event:
+        return None
+    if not isinstance(event, dict):
+        raise ValueError(f"{field} must be an object")
+    delay = _optional_int(event.get("delay"), f"{field}.delay")
+    if delay is not None and abs(delay) >= MAX_DELAY_S:
+        raise ValueError(f"{field}.delay must be within {MAX_DELAY_S} seconds")
+    # Service-day times run past midnight (>= 24:00:00), up to a day more
+    moment = _optional_int(event.get("time"), f"{field}.time")
+    if moment is not None and not -MAX_DELAY_S < moment - day_start < 2 * 86400 + MAX_DELAY_S:
+        raise ValueError(f"{field}.time is not within a day of the trip's service day")
+    return {"delay": delay, "time": moment}
+
+
+def check_trip_update(update) -> tuple:
+    """
+    (trip, day_start, stop_time_updates) with every field type-checked and
+    converted, so applying it cannot fail half-way; ValueError otherwise
+    """
+    if not isinstance(update, dict) or not isinstance(update.get("trip", {}), dict):
+        raise ValueError("trip_update and its trip must be objects")
+    trip = update.get("trip", {})
+    try:
+        day_start = _service_day_start(trip)
+    except ValueError:
+        raise ValueError("start_date must be YYYYMMDD") from None
+
+    updates = update.get("stop_time_update", [])
+    if not isinstance(updates, list):
+        raise ValueError("stop_time_update must be a list")
+    checked = []
+    for u in updates:
+        if not isinstance(u, dict):
+            raise ValueError("stop_time_update entries must be objects")
+        checked.append({
+            "stop_sequence": _optional_int(u.get("stop_sequence"), "stop_sequence"),
+            "stop_id": str(u["stop_id"]) if u.get("stop_id") is not None else None,
+            "schedule_relationship": u.get("schedule_relationship"),
+            "arrival": _check_event(u.get("arrival"), "arrival", day_start),
+            "departure": _check_event(u.get("departure"), "departure", day_start)
+        })
+    return trip, day_start, checked
+
+
+def _event_delay(event: Optional[dict], scheduled: int, day_start: int) -> Optional[int]:
+    # StopTimeEvent: a delay, or an absolute time to compare with the schedule
+    if not event:
+        return None
+    if event.get("delay") is not None:
+        return int(event["delay"])
+    if event.get("time") is not None:
+        return int(event["time"]) - day_start - scheduled
+    return None
+
+
+class RealtimeTimetable:
+    """
+    The static timetable with live trip delays applied in place.
+
+    Every (trip, stop) event is one row of flat arrays: scheduled times,
+    current delays and an active flag. Departures are also grouped per
+    (service, stop, direction), so a trip update only recomputes the
+    groups that trip serves (at most stops x 1 direction) rather than
+    rebuilding the index. Each group keeps per-hour departure counts and
+    headway sums (sum of gaps and of squared gaps, max gap) for both the
+    schedule and the live state, which is all line status and waiting
+    times need.
+
+    Updates follow GTFS-realtime TripUpdate semantics: each update
+    replaces the trip's previous realtime state; a stop_time_update's
+    delay carries on to later stops until the next update; SKIPPED drops
+    one stop and a CANCELED trip drops all of them.
+    """
+
+    def __init__(self, stops_path: str, stop_times_path: str, trips_path: str):
+        stops = pd.read_csv(stops_path, usecols=["stop_id", "stop_name"])
+        self.stop_ids = stops["stop_id"].to_numpy()
+        self.stop_names = stops["stop_name"].to_numpy()
+        self.stop_index = {s: i for i, s in enumerate(self.stop_ids)}
+
+        trips = pd.read_csv(trips_path, usecols=["trip_id", "service_id", "direction_id"])
+        stop_times = pd.read_csv(
+            stop_times_path, usecols=["trip_id", "stop_sequence", "stop_id", "arrival_time", "departure_time"]
+        ).merge(trips, on="trip_id").sort_values(["trip_id", "stop_sequence"])
+
+        # ---- Events: one row per (trip, stop), trips contiguous
+        self.trip_ids = np.asarray(stop_times["trip_id"].unique(), dtype=object)
+        self.trip_rank = {t: i for i, t in enumerate(self.trip_ids)}
+        self.service_ids: List[str] = sorted(trips["service_id"].unique().tolist())
+        service_code = {s: i for i, s in enumerate(self.service_ids)}
+
+        ev_trip = stop_times["trip_id"].map(self.trip_rank).to_numpy()
+        self.ev_seq = stop_times["stop_sequence"].to_numpy(dtype=np.int32)
+        self.ev_stop = stop_times["stop_id"].map(self.stop_index).to_numpy(dtype=np.int32)
+        self.sched_arr = gtfs_seconds(stop_times["arrival_time"]).astype(np.int32)
+        self.sched_dep = gtfs_seconds(stop_times["departure_time"]).astype(np.int32)
+        self.delay_arr = np.zeros(len(stop_times), dtype=np.int32)
+        self.delay_dep = np.zeros(len(stop_times), dtype=np.int32)
+        self.active = np.ones(len(stop_times), dtype=bool)
+
+        bounds = np.r_[0, np.cumsum(np.bincount(ev_trip, minlength=len(self.trip_ids)))]
+        self.trip_start, self.trip_end = bounds[:-1], bounds[1:]
+        meta = trips.set_index("trip_id").loc[self.trip_ids]
+        self.trip_service = meta["service_id"].map(service_code).to_numpy(dtype=np.int32)
+        self.trip_direction = meta["direction_id"].to_numpy(dtype=np.int32)
+
+        # ---- Departure groups: (service, stop, direction), by scheduled time
+        ev_service = self.trip_service[ev_trip]
+        ev_direction = self.trip_direction[ev_trip]
+        self.n_stops = len(self.stop_ids)
+        self.ev_group = (ev_service * self.n_stops + self.ev_stop) * 2 + ev_direction
+        n_groups = len(self.service_ids) * self.n_stops * 2
+        order = np.lexsort((self.sched_dep, self.ev_group))
+        self.group_events = order
+        bounds = np.r_[0, np.cumsum(np.bincount(self.ev_group, minlength=n_groups))]
+        self.group_start, self.group_end = bounds[:-1], bounds[1:]
+
+        # ---- Per-group hourly metrics, scheduled (fixed) and live
+        shape = (n_groups, HOURS)
+        self.scheduled = {name: np.zeros(shape) for name in ("departures", "gap_sum", "gap_sq_sum", "max_gap")}
+        self.live = {name: np.zeros(shape) for name in ("departures", "gap_sum", "gap_sq_sum", "max_gap",
+                                                        "delay_sum")}
+        for group in range(n_groups):
+            self._recompute(group, self.scheduled, live=False)
+        for name in self.scheduled:
+            self.live[name][:] = self.scheduled[name]
+
+        self.delayed: Dict[int, dict] = {}
+        self.messages = 0
+        self.trip_updates = 0
+        self.unknown_trips = 0
+        self.rejected_entities = 0
+        self.last_feed_timestamp: Optional[int] = None
+        self.last_apply_ms = 0.0
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------
+    # Incremental recompute
+    # ---------------------------------------------
+    def _recompute(self, group: int, target: dict, live: bool = True):
+        events = self.group_events[self.group_start[group]:self.group_end[group]]
+        if live:
+            events = events[self.active[events]]
+            times = self.sched_dep[events] + self.delay_dep[events]
+            # Delays can reorder trains; headways follow the live order
+            order = np.argsort(times, kind="stable")
+            events, times = events[order], times[order]
+        else:
+            times = self.sched_dep[events]
+
+        hours = (times // 3600) % HOURS
+        target["departures"][group] = np.bincount(hours, minlength=HOURS)
+        # A gap belongs to the hour of the departure that ends it
+        gaps = np.diff(times).astype(float)
+        gap_hours = hours[1:]
+        target["gap_sum"][group] = np.bincount(gap_hours, gaps, minlength=HOURS)
+        target["gap_sq_sum"][group] = np.bincount(gap_hours, gaps * gaps, minlength=HOURS)
+        max_gap = np.zeros(HOURS)
+        np.maximum.at(max_gap, gap_hours, gaps)
+        target["max_gap"][group] = max_gap
+        if live:
+            target["delay_sum"][group] = np.bincount(hours, self.delay_dep[events].astype(float), minlength=HOURS)
+
+    # ---------------------------------------------
+    # Feed ingestion
+    # ---------------------------------------------
+    def apply(self, feed: dict) -> dict:
+        """
+        Apply a FeedMessage (JSON-shaped); only touched groups are recomputed.
+
+        Entities are checked before any state changes; malformed ones are
+        skipped and counted rather than failing the whole feed.
+        """
+        started = time.perf_counter()
+        header = feed.get("header") or {}
+        entities = feed.get("entity", [])
+        if not isinstance(header, dict) or not isinstance(entities, list):
+            raise ValueError("header must be an object and entity a list")
+        feed_timestamp = _optional_int(header.get("timestamp"), "header.timestamp")
+
+        checked, rejected = [], []
+        for entity in entities:
+            update = entity.get("trip_update") if isinstance(entity, dict) else None
+            if not update:
+                continue
+            try:
+                checked.append(check_trip_update(update))
+            except ValueError as e:
+                entity_id = entity.get("id")
+                rejected.append(f"{entity_id}: {e}" if entity_id is not None else str(e))
+
+        applied, stop_updates = 0, 0
+        unknown: List[str] = []
+        touched = set()
+
+        with self._lock:
+            try:
+                for trip, day_start, updates in checked:
+                    rank = self.trip_rank.get(trip.get("trip_id"))
+                    if rank is None:
+                        unknown.append(trip.get("trip_id"))
+                        continue
+
+                    start, end = self.trip_start[rank], self.trip_end[rank]
+                    touched.update(np.unique(self.ev_group[start:end]).tolist())
+                    stop_updates += self._apply_trip(rank, trip, day_start, updates)
+                    applied += 1
+            finally:
+                # Whatever was applied is reflected in the station stats
+                for group in touched:
+                    self._recompute(group, self.live)
+
+            if feed_timestamp is not None:
+                self.last_feed_timestamp = feed_timestamp
+            self.messages += 1
+            self.trip_updates += applied
+            self.unknown_trips += len(unknown)
+            self.rejected_entities += len(rejected)
+            self.last_apply_ms = (time.perf_counter() - started) * 1000
+
+        return {
+            "trip_updates": applied,
+            "stop_time_updates": stop_updates,
+            "unknown_trips": unknown[:20],
+            "rejected_entities": len(rejected),
+            "rejected": rejected[:20],
+            "groups_recomputed": len(touched),
+            "apply_ms": round(self.last_apply_ms, 3)
+        }
+
+    def _apply_trip(self, rank: int, trip: dict, day_start: int, updates: List[dict]) -> int:
+        start, end = self.trip_start[rank], self.trip_end[rank]
+        # Each TripUpdate replaces the trip's previous realtime state
+        self.delay_arr[start:end] = 0
+        self.delay_dep[start:end] = 0
+        self.active[start:end] = True
+
+        if trip.get("schedule_relationship") == CANCELED:
+            self.active[start:end] = False
+            self.delayed[rank] = {"trip_id": self.trip_ids[rank], "delay_s": None, "canceled": True}
+            return 0
+
+        sequences = self.ev_seq[start:end]
+        stops = self.ev_stop[start:end]
+
+        # Resolve each update to an event offset within the trip
+        resolved = []
+        for u in updates:
+            if u["stop_sequence"] is not None:
+                offset = int(np.searchsorted(sequences, u["stop_sequence"]))
+                if offset >= len(sequences) or sequences[offset] != u["stop_sequence"]:
+                    continue
+            elif u["stop_id"] in self.stop_index:
+                matches = np.flatnonzero(stops == self.stop_index[u["stop_id"]])
+                if not len(matches):
+                    continue
+                offset = int(matches[0])
+            else:
+                continue
+            resolved.append((offset, u))
+        resolved.sort(key=lambda r: r[0])
+
+        # Delays propagate downstream until the next update
+        for i, (offset, u) in enumerate(resolved):
+            event = start + offset
+            until = start + (resolved[i + 1][0] if i + 1 < len(resolved) else end - start)
+            relationship = u["schedule_relationship"]
+            if relationship == NO_DATA:
+                continue
+
+            arrival = _event_delay(u["arrival"], int(self.sched_arr[event]), day_start)
+            departure = _event_delay(u["departure"], int(self.sched_dep[event]), day_start)
+            arrival = arrival if arrival is not None else departure
+            departure = departure if departure is not None else arrival
+            if departure is not None:
+                self.delay_arr[event] = arrival
+                self.delay_dep[event] = departure
+                self.delay_arr[event + 1:until] = departure
+                self.delay_dep[event + 1:until] = departure
+            if relationship == SKIPPED:
+                self.active[event] = False
+
+        delay = int(self.delay_dep[end - 1]) if end > start else 0
+        if delay or not self.active[start:end].all():
+            self.delayed[rank] = {"trip_id": self.trip_ids[rank], "delay_s": delay, "canceled": False,
+                                  "skipped_stops": int((~self.active[start:end]).sum())}
+        else:
+            self.delayed.pop(rank, None)
+        return len(resolved)
+
+    def reset(self):
+        """
+        Back to the static schedule
+        """
+        with self._lock:
+            self.delay_arr[:] = 0
+            self.delay_dep[:] = 0
+            self.active[:] = True
+            for name in self.scheduled:
+                self.live[name][:] = self.scheduled[name]
+            self.live["delay_sum"][:] = 0
+            self.delayed.clear()
+
+    # ---------------------------------------------
+    # Queries
+    # ---------------------------------------------
+    def _groups(self, service_id: str) -> slice:
+        code = self.service_ids.index(service_id)
+        return slice(code * self.n_stops * 2, (code + 1) * self.n_stops * 2)
+
+    def hour_status(self, service_id: str, hour: int) -> Dict[str, np.ndarray]:
+        """
+        Per-stop, per-direction metrics for one hour, arrays of (stops, 2)
+        """
+        groups = self._groups(service_id)
+        with self._lock:
+            live = {name: values[groups, hour].reshape(self.n_stops, 2) for name, values in self.live.items()}
+        scheduled = {name: values[groups, hour].reshape(self.n_stops, 2) for name, values in self.scheduled.items()}
+
+        departures = live["departures"]
+        return {
+            "departures": departures.astype(int),
+            "scheduled_departures": scheduled["departures"].astype(int),
+            "max_gap_s": live["max_gap"],
+            "scheduled_max_gap_s": scheduled["max_gap"],
+            "mean_delay_s": np.divide(live["delay_sum"], departures, out=np.zeros_like(departures),
+                                      where=departures > 0),
+            "waiting_s": waiting_seconds(live["gap_sum"], live["gap_sq_sum"]),
+            "scheduled_waiting_s": waiting_seconds(scheduled["gap_sum"], scheduled["gap_sq_sum"])
+        }
+
+    def line_headway(self, service_id: str, hour: int, direction: Optional[int] = None) -> dict:
+        """
+        Line-wide headway and waiting time (minutes) in one hour, live and
+        scheduled, pooled over stops (and directions unless one is given)
+        """
+        groups = self._groups(service_id)
+        pick = slice(None) if direction is None else slice(direction, None, 2)
+        with self._lock:
+            live = {name: values[groups, hour][pick].copy() for name, values in self.live.items()}
+        scheduled = {name: values[groups, hour][pick] for name, values in self.scheduled.items()}
+
+        def summary(m):
+            gaps = np.maximum(m["departures"] - 1, 0).sum()
+            return {
+                "headway": round(float(m["gap_sum"].sum() / gaps) / 60, 1) if gaps else None,
+                "max_gap": round(float(m["max_gap"].max()) / 60, 1) if len(m["max_gap"]) else None,
+                "waiting_time": round(float(waiting_seconds(m["gap_sum"].sum(), m["gap_sq_sum"].sum())) / 60, 1)
+            }
+
+        return {"live": summary(live), "scheduled": summary(scheduled),
+                "canceled_departures": int(scheduled["departures"].sum() - live["departures"].sum())}
+
+    def stats(self, limit: int = 20) -> dict:
+        with self._lock:
+            trips = list(self.delayed.values())
+        delayed = sorted(trips, key=lambda t: (not t["canceled"], -(t["delay_s"] or 0)))
+        return {
+            "messages": self.messages,
+            "trip_updates": self.trip_updates,
+            "unknown_trips": self.unknown_trips,
+            "rejected_entities": self.rejected_entities,
+            "last_feed_timestamp": self.last_feed_timestamp,
+            "last_apply_ms": round(self.last_apply_ms, 3),
+            "delayed_trips": len(trips),
+            "canceled_trips": sum(t["canceled"] for t in trips),
+            "trips": delayed[:limit],
+            "protobuf": gtfs_realtime_pb2 is not None
+        }
+
+
+def waiting_seconds(gap_sum, gap_sq_sum):
+    """
+    Expected wait for randomly arriving passengers, sum(g^2) / (2 sum(g))
+
+    Equals headway / 2 for an even service and grows with bunching, so a
+    disrupted hour shows up even when the train count is unchanged.
+    """
+    gap_sum = np.asarray(gap_sum, dtype=float)
+    return np.divide(np.asarray(gap_sq_sum, dtype=float), 2 * gap_sum, out=np.zeros_like(gap_sum),
+                     where=gap_sum > 0)
+
+
+def service_for_day_type(service_ids: List[str], weekend_services: Dict[str, bool], day_type: str) -> Optional[str]:
+    """
+    The timetable that runs on a plain weekday / weekend day
+    """
+    wanted = day_type == "weekend"
+    return next((s for s in service_ids if weekend_services.get(s) == wanted), None)
@@ -0,0 +1,203 @@
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+# -------------------------------------------------
+# Configuration (environment)
+# -------------------------------------------------
+# PROFILING_ENABLED=1 allows on-demand profiles (X-Profile: 1 header or
+# ?profile=1); requests slower than SLOW_REQUEST_MS are always logged and,
+# with PROFILE_SLOW_REQUESTS=1 (opt-in), sampled from that point on.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_SLOW_REQUESTS = os.getenv("PROFILE_SLOW_REQUESTS", "0") == "1"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "2000"))
+PROFILE_SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE_MS", "5"))
+PROFILES_KEPT = 50
+SLOW_LOG_KEPT = 200
+
+# Threads whose innermost frame is in one of these modules are idle
+# (threadpool workers waiting for work, the event loop in select)
+IDLE_MODULES = ("threading.py", "selectors.py", "queue.py", "asyncio/base_events.py")
+
+
+class _Capture:
+    __slots__ = ("id", "method", "path", "forced", "started", "deadline", "stacks",
+                 "samples", "sampling_from", "concurrent")
+
+    def __init__(self, capture_id, method, path, forced, slow_ms):
+        self.id = capture_id
+        self.method = method
+        self.path = path
+        self.forced = forced
+        self.started = time.perf_counter()
+        self.deadline = self.started if forced else self.started + slow_ms / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sampling_from = None
+        self.concurrent = 1
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+class RequestProfiler:
+    """
+    Wall-clock sampling profiler scoped to individual requests.
+
+    One sampler thread snapshots every thread's stack (sys._current_frames)
+    at a fixed interval while at least one capture is due: a request that
+    asked for profiling from its start, or any request once it has run
+    past the slow threshold. Sync endpoints execute on threadpool threads,
+    so samples are taken across all busy threads; `concurrent` in the
+    result says how many captures overlapped, i.e. how mixed they may be.
+    The thread sleeps until the next deadline when nothing is due.
+    """
+
+    def __init__(self, enabled: bool = PROFILING_ENABLED, slow_ms: float = SLOW_REQUEST_MS,
+                 profile_slow: bool = PROFILE_SLOW_REQUESTS, interval_ms: float = PROFILE_SAMPLE_MS):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.profile_slow = profile_slow and slow_ms > 0
+        self.interval = interval_ms / 1000
+
+        self.profiles: "deque[dict]" = deque(maxlen=PROFILES_KEPT)
+        self.slow_log: "deque[dict]" = deque(maxlen=SLOW_LOG_KEPT)
+
+        self._ids = itertools.count(1)
+        self._active: Dict[int, _Capture] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    # ---------------------------------------------
+    # Request hooks
+    # ---------------------------------------------
+    def begin(self, method: str, path: str, requested: bool = False) -> Optional[_Capture]:
+        forced = requested and self.enabled
+        if not (forced or self.profile_slow):
+            return None
+
+        with self._cond:
+            capture = _Capture(next(self._ids), method, path, forced, self.slow_ms)
+            self._active[capture.id] = capture
+            for other in self._active.values():
+                other.concurrent = max(other.concurrent, len(self._active))
+            self._ensure_thread()
+            self._cond.notify()
+        return capture
+
+    def end(self, capture: Optional[_Capture], status_code: int, duration_ms: float,
+            method: str = "", path: str = "") -> Optional[dict]:
+        """
+        Close a capture; returns the stored profile if one was taken
+        """
+        profile = None
+        if capture is not None:
+            with self._cond:
+                self._active.pop(capture.id, None)
+            if capture.samples:
+                profile = self._summarize(capture, status_code, duration_ms)
+                self.profiles.append(profile)
+
+        if duration_ms >= self.slow_ms > 0:
+            entry = {
+                "method": capture.method if capture else method,
+                "path": capture.path if capture else path,
+                "status": status_code,
+                "duration_ms": round(duration_ms, 1),
+                "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "profile_id": profile["id"] if profile else None
+            }
+            self.slow_log.append(entry)
+            print(f"Slow request: {entry['method']} {entry['path']} {entry['duration_ms']} ms"
+                  + (f" (profile {entry['profile_id']})" if entry["profile_id"] else ""))
+        return profile
+
+    # ---------------------------------------------
+    # Sampler
+    # ---------------------------------------------
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._cond:
+                now = time.perf_counter()
+                due = [c for c in self._active.values() if c.deadline <= now]
+                if not due:
+                    pending = [c.deadline for c in self._active.values()]
+                    self._cond.wait(timeout=(min(pending) - now) if pending else None)
+                    continue
+
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or frame.f_code.co_filename.endswith(IDLE_MODULES):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks.append(tuple(reversed(stack)))
+
+            with self._cond:
+                for capture in due:
+                    if capture.sampling_from is None:
+                        capture.sampling_from = now
+                    capture.samples += 1
+                    capture.stacks.update(stacks)
+            time.sleep(self.interval)
+
+    def _summarize(self, capture: _Capture, status_code: int, duration_ms: float, top: int = 25) -> dict:
+        own = Counter()
+        cumulative = Counter()
+        for stack, count in capture.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                cumulative[label] += count
+
+        collapsed = [f"{';'.join(stack)} {count}" for stack, count in capture.stacks.most_common(top)]
+        return {
+            "id": capture.id,
+            "method": capture.method,
+            "path": capture.path,
+            "trigger": "requested" if capture.forced else "slow",
+            "status": status_code,
+            "duration_ms": round(duration_ms, 1),
+            "sampled_from_ms": round((capture.sampling_from - capture.started) * 1000, 1),
+            "samples": capture.samples,
+            "interval_ms": round(self.interval * 1000, 2),
+            "concurrent": capture.concurrent,
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "self": own.most_common(top),
+            "cumulative": cumulative.most_common(top),
+            "collapsed_stacks": collapsed
+        }
+
+    # ---------------------------------------------
+    # Reporting
+    # ---------------------------------------------
+    def list_profiles(self) -> List[dict]:
+        keys = ("id", "method", "path", "trigger", "status", "duration_ms", "samples", "at")
+        return [{k: p[k] for k in keys} for p in reversed(self.profiles)]
+
+    def get_profile(self, profile_id: int) -> Optional[dict]:
+        return next((p for p in self.profiles if p["id"] == profile_id), None)
+
+    def config(self) -> dict:
+        return {
+            "on_demand_enabled": self.enabled,
+            "profile_slow_requests": self.profile_slow,
+            "slow_request_ms": self.slow_ms,
+            "sample_interval_ms": round(self.interval * 1000, 2)
+        }
+
+
+request_profiler = RequestProfiler()
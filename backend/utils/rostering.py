@@ -0,0 +1,236 @@
+import bisect
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# Rostering defaults
+# -------------------------------------------------
+DEFAULT_TURNAROUND_MINUTES = 5.0
+DEFAULT_INDUCTION_LEAD_MINUTES = 20.0
+LOCAL_SEARCH_PASSES = 50
+
+
+def gtfs_seconds(times: pd.Series) -> np.ndarray:
+    """
+    HH:MM:SS (hours may exceed 24) to seconds after service-day midnight
+    """
+    parts = times.str.split(":", expand=True).astype(int)
+    return (parts[0] * 3600 + parts[1] * 60 + parts[2]).to_numpy()
+
+def format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
+
+# -------------------------------------------------
+# Trip summaries
+# -------------------------------------------------
+def load_trip_summaries(stop_times_path: str, trips_path: str) -> pd.DataFrame:
+    """
+    One row per trip: service, terminals, first departure, last arrival, km
+    """
+    stop_times = pd.read_csv(
+        stop_times_path,
+        usecols=["trip_id", "stop_sequence", "stop_id", "arrival_time", "departure_time", "shape_dist_traveled"]
+    ).sort_values(["trip_id", "stop_sequence"])
+    trips = pd.read_csv(trips_path, usecols=["trip_id", "service_id", "direction_id"])
+
+    grouped = stop_times.groupby("trip_id", sort=False)
+    summary = pd.DataFrame({
+        "start_stop": grouped["stop_id"].first(),
+        "end_stop": grouped["stop_id"].last(),
+        "departure": grouped["departure_time"].first(),
+        "arrival": grouped["arrival_time"].last(),
+        # Distances are measured from the line terminus, so trips that
+        # start mid-line (e.g. out of Muttom depot) begin above zero
+        "km": grouped["shape_dist_traveled"].last() - grouped["shape_dist_traveled"].first()
+    }).reset_index()
+
+    summary["departure"] = gtfs_seconds(summary["departure"])
+    summary["arrival"] = gtfs_seconds(summary["arrival"])
+    return summary.merge(trips, on="trip_id").sort_values("departure").reset_index(drop=True)
+
+# -------------------------------------------------
+# Blocks: chains of trips one rake can run
+# -------------------------------------------------
+def build_blocks(trips: pd.DataFrame, turnaround_minutes: float = DEFAULT_TURNAROUND_MINUTES) -> List[dict]:
+    """
+    Chain trips into blocks in departure order
+
+    A trip continues the block that is waiting at its start terminal and
+    became ready most recently (best fit, least idle time). When no block
+    is ready there, a new rake has to be inducted for it.
+    """
+    turnaround = turnaround_minutes * 60
+    blocks: List[dict] = []
+    # terminal -> sorted list of (ready_time, block index)
+    waiting: Dict[str, list] = {}
+
+    for trip in trips.itertuples(index=False):
+        queue = waiting.setdefault(trip.start_stop, [])
+        pos = bisect.bisect_right(queue, (trip.departure - turnaround, len(blocks)))
+
+        if pos > 0:
+            _, block_id = queue.pop(pos - 1)
+            block = blocks[block_id]
+        else:
+            block_id = len(blocks)
+            block = {"trips": [], "start_stop": trip.start_stop, "first_departure": trip.departure, "km": 0.0}
+            blocks.append(block)
+
+        block["trips"].append(trip.trip_id)
+        block["km"] += float(trip.km)
+        block["end_stop"] = trip.end_stop
+        block["last_arrival"] = trip.arrival
+        bisect.insort(waiting.setdefault(trip.end_stop, []), (trip.arrival, block_id))
+
+    return blocks
+
+# -------------------------------------------------
+# Rake assignment with mileage balancing
+# -------------------------------------------------
+def _fits(rake: dict, km: float) -> bool:
+    remaining = rake.get("km_to_maintenance")
+    return remaining is None or remaining >= km
+
+def assign_rakes(blocks: List[dict], rakes: List[dict]) -> dict:
+    """
+    Greedy longest-block-first assignment, then pairwise-swap local search
+
+    Only fit rakes are used, and a rake is never given more km than it
+    has left before maintenance. The objective is the spread of
+    cumulative mileage after today's service (sum of squared deviations
+    from the mean), so high-mileage rakes get the shorter blocks.
+    """
+    available = [r for r in rakes if r.get("fit", True) and (r.get("km_to_maintenance") is None or r["km_to_maintenance"] > 0)]
+    available.sort(key=lambda r: r.get("mileage_km", 0.0))
+
+    assignment: Dict[int, dict] = {}
+    unassigned = []
+    free = list(available)
+
+    for block_id in sorted(range(len(blocks)), key=lambda b: -blocks[b]["km"]):
+        km = blocks[block_id]["km"]
+        choice = next((r for r in free if _fits(r, km)), None)
+        if choice is None:
+            unassigned.append(block_id)
+            continue
+        free.remove(choice)
+        assignment[block_id] = choice
+
+    def mileage_after(rake, km):
+        return rake.get("mileage_km", 0.0) + km
+
+    def spread():
+        totals = [mileage_after(r, blocks[b]["km"]) for b, r in assignment.items()]
+        totals += [r.get("mileage_km", 0.0) for r in free]
+        return float(np.var(totals)) if totals else 0.0
+
+    initial_spread = spread()
+
+    # Local search: swap rakes between two blocks, or with a spare rake,
+    # whenever it narrows the mileage spread
+    for _ in range(LOCAL_SEARCH_PASSES):
+        improved = False
+        block_ids = list(assignment)
+
+        for i, a in enumerate(block_ids):
+            for b in block_ids[i + 1:]:
+                ra, rb = assignment[a], assignment[b]
+                ka, kb = blocks[a]["km"], blocks[b]["km"]
+                if not (_fits(ra, kb) and _fits(rb, ka)):
+                    continue
+                before = mileage_after(ra, ka) ** 2 + mileage_after(rb, kb) ** 2
+                after = mileage_after(ra, kb) ** 2 + mileage_after(rb, ka) ** 2
+                if after < before - 1e-9:
+                    assignment[a], assignment[b] = rb, ra
+                    improved = True
+
+            for spare in list(free):
+                rake = assignment[a]
+                km = blocks[a]["km"]
+                if not _fits(spare, km):
+                    continue
+                before = mileage_after(rake, km) ** 2 + rake.get("mileage_km", 0.0) ** 2
+                after = mileage_after(spare, km) ** 2 + spare.get("mileage_km", 0.0) ** 2
+                if after < before - 1e-9:
+                    free.remove(spare)
+                    free.append(rake)
+                    assignment[a] = spare
+                    improved = True
+
+        if not improved:
+            break
+
+    return {
+        "assignment": assignment,
+        "unassigned": unassigned,
+        "standby": free,
+        "initial_spread": initial_spread,
+        "final_spread": spread()
+    }
+
+# -------------------------------------------------
+# Full roster
+# -------------------------------------------------
+def default_fleet(size: int) -> List[dict]:
+    return [{"rake_id": f"R{i + 1:02d}", "fit": True, "mileage_km": 0.0} for i in range(size)]
+
+def build_roster(trips: pd.DataFrame, service_id: str, rakes: List[dict],
+                 turnaround_minutes: float = DEFAULT_TURNAROUND_MINUTES,
+                 induction_lead_minutes: float = DEFAULT_INDUCTION_LEAD_MINUTES) -> dict:
+    """
+    Blocks, rake assignment and nightly induction order for one service day
+    """
+    started = time.perf_counter()
+
+    day_trips = trips[trips["service_id"] == service_id]
+    blocks = build_blocks(day_trips, turnaround_minutes)
+    result = assign_rakes(blocks, rakes)
+
+    lead = induction_lead_minutes * 60
+    duties = []
+    for block_id, rake in result["assignment"].items():
+        block = blocks[block_id]
+        duties.append({
+            "rake_id": rake["rake_id"],
+            "trips": block["trips"],
+            "trip_count": len(block["trips"]),
+            "start_stop": block["start_stop"],
+            "end_stop": block["end_stop"],
+            "first_departure": format_seconds(block["first_departure"]),
+            "last_arrival": format_seconds(block["last_arrival"]),
+            "induct_by": format_seconds(max(block["first_departure"] - lead, 0)),
+            "block_km": round(block["km"], 2),
+            "mileage_after_km": round(rake.get("mileage_km", 0.0) + block["km"], 1),
+            "_departure": block["first_departure"]
+        })
+
+    # Induction order: rakes leave the depot in order of first departure
+    duties.sort(key=lambda d: d["_departure"])
+    for position, duty in enumerate(duties, start=1):
+        duty["induction_sequence"] = position
+        del duty["_departure"]
+
+    unassigned = [blocks[b] for b in result["unassigned"]]
+    return {
+        "service_id": service_id,
+        "trips": int(len(day_trips)),
+        "blocks": len(blocks),
+        "rakes_required": len(blocks),
+        "rakes_available": len(result["assignment"]) + len(result["standby"]),
+        "duties": duties,
+        "induction_order": [d["rake_id"] for d in duties],
+        "standby": [r["rake_id"] for r in result["standby"]],
+        "unfit": [r["rake_id"] for r in rakes if not r.get("fit", True)],
+        "uncovered_blocks": [
+            {"first_departure": format_seconds(b["first_departure"]), "trips": b["trips"]} for b in unassigned
+        ],
+        "mileage_spread_km": {
+            "greedy": round(float(np.sqrt(result["initial_spread"])), 2),
+            "local_search": round(float(np.sqrt(result["final_spread"])), 2)
+        },
+        "solve_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
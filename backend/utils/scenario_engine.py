@@ -0,0 +1,117 @@
+from datetime import date
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+# -------------------------------------------------
+# Scenario constants
+# -------------------------------------------------
+STATION_COUNT = 12
+HOURS = np.arange(6, 23)  # peak operational hours
+
+BASE_TRAINS = 12
+MIN_AVAILABLE_TRAINS = 2
+TRAIN_CAPACITY = 1000
+BASE_HEADWAY = 4  # minutes
+ENERGY_PER_TRAIN = 1.2
+
+RAIN_FACTOR = 1.10
+FESTIVAL_FACTOR = 1.25
+
+RISK_LEVELS = np.array(["Low", "Medium", "High"])
+
+# Peak / weekend shaping shared by every station profile
+_PEAK_FACTOR = np.where(((HOURS >= 8) & (HOURS <= 10)) | ((HOURS >= 17) & (HOURS <= 20)), 1.6, 1.0)
+
+# -------------------------------------------------
+# Base demand
+# -------------------------------------------------
+def predict_base_demand(selected_date: date, weekend: Optional[bool] = None) -> int:
+    """
+    Line-wide daily demand for a date
+
+    Seeded by the date so the same day always yields the same base.
+    Draws happen in the same order as the original per-hour loop, so the
+    values match what the simulator page has always shown. `weekend`
+    (e.g. from the service calendar, where holidays count) overrides the
+    Saturday/Sunday rule.
+    """
+    rng = np.random.RandomState(int(selected_date.strftime("%Y%m%d")))
+    if weekend is None:
+        weekend = selected_date.weekday() >= 5
+    weekend_factor = 0.8 if weekend else 1.0
+
+    total_demand = 0.0
+    for _ in range(STATION_COUNT):
+        base = rng.randint(200, 600)
+        noise = rng.uniform(0.85, 1.15, size=len(HOURS))
+        total_demand += float(np.sum(base * _PEAK_FACTOR * weekend_factor * noise))
+
+    return int(total_demand)
+
+# -------------------------------------------------
+# Vectorized scenario evaluation
+# -------------------------------------------------
+def simulate_scenarios(base_demand: Sequence[float], demand_increase: Sequence[float],
+                       unavailable_trains: Sequence[int], rain: Sequence[bool],
+                       festival: Sequence[bool], base_trains: int = BASE_TRAINS) -> Dict[str, np.ndarray]:
+    """
+    Evaluate a whole table of scenarios in one NumPy pass
+
+    Every argument is broadcast against the others, so a scalar base
+    demand can be combined with arrays of scenario knobs.
+    """
+    base_demand = np.asarray(base_demand, dtype=float)
+    demand_increase = np.asarray(demand_increase, dtype=float)
+    unavailable_trains = np.asarray(unavailable_trains, dtype=int)
+    rain = np.asarray(rain, dtype=bool)
+    festival = np.asarray(festival, dtype=bool)
+
+    demand = base_demand * (1 + demand_increase / 100)
+    demand = demand * np.where(rain, RAIN_FACTOR, 1.0) * np.where(festival, FESTIVAL_FACTOR, 1.0)
+
+    available_trains = np.maximum(MIN_AVAILABLE_TRAINS, base_trains - unavailable_trains)
+    load_factor = demand / (available_trains * TRAIN_CAPACITY)
+
+    waiting_time = np.round(BASE_HEADWAY * load_factor, 1)
+    energy_use = np.round(available_trains * ENERGY_PER_TRAIN, 1)
+
+    risk = RISK_LEVELS[(load_factor > 0.85).astype(int) + (load_factor > 1.1).astype(int)]
+
+    demand, available_trains, load_factor, waiting_time, energy_use, risk = np.broadcast_arrays(
+        demand, available_trains, load_factor, waiting_time, energy_use, risk
+    )
+
+    return {
+        "demand": demand,
+        "available_trains": available_trains,
+        "load_factor": load_factor,
+        "waiting_time": waiting_time,
+        "energy_use": energy_use,
+        "risk": risk
+    }
+
+def baseline_metrics(base_demand: float, base_trains: int = BASE_TRAINS) -> dict:
+    """
+    Normal-operations reference used for before/after comparisons
+    """
+    return {
+        "demand": float(base_demand),
+        "available_trains": base_trains,
+        "waiting_time": BASE_HEADWAY,
+        "energy_use": round(base_trains * ENERGY_PER_TRAIN, 1)
+    }
+
+def simulate_scenario(base_demand: float, demand_inc: float, trains_down: int,
+                      rain: bool, festival: bool):
+    """
+    Single-scenario convenience wrapper
+    """
+    result = simulate_scenarios(base_demand, demand_inc, trains_down, rain, festival)
+    return (
+        float(result["demand"]),
+        int(result["available_trains"]),
+        float(result["waiting_time"]),
+        float(result["energy_use"]),
+        str(result["risk"])
+    )
@@ -0,0 +1,132 @@
+import json
+from typing import Any, Optional
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+# Optional fast encoders; every response still works without them
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# -------------------------------------------------
+# Media types
+# -------------------------------------------------
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def _default(obj: Any):
+    # NumPy values orjson could not take natively (e.g. non-contiguous
+    # slices), and everything the stdlib encoder cannot
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+def dumps_json(content: Any) -> bytes:
+    """
+    JSON bytes, encoding NumPy arrays and scalars directly
+
+    Non-finite floats become null (as orjson writes them) and dict keys
+    may be ints, like the response models produce.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default,
+                           option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_finite(content), default=_default, separators=(",", ":")).encode()
+
+def _finite(obj: Any):
+    # Stdlib fallback: match orjson's null for NaN / inf
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, np.ndarray) and obj.dtype.kind == "f":
+        return [_finite(x) for x in obj.tolist()]
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(x) for x in obj]
+    return obj
+
+def dumps_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+def dumps_arrow(content: dict) -> bytes:
+    """
+    Arrow IPC stream of a column-shaped response
+
+    Top-level 1-D arrays/lists of the common length become columns; the
+    remaining fields travel as JSON in the schema metadata.
+    """
+    lengths = {len(v) for v in content.values() if isinstance(v, (list, np.ndarray)) and np.ndim(v) == 1}
+    if len(lengths) != 1:
+        raise ValueError("Response is not column-shaped")
+    length = lengths.pop()
+
+    columns, metadata = {}, {}
+    for key, value in content.items():
+        if isinstance(value, (list, np.ndarray)) and np.ndim(value) == 1 and len(value) == length:
+            columns[key] = value
+        else:
+            metadata[key] = dumps_json(value)
+
+    table = pa.table(columns).replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson (NumPy-aware) when available
+    """
+
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+# -------------------------------------------------
+# Content negotiation
+# -------------------------------------------------
+def encoded_response(request: Optional[Request], content: Any, status_code: int = 200) -> Response:
+    """
+    Response for trusted internal data, encoded as the client's Accept
+    header asks: MessagePack or Arrow when installed, JSON otherwise
+
+    Returning a Response bypasses FastAPI's jsonable_encoder pass and
+    response-model validation, so NumPy arrays are encoded once, directly.
+    """
+    accept = request.headers.get("accept", "") if request is not None else ""
+
+    if msgpack is not None and any(media in accept for media in MSGPACK_MEDIA_TYPES):
+        return Response(dumps_msgpack(content), status_code=status_code, media_type=MSGPACK_MEDIA_TYPES[0])
+
+    if pa is not None and ARROW_MEDIA_TYPE in accept and isinstance(content, dict):
+        try:
+            return Response(dumps_arrow(content), status_code=status_code, media_type=ARROW_MEDIA_TYPE)
+        except ValueError:
+            pass
+
+    return FastJSONResponse(content, status_code=status_code)
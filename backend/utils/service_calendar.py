@@ -0,0 +1,189 @@
+import datetime
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.feature_engineering import DAY_COLUMNS, weekend_flag
+
+# -------------------------------------------------
+# Default feed locations
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CALENDAR_PATH = os.path.join(BASE_DIR, "data", "raw", "calendar.csv")
+CALENDAR_DATES_PATH = os.path.join(BASE_DIR, "data", "raw", "calendar_dates.csv")
+HOLIDAYS_PATH = os.path.join(BASE_DIR, "data", "holidays.csv")
+
+# GTFS calendar_dates exception types
+SERVICE_ADDED = 1
+SERVICE_REMOVED = 2
+
+# Holiday kinds: "holiday" days behave like weekends for demand;
+# "festival" and "event" days carry the festival demand uplift
+HOLIDAY_KINDS = ("holiday", "festival", "event")
+
+
+def _parse_date(value) -> datetime.date:
+    # GTFS dates are YYYYMMDD; the holiday list uses ISO dates
+    value = str(value)
+    return datetime.datetime.strptime(value, "%Y-%m-%d" if "-" in value else "%Y%m%d").date()
+
+
+class ServiceCalendar:
+    """
+    Date -> running services, resolved by one array index.
+
+    calendar.csv weekday patterns, calendar_dates.csv exceptions (when the
+    feed has them) and the local holiday list are expanded once into
+    per-day arrays over the feed's validity range: a service bitmask
+    (bit i = self.service_ids[i]) and an index into the holiday table.
+    Every date lookup afterwards is `(date - origin).days`.
+    """
+
+    def __init__(self, calendar_path: str = CALENDAR_PATH,
+                 calendar_dates_path: Optional[str] = CALENDAR_DATES_PATH,
+                 holidays_path: Optional[str] = HOLIDAYS_PATH):
+        calendar = pd.read_csv(calendar_path, dtype={"service_id": str, "start_date": str, "end_date": str})
+        if len(calendar) > 64:
+            raise ValueError("ServiceCalendar supports at most 64 service_ids")
+
+        self.service_ids: List[str] = calendar["service_id"].tolist()
+        self.service_bit = {s: 1 << i for i, s in enumerate(self.service_ids)}
+        # Same weekend rule the demand model was trained with
+        self.weekend_services = weekend_flag(calendar).astype(bool)
+
+        starts = calendar["start_date"].map(_parse_date)
+        ends = calendar["end_date"].map(_parse_date)
+        self.origin = min(starts)
+        self.n_days = (max(ends) - self.origin).days + 1
+
+        # ---- Weekly patterns within each service's date range
+        day_numbers = np.arange(self.n_days)
+        weekdays = (self.origin.weekday() + day_numbers) % 7
+        self.mask = np.zeros(self.n_days, dtype=np.uint64)
+        pattern = calendar[DAY_COLUMNS].to_numpy(dtype=bool)
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            in_range = (day_numbers >= (start - self.origin).days) & (day_numbers <= (end - self.origin).days)
+            running = in_range & pattern[i][weekdays]
+            self.mask[running] |= np.uint64(1 << i)
+
+        # ---- Exceptions (GTFS calendar_dates.csv)
+        self.exceptions = 0
+        if calendar_dates_path and os.path.exists(calendar_dates_path):
+            exceptions = pd.read_csv(calendar_dates_path, dtype={"service_id": str, "date": str})
+            for row in exceptions.itertuples(index=False):
+                self._apply_exception(_parse_date(row.date), row.service_id, int(row.exception_type))
+            self.exceptions = len(exceptions)
+
+        # ---- Local holidays / festivals / events
+        self.holidays: List[dict] = []
+        self.holiday_index = np.full(self.n_days, -1, dtype=np.int32)
+        self._holiday_by_date: Dict[datetime.date, int] = {}
+        if holidays_path and os.path.exists(holidays_path):
+            holidays = pd.read_csv(holidays_path, dtype=str, keep_default_na=False)
+            holidays["date"] = holidays["date"].map(_parse_date)
+            unknown = set(holidays["kind"]) - set(HOLIDAY_KINDS)
+            if unknown:
+                raise ValueError(f"Unknown holiday kind(s) in {holidays_path}: {sorted(unknown)}")
+            self.holidays = holidays.to_dict("records")
+
+            for i, row in enumerate(self.holidays):
+                self._holiday_by_date[row["date"]] = i
+                offset = self._offset(row["date"])
+                if offset is not None:
+                    self.holiday_index[offset] = i
+                # A holiday may run another timetable (e.g. the Sunday one)
+                if row.get("service_id"):
+                    for service in self.service_ids:
+                        self._apply_exception(row["date"], service, SERVICE_REMOVED)
+                    self._apply_exception(row["date"], row["service_id"], SERVICE_ADDED)
+
+    def _offset(self, day: datetime.date) -> Optional[int]:
+        offset = (day - self.origin).days
+        return offset if 0 <= offset < self.n_days else None
+
+    def _apply_exception(self, day: datetime.date, service_id: str, exception_type: int):
+        offset = self._offset(day)
+        if offset is None or service_id not in self.service_bit:
+            return
+        bit = np.uint64(self.service_bit[service_id])
+        if exception_type == SERVICE_ADDED:
+            self.mask[offset] |= bit
+        elif exception_type == SERVICE_REMOVED:
+            self.mask[offset] &= ~bit
+
+    # ---------------------------------------------
+    # Lookups
+    # ---------------------------------------------
+    def service_mask(self, day: datetime.date) -> int:
+        offset = self._offset(day)
+        return int(self.mask[offset]) if offset is not None else 0
+
+    def services_on(self, day: datetime.date) -> List[str]:
+        mask = self.service_mask(day)
+        return [s for s in self.service_ids if mask & self.service_bit[s]]
+
+    def running_services(self, day: datetime.date) -> List[str]:
+        """
+        services_on within the feed; outside it, the plain weekday or
+        weekend timetable, the same fallback is_weekend uses
+        """
+        if self._offset(day) is not None:
+            return self.services_on(day)
+        wanted = bool(self.is_weekend(day))
+        return [s for s, weekend in zip(self.service_ids, self.weekend_services) if weekend == wanted][:1]
+
+    def holiday(self, day: datetime.date) -> Optional[dict]:
+        offset = self._offset(day)
+        index = int(self.holiday_index[offset]) if offset is not None else self._holiday_by_date.get(day, -1)
+        if index < 0:
+            return None
+        row = self.holidays[index]
+        return {"name": row["name"], "kind": row["kind"]}
+
+    def is_weekend(self, day: datetime.date) -> int:
+        """
+        The demand model's is_weekend flag for a date
+
+        Holidays count as weekends. Otherwise the flag follows the running
+        services, classified with the model's own weekend rule; dates
+        outside the feed fall back to Saturday/Sunday.
+        """
+        holiday = self.holiday(day)
+        if holiday is not None and holiday["kind"] == "holiday":
+            return 1
+        services = [self.service_ids.index(s) for s in self.services_on(day)]
+        if services:
+            return int(all(self.weekend_services[i] for i in services))
+        return int(day.weekday() >= 5)
+
+    def is_festival(self, day: datetime.date) -> bool:
+        holiday = self.holiday(day)
+        return holiday is not None and holiday["kind"] in ("festival", "event")
+
+    def day_info(self, day: datetime.date) -> dict:
+        return {
+            "date": day.isoformat(),
+            "in_feed": self._offset(day) is not None,
+            "service_ids": self.services_on(day),
+            "day_type": "weekend" if self.is_weekend(day) else "weekday",
+            "holiday": self.holiday(day),
+            "festival": self.is_festival(day)
+        }
+
+    @property
+    def valid_range(self) -> tuple:
+        return self.origin, self.origin + datetime.timedelta(days=self.n_days - 1)
+
+
+_default_calendar = None
+
+def get_service_calendar() -> ServiceCalendar:
+    """
+    Calendar over the bundled feed and holiday list (built on first use)
+    """
+    global _default_calendar
+    if _default_calendar is None:
+        _default_calendar = ServiceCalendar()
+    return _default_calendar
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# -------------------------------------------------
+# Request coalescing
+# -------------------------------------------------
+MAX_TRACKED_KEYS = 1024
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one execution.
+
+    The first caller for a key runs the function; callers arriving while
+    it is still in flight wait for it and receive the same result (or the
+    same exception). Nothing is cached once the call completes, so results
+    never go stale; this only flattens bursts of identical requests.
+    Handlers using it must be sync (threadpool) endpoints.
+    """
+
+    def __init__(self, name: str, max_tracked_keys: int = MAX_TRACKED_KEYS):
+        self.name = name
+        self.max_tracked_keys = max_tracked_keys
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._metrics: "OrderedDict[Hashable, dict]" = OrderedDict()
+
+    def _key_metrics(self, key) -> dict:
+        # Caller holds the lock; least recently used keys are evicted
+        entry = self._metrics.get(key)
+        if entry is None:
+            entry = {"requests": 0, "executions": 0, "coalesced": 0, "errors": 0,
+                     "total_ms": 0.0, "max_waiters": 0}
+            self._metrics[key] = entry
+            if len(self._metrics) > self.max_tracked_keys:
+                self._metrics.popitem(last=False)
+        else:
+            self._metrics.move_to_end(key)
+        return entry
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn() once per in-flight key; returns (result, shared)
+        """
+        with self._lock:
+            metrics = self._key_metrics(key)
+            metrics["requests"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                metrics["coalesced"] += 1
+                metrics["max_waiters"] = max(metrics["max_waiters"], call.waiters)
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                metrics["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        start = time.perf_counter()
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                del self._calls[key]
+                metrics = self._key_metrics(key)
+                metrics["total_ms"] += elapsed
+                if call.error is not None:
+                    metrics["errors"] += 1
+            call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result, False
+
+    def stats(self, top: int = 20) -> dict:
+        with self._lock:
+            items = [(key, dict(entry)) for key, entry in self._metrics.items()]
+            in_flight = len(self._calls)
+
+        totals = {"requests": 0, "executions": 0, "coalesced": 0, "errors": 0}
+        for _, entry in items:
+            for field in totals:
+                totals[field] += entry[field]
+
+        busiest = sorted(items, key=lambda item: -item[1]["requests"])[:top]
+        keys = []
+        for key, entry in busiest:
+            executions = max(entry["executions"], 1)
+            keys.append({
+                "key": str(key),
+                "requests": entry["requests"],
+                "executions": entry["executions"],
+                "coalesced": entry["coalesced"],
+                "errors": entry["errors"],
+                "max_waiters": entry["max_waiters"],
+                "avg_ms": round(entry["total_ms"] / executions, 2)
+            })
+
+        return {
+            "name": self.name,
+            "in_flight": in_flight,
+            "tracked_keys": len(items),
+            **totals,
+            "coalesced_ratio": round(totals["coalesced"] / totals["requests"], 3) if totals["requests"] else 0.0,
+            "keys": keys
+        }
+
+
+# -------------------------------------------------
+# Named groups (shared across routers)
+# -------------------------------------------------
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+def single_flight(name: str) -> SingleFlight:
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+def single_flight_stats(top: int = 20) -> Dict[str, dict]:
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats(top) for group in groups}
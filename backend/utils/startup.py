@@ -0,0 +1,96 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# -------------------------------------------------
+# Startup profiling + readiness
+# -------------------------------------------------
+class StartupProfile:
+    """
+    Where boot time goes, and whether the process is ready for traffic.
+
+    Router imports are timed as the app module loads them; heavy artifacts
+    (models, timetable-derived tables) are then loaded by warm-up tasks on
+    a background thread, so the server starts listening (liveness) before
+    it is ready to serve fast (readiness).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports: Dict[str, dict] = {}
+        self.warmup: Dict[str, float] = {}
+        self.failed: Dict[str, str] = {}
+        self.pending: List[str] = []
+        self.critical: set = set()
+        self.warmed_up = threading.Event()
+        self._thread = None
+
+    @contextmanager
+    def timed_import(self, name: str):
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        yield
+        self.imports[name] = {
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+            "new_modules": len(sys.modules) - modules_before
+        }
+
+    def _run(self, tasks: List[Tuple[str, Callable]]):
+        for name, task in tasks:
+            start = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                # A missing optional artifact does not block readiness (the
+                # endpoints that need it report their own errors); a failed
+                # critical task keeps the process not ready
+                self.failed[name] = str(e)
+            self.warmup[name] = round((time.perf_counter() - start) * 1000, 1)
+            self.pending.remove(name)
+        self.warmed_up.set()
+        for line in self.summary_lines():
+            print(line)
+
+    def start_warmup(self, tasks: List[Tuple[str, Callable]], critical: Iterable[str] = ()):
+        """
+        Run warm-up tasks in order on a daemon thread (once per process);
+        the process is only ready if every `critical` task succeeded
+        """
+        if self._thread is not None:
+            return
+        self.critical = set(critical)
+        self.pending = [name for name, _ in tasks]
+        self._thread = threading.Thread(target=self._run, args=(tasks,), name="startup-warmup", daemon=True)
+        self._thread.start()
+
+    def summary_lines(self) -> List[str]:
+        slowest = sorted(self.imports.items(), key=lambda item: -item[1]["ms"])
+        lines = ["Startup import profile:"]
+        lines += [f"  {name:<24} {entry['ms']:>8.1f} ms  (+{entry['new_modules']} modules)" for name, entry in slowest]
+        if self.warmup:
+            lines.append("Startup warm-up:")
+            lines += [f"  {name:<24} {ms:>8.1f} ms" for name, ms in self.warmup.items()]
+        for name, error in self.failed.items():
+            label = "critical warm-up" if name in self.critical else "warm-up"
+            lines.append(f"  {label} {name} failed: {error}")
+        return lines
+
+    def is_ready(self) -> bool:
+        return self.warmed_up.is_set() and not self.critical.intersection(self.failed)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "warmed_up": self.warmed_up.is_set(),
+            "critical_failed": sorted(self.critical.intersection(self.failed)),
+            "pending": list(self.pending),
+            "failed": dict(self.failed),
+            "uptime_s": round(time.perf_counter() - self.started, 1),
+            "imports_ms": {name: entry["ms"] for name, entry in self.imports.items()},
+            "warmup_ms": dict(self.warmup)
+        }
+
+
+startup = StartupProfile()
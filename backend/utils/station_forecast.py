@@ -0,0 +1,76 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.feature_engineering import iter_feature_chunks, peak_hour_flag, trains_per_hour_table
+
+DIRECTIONS = np.array([0, 1])
+
+# -------------------------------------------------
+# Station x hour x direction forecasting
+# -------------------------------------------------
+class StationDemandForecaster:
+    """
+    Builds the full stop x hour x direction feature grid once per day type
+    and predicts it with a single batched model call.
+
+    The demand model is trained on per-stop timetable rows, and its
+    trains_per_hour feature is per (stop, hour), so feeding each stop's
+    own service frequency yields station-specific predictions. Shared
+    features (hour, peak flag, direction, weekend) are computed once and
+    broadcast across stations instead of being rebuilt per stop.
+    """
+
+    def __init__(self, processed_path: str, stops_path: str):
+        stops = pd.read_csv(stops_path, usecols=["stop_id", "stop_name"])
+        self.stop_ids: List[str] = stops["stop_id"].tolist()
+        self.stop_names: List[str] = stops["stop_name"].tolist()
+
+        # Same (stop, hour) service frequency the model was trained on
+        table = trains_per_hour_table(list(iter_feature_chunks(processed_path)))
+        grid = pd.MultiIndex.from_product([self.stop_ids, range(24)])
+        self.trains_per_hour = (
+            table.reindex(grid).fillna(1).to_numpy(dtype=np.float32).reshape(len(self.stop_ids), 24)
+        )
+
+        self._grids: Dict[tuple, pd.DataFrame] = {}
+
+    @property
+    def shape(self):
+        return len(self.stop_ids), 24, len(DIRECTIONS)
+
+    def feature_grid(self, features: Sequence[str], is_weekend: int) -> pd.DataFrame:
+        """
+        Model input for every (stop, hour, direction), cached per day type
+        """
+        key = (tuple(features), int(is_weekend))
+        if key in self._grids:
+            return self._grids[key]
+
+        n_stops, n_hours, n_dirs = self.shape
+        hours = np.arange(n_hours)
+
+        # Each column is built at its natural shape, then broadcast
+        columns = {
+            "hour": hours[None, :, None],
+            "is_peak_hour": peak_hour_flag(hours)[None, :, None],
+            "is_weekend": np.full((1, 1, 1), int(is_weekend)),
+            "trains_per_hour": self.trains_per_hour[:, :, None],
+            "direction_id": DIRECTIONS[None, None, :],
+            "stop_index": np.arange(n_stops)[:, None, None]
+        }
+
+        grid = pd.DataFrame({
+            name: np.broadcast_to(columns.get(name, np.zeros((1, 1, 1))), self.shape).ravel().astype(np.float32)
+            for name in features
+        })
+        self._grids[key] = grid
+        return grid
+
+    def forecast(self, serving, is_weekend: int) -> np.ndarray:
+        """
+        Demand tensor of shape (stops, 24, directions) from one predict call
+        """
+        grid = self.feature_grid(serving.features, is_weekend)
+        return serving.predict(grid).reshape(self.shape)
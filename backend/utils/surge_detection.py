@@ -1,3 +1,10 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
 def detect_surge(predicted_demand: int, threshold: int = 7000):
     """
     Detect abnormal passenger surges
@@ -17,3 +24,207 @@ def detect_surge(predicted_demand: int, threshold: int = 7000):
             "surge": False,
             "severity": "Low"
         }
+
+
+# -------------------------------------------------
+# Streaming surge detection
+# -------------------------------------------------
+HOURS_PER_DAY = 24
+SEVERITY_RANK = {"Low": 0, "Medium": 1, "High": 2}
+
+# Observed counts update the baselines; predictions are only scored
+EVENT_KINDS = ("observed", "predicted")
+
+
+class StreamingSurgeDetector:
+    """
+    Per-station, per-hour rolling baselines over a demand stream.
+
+    Every station owns one fixed row of preallocated arrays: an EWMA
+    mean/variance slot for each hour of the day and a ring buffer of its
+    most recent observations. Scoring and updating an event touches one
+    slot, so ingest is O(1) per event and memory per station is constant
+    no matter how many counts arrive.
+
+    Only "observed" events move the baseline; "predicted" events are
+    scored against it so forecast surges are flagged before they happen.
+    """
+
+    def __init__(self, max_stations: int = 64, window: int = 96, alpha: float = 0.1,
+                 z_medium: float = 2.0, z_high: float = 3.0, warmup: int = 8,
+                 threshold: int = 7000, active_ttl: float = 900.0):
+        self.max_stations = max_stations
+        self.window = window
+        self.alpha = alpha
+        self.z_medium = z_medium
+        self.z_high = z_high
+        self.warmup = warmup
+        self.threshold = threshold
+        self.active_ttl = active_ttl
+
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._mean = np.zeros((max_stations, HOURS_PER_DAY))
+        self._var = np.zeros((max_stations, HOURS_PER_DAY))
+        self._count = np.zeros((max_stations, HOURS_PER_DAY), dtype=np.int64)
+        self._ring = np.zeros((max_stations, window), dtype=np.float32)
+        self._ring_pos = np.zeros(max_stations, dtype=np.int64)
+        self._active: Dict[tuple, dict] = {}
+        self.events_seen = 0
+
+    def _station_row(self, station: str) -> Optional[int]:
+        row = self._index.get(station)
+        if row is None and len(self._index) < self.max_stations:
+            row = len(self._index)
+            self._index[station] = row
+        return row
+
+    def _score(self, row: int, hour: int, value: float):
+        """
+        Z-score of a value against the (station, hour) baseline
+        """
+        if self._count[row, hour] < self.warmup:
+            # Not enough history yet: fall back to the fixed threshold rule
+            legacy = detect_surge(value, self.threshold)
+            return None, legacy["severity"]
+
+        std = float(np.sqrt(self._var[row, hour]))
+        z = (value - self._mean[row, hour]) / max(std, 1.0)
+
+        if z >= self.z_high:
+            return z, "High"
+        if z >= self.z_medium:
+            return z, "Medium"
+        return z, "Low"
+
+    def _update(self, row: int, hour: int, value: float):
+        mean = self._mean[row, hour]
+        count = self._count[row, hour]
+
+        if count == 0:
+            self._mean[row, hour] = value
+        else:
+            # Clip outliers so one surge does not drag the baseline along
+            # with it; the ring keeps the raw value
+            std = np.sqrt(self._var[row, hour])
+            clipped = value
+            if count >= self.warmup:
+                clipped = min(value, mean + self.z_high * max(std, 1.0))
+            diff = clipped - mean
+            incr = self.alpha * diff
+            self._mean[row, hour] = mean + incr
+            self._var[row, hour] = (1 - self.alpha) * (self._var[row, hour] + diff * incr)
+
+        self._count[row, hour] = count + 1
+        pos = self._ring_pos[row]
+        self._ring[row, pos % self.window] = value
+        self._ring_pos[row] = pos + 1
+
+    def ingest(self, station: str, hour: int, demand: float, kind: str = "observed"):
+        """
+        Score one event against its baseline and fold it in if observed;
+        None for unknown stations (beyond capacity) or event kinds
+        """
+        if kind not in EVENT_KINDS:
+            return None
+        hour = int(hour) % HOURS_PER_DAY
+        demand = float(demand)
+
+        with self._lock:
+            row = self._station_row(station)
+            if row is None:
+                return None
+
+            z, severity = self._score(row, hour, demand)
+            if kind == "observed":
+                self._update(row, hour, demand)
+            self.events_seen += 1
+
+            key = (station, hour, kind)
+            if severity != "Low":
+                self._active[key] = {
+                    "station": station,
+                    "hour": hour,
+                    "kind": kind,
+                    "demand": int(demand),
+                    "baseline": round(float(self._mean[row, hour]), 1),
+                    "z_score": None if z is None else round(float(z), 2),
+                    "severity": severity,
+                    "detected_at": time.time()
+                }
+            else:
+                self._active.pop(key, None)
+
+        return {
+            "station": station,
+            "hour": hour,
+            "surge": severity != "Low",
+            "severity": severity,
+            "z_score": None if z is None else round(float(z), 2)
+        }
+
+    def ingest_batch(self, events: List[dict]) -> dict:
+        """
+        Ingest a batch of events, returning only the flagged ones
+        """
+        flagged = []
+        rejected = 0
+
+        for event in events:
+            result = self.ingest(
+                event["station"],
+                event["hour"],
+                event["demand"],
+                event.get("kind", "observed")
+            )
+            if result is None:
+                rejected += 1
+            elif result["surge"]:
+                flagged.append(result)
+
+        return {
+            "ingested": len(events) - rejected,
+            "rejected": rejected,
+            "surges": flagged
+        }
+
+    def active_surges(self, min_severity: str = "Medium") -> List[dict]:
+        """
+        Surges seen within the TTL, most severe first
+        """
+        cutoff = time.time() - self.active_ttl
+        min_rank = SEVERITY_RANK.get(min_severity, 1)
+
+        with self._lock:
+            expired = [k for k, v in self._active.items() if v["detected_at"] < cutoff]
+            for key in expired:
+                del self._active[key]
+
+            surges = []
+            for event in self._active.values():
+                if SEVERITY_RANK[event["severity"]] < min_rank:
+                    continue
+                row = self._index[event["station"]]
+                filled = min(int(self._ring_pos[row]), self.window)
+                # Oldest first; with filled == 0 this is empty, not the whole ring
+                recent = np.roll(self._ring[row], -int(self._ring_pos[row]))[self.window - filled:]
+                surges.append({**event, "recent_observed": recent[-8:].astype(int).tolist()})
+
+        surges.sort(key=lambda e: (-SEVERITY_RANK[e["severity"]], -(e["z_score"] or 0)))
+        return surges
+
+    def stats(self) -> dict:
+        return {
+            "stations_tracked": len(self._index),
+            "max_stations": self.max_stations,
+            "events_seen": self.events_seen,
+            "active_surges": len(self._active),
+            "memory_bytes": int(
+                self._mean.nbytes + self._var.nbytes + self._count.nbytes +
+                self._ring.nbytes + self._ring_pos.nbytes
+            )
+        }
+
+
+# Shared detector used by the API
+surge_detector = StreamingSurgeDetector()
@@ -0,0 +1,343 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: the store is then single-process only
+    fcntl = None
+
+# -------------------------------------------------
+# Store layout
+# -------------------------------------------------
+BUCKET_SECONDS = 900  # 15 minutes
+RESOLUTIONS = {"15min": 900, "hour": 3600, "day": 86400}
+
+# Hour and day buckets follow local time (Asia/Kolkata, UTC+05:30, no DST)
+UTC_OFFSET_SECONDS = 19800
+
+# One record per appended (bucket, value); timestamps are epoch seconds
+RECORD = np.dtype([("t", "<i8"), ("v", "<f4")])
+
+# How repeated records for one bucket combine: partial passenger counts
+# add up, while a newer forecast replaces the older one
+BUCKET_AGGREGATION = {"observed": "sum", "forecast": "last"}
+
+
+def resolution_seconds(resolution: str) -> int:
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {list(RESOLUTIONS)}")
+    return RESOLUTIONS[resolution]
+
+
+class DemandSeries:
+    """
+    Append-only, memory-mapped series of (bucket, value) records.
+
+    Records live in a fixed-width binary file that grows by doubling; the
+    record count and sort state sit in a small JSON sidecar. Appends in
+    time order keep the file sorted. An out-of-order append only flags the
+    series, and the next read sorts it once (stable, so "last" still means
+    last written) before binary-searching the time range.
+
+    Every operation holds an exclusive flock on the series' lock file and
+    re-reads the sidecar (and re-maps the data file if another process
+    grew or replaced it), so several uvicorn workers can share one store.
+    Without fcntl (Windows) only one process may use a store.
+    """
+
+    def __init__(self, directory: str, aggregation: str, initial_capacity: int = 1024):
+        self.directory = directory
+        self.aggregation = aggregation
+        self.initial_capacity = initial_capacity
+        self.data_path = os.path.join(directory, "data.bin")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, "lock")
+        os.makedirs(directory, exist_ok=True)
+
+        self.count = 0
+        self.sorted = True
+        self.records = None
+        self._mapped = None
+        with self._locked():
+            pass
+
+    @staticmethod
+    def _allocate(path: str, capacity: int):
+        with open(path, "wb") as f:
+            f.truncate(capacity * RECORD.itemsize)
+
+    def _open(self):
+        stat = os.stat(self.data_path)
+        self.records = np.memmap(self.data_path, dtype=RECORD, mode="r+", shape=(stat.st_size // RECORD.itemsize,))
+        self._mapped = (stat.st_ino, stat.st_size)
+
+    def _refresh(self):
+        """
+        Catch up with writes from other processes (caller holds the lock)
+        """
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            self.count = meta["count"]
+            self.sorted = meta["sorted"]
+        else:
+            self.count = 0
+            self.sorted = True
+
+        if not os.path.exists(self.data_path):
+            self._allocate(self.data_path, self.initial_capacity)
+        stat = os.stat(self.data_path)
+        if (stat.st_ino, stat.st_size) != self._mapped:
+            self.records = None
+            self._open()
+
+    @contextmanager
+    def _locked(self):
+        # A fresh descriptor per call: flock then also excludes other
+        # threads of this process, so calls must not nest
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._refresh()
+            yield
+
+    def _grow(self, needed: int):
+        capacity = len(self.records)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self.records.flush()
+        self.records = None
+        with open(self.data_path, "r+b") as f:
+            f.truncate(capacity * RECORD.itemsize)
+        self._open()
+
+    def _write_meta(self):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"count": self.count, "sorted": self.sorted, "aggregation": self.aggregation}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def append(self, timestamps: np.ndarray, values: np.ndarray):
+        n = len(timestamps)
+        if n == 0:
+            return
+        buckets = (np.asarray(timestamps, dtype=np.int64) // BUCKET_SECONDS) * BUCKET_SECONDS
+
+        with self._locked():
+            self._grow(self.count + n)
+            block = self.records[self.count:self.count + n]
+            block["t"] = buckets
+            block["v"] = values
+
+            last = self.records["t"][self.count - 1] if self.count else np.iinfo(np.int64).min
+            if buckets[0] < last or np.any(np.diff(buckets) < 0):
+                self.sorted = False
+
+            self.count += n
+            self.records.flush()
+            self._write_meta()
+
+    def _ensure_sorted(self):
+        if self.sorted:
+            return
+        live = self.records[:self.count]
+        order = np.argsort(live["t"], kind="stable")
+        live[:] = live[order]
+        self.records.flush()
+        self.sorted = True
+        self._write_meta()
+
+    def _combine_buckets(self, t: np.ndarray, v: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        One value per 15-minute bucket (sum or last, per series kind)
+        """
+        if len(t) == 0:
+            return t, v.astype(np.float64)
+        starts = np.flatnonzero(np.r_[True, t[1:] != t[:-1]])
+        if self.aggregation == "last":
+            ends = np.r_[starts[1:], len(t)] - 1
+            return t[starts], v[ends].astype(np.float64)
+        return t[starts], np.add.reduceat(v.astype(np.float64), starts)
+
+    def query(self, start: int, end: int, resolution: int = BUCKET_SECONDS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Values in [start, end) downsampled to `resolution` seconds by summing
+        """
+        with self._locked():
+            return self._query(start, end, resolution)
+
+    def _query(self, start: int, end: int, resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+        self._ensure_sorted()
+        t = self.records["t"][:self.count]
+        lo, hi = np.searchsorted(t, [start, end])
+        window = np.array(self.records[lo:hi])
+
+        t, v = self._combine_buckets(window["t"], window["v"])
+        if resolution == BUCKET_SECONDS or len(t) == 0:
+            return t, v
+
+        coarse = ((t + UTC_OFFSET_SECONDS) // resolution) * resolution - UTC_OFFSET_SECONDS
+        starts = np.flatnonzero(np.r_[True, coarse[1:] != coarse[:-1]])
+        return coarse[starts], np.add.reduceat(v, starts)
+
+    def compact(self, cutoff: int, downsample_to: Optional[int] = RESOLUTIONS["hour"]):
+        """
+        Retention: data before `cutoff` is rolled up to `downsample_to`
+        buckets (or dropped when None); newer data is kept as is.
+
+        The compacted series is written to a new file and renamed over the
+        old one under the series lock; other processes map the new file on
+        their next access.
+        """
+        with self._locked():
+            return self._compact(cutoff, downsample_to)
+
+    def _compact(self, cutoff: int, downsample_to: Optional[int]) -> dict:
+        self._ensure_sorted()
+        live = np.array(self.records[:self.count])
+        split = int(np.searchsorted(live["t"], cutoff))
+
+        parts = []
+        if downsample_to and split:
+            old_t, old_v = self._query(int(live["t"][0]), cutoff, downsample_to)
+            rolled = np.empty(len(old_t), dtype=RECORD)
+            rolled["t"], rolled["v"] = old_t, old_v
+            parts.append(rolled)
+        parts.append(live[split:])
+        kept = np.concatenate(parts)
+
+        tmp_path = f"{self.data_path}.tmp"
+        self._allocate(tmp_path, max(len(kept), 1024))
+        out = np.memmap(tmp_path, dtype=RECORD, mode="r+", shape=(max(len(kept), 1024),))
+        out[:len(kept)] = kept
+        out.flush()
+        del out
+
+        self.records.flush()
+        self.records = None
+        os.replace(tmp_path, self.data_path)
+        self.count = len(kept)
+        self._write_meta()
+        self._open()
+        return {"before": len(live), "after": self.count}
+
+
+class DemandSeriesStore:
+    """
+    Observed and forecast demand keyed by (stop, direction)
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._series: Dict[tuple, DemandSeries] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def check_key(kind: str, stop_id: str):
+        """
+        Both end up in a directory name under the root: reject unknown kinds
+        and stop ids that could leave it
+        """
+        if kind not in BUCKET_AGGREGATION:
+            raise ValueError(f"Unknown series kind: {kind}")
+        stop_id = str(stop_id)
+        if not stop_id or ".." in stop_id or any(c in stop_id for c in ("/", "\\", "\0")):
+            raise ValueError(f"Invalid stop_id: {stop_id!r}")
+
+    def _path(self, kind: str, stop_id: str, direction_id: int) -> str:
+        self.check_key(kind, stop_id)
+        return os.path.join(self.root, kind, f"{stop_id}__{int(direction_id)}")
+
+    def series(self, kind: str, stop_id: str, direction_id: int) -> DemandSeries:
+        key = (kind, stop_id, int(direction_id))
+        if key not in self._series:
+            self._series[key] = DemandSeries(self._path(*key), BUCKET_AGGREGATION[kind])
+        return self._series[key]
+
+    def keys(self, kind: str) -> Iterable[Tuple[str, int]]:
+        if kind not in BUCKET_AGGREGATION:
+            raise ValueError(f"Unknown series kind: {kind}")
+        directory = os.path.join(self.root, kind)
+        if not os.path.isdir(directory):
+            return []
+        keys = []
+        for name in sorted(os.listdir(directory)):
+            stop_id, _, direction = name.rpartition("__")
+            keys.append((stop_id, int(direction)))
+        return keys
+
+    def append(self, kind: str, stop_ids, direction_ids, timestamps, values) -> int:
+        """
+        Append a batch of points spanning any number of series
+        """
+        for stop_id in set(stop_ids):
+            self.check_key(kind, stop_id)
+
+        stop_ids = np.asarray(stop_ids)
+        direction_ids = np.asarray(direction_ids, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float32)
+
+        # Group the batch per series, keeping arrival order within each
+        keys = np.char.add(np.char.add(stop_ids.astype(str), "__"), direction_ids.astype(str))
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(inverse, minlength=len(unique_keys)))]
+
+        with self._lock:
+            for i in range(len(unique_keys)):
+                rows = order[bounds[i]:bounds[i + 1]]
+                series = self.series(kind, stop_ids[rows[0]], direction_ids[rows[0]])
+                series.append(timestamps[rows], values[rows])
+        return len(values)
+
+    def query(self, kind: str, stop_id: str, direction_id: int, start: int, end: int,
+              resolution: str = "15min") -> Tuple[np.ndarray, np.ndarray]:
+        seconds = resolution_seconds(resolution)
+        with self._lock:
+            if not os.path.isdir(self._path(kind, stop_id, direction_id)):
+                return np.empty(0, dtype=np.int64), np.empty(0)
+            return self.series(kind, stop_id, direction_id).query(start, end, seconds)
+
+    def compact(self, kind: str, cutoff: int, downsample_to: Optional[str] = "hour") -> dict:
+        seconds = resolution_seconds(downsample_to) if downsample_to else None
+        report = {}
+        with self._lock:
+            for stop_id, direction_id in self.keys(kind):
+                result = self.series(kind, stop_id, direction_id).compact(cutoff, seconds)
+                report[f"{stop_id}/{direction_id}"] = result
+        return report
+
+    def hourly_profile(self, kind: str, weekend: bool, start: int = 0, end: int = 2 ** 62) -> Optional[np.ndarray]:
+        """
+        Average line-wide demand per hour of day (24 values) for weekdays or
+        weekends, over the days that have data for that hour; NaN for hours
+        without any, None when the store holds no data for that day type
+        """
+        totals = np.zeros(24)
+        day_hours = set()
+
+        with self._lock:
+            for stop_id, direction_id in self.keys(kind):
+                t, v = self.series(kind, stop_id, direction_id).query(start, end, RESOLUTIONS["hour"])
+                if len(t) == 0:
+                    continue
+                local = t + UTC_OFFSET_SECONDS
+                day = local // 86400
+                is_weekend = ((day + 3) % 7) >= 5  # 1970-01-01 was a Thursday
+                mask = is_weekend == weekend
+                hour = (local[mask] // 3600) % 24
+                np.add.at(totals, hour, v[mask])
+                day_hours.update(zip(day[mask].tolist(), hour.tolist()))
+
+        if not day_hours:
+            return None
+        days = np.bincount([h for _, h in day_hours], minlength=24)
+        return np.divide(totals, days, out=np.full(24, np.nan), where=days > 0)
@@ -0,0 +1,200 @@
+import datetime
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.rostering import gtfs_seconds
+from utils.service_calendar import ServiceCalendar
+
+# -------------------------------------------------
+# Search-key strides: (block rank * stride + value) keeps every trip's
+# (or shape's) points in one globally sorted array, so a single
+# searchsorted call locates all trains at once
+# -------------------------------------------------
+TIME_STRIDE = 200000.0   # > 48h of service-day seconds
+DIST_STRIDE = 1000.0     # > any shape length in km
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON_EQUATOR = 111.320
+
+
+def project_onto_shape(lat: np.ndarray, lon: np.ndarray, stop_lat: np.ndarray, stop_lon: np.ndarray,
+                       shape_dist: np.ndarray) -> np.ndarray:
+    """
+    Distance along a polyline of the closest point to each stop
+    """
+    scale_x = KM_PER_DEG_LON_EQUATOR * np.cos(np.radians(lat.mean()))
+    x, y = lon * scale_x, lat * KM_PER_DEG_LAT
+    px, py = stop_lon[:, None] * scale_x, stop_lat[:, None] * KM_PER_DEG_LAT
+
+    ax, ay = x[:-1][None, :], y[:-1][None, :]
+    dx, dy = np.diff(x)[None, :], np.diff(y)[None, :]
+    length2 = np.maximum(dx * dx + dy * dy, 1e-12)
+    t = np.clip(((px - ax) * dx + (py - ay) * dy) / length2, 0.0, 1.0)
+    gap2 = (ax + t * dx - px) ** 2 + (ay + t * dy - py) ** 2
+
+    segment = np.argmin(gap2, axis=1)
+    rows = np.arange(len(stop_lat))
+    return shape_dist[segment] + t[rows, segment] * np.diff(shape_dist)[segment]
+
+
+class TrainPositionEngine:
+    """
+    Every train's position at a given moment, interpolated along its shape.
+
+    Each trip becomes a run of (time, distance) points, one pair per stop
+    (arrival and departure, so dwells hold position). Stop distances are
+    the stops projected onto the trip's shape, which keeps trains on the
+    drawn line even where stop_times distances use another scale. Trips
+    are indexed by start time per service, so the active set for a moment
+    is one searchsorted window; time -> distance -> lat/lon is then two
+    more vectorized searchsorted + lerp passes for all active trains.
+    """
+
+    def __init__(self, stops_path: str, stop_times_path: str, trips_path: str,
+                 shapes_path: str, calendar: ServiceCalendar):
+        stops = pd.read_csv(stops_path, usecols=["stop_id", "stop_name", "stop_lat", "stop_lon"])
+        self.stop_ids = stops["stop_id"].to_numpy()
+        self.stop_names = stops["stop_name"].to_numpy()
+        stop_index = {s: i for i, s in enumerate(self.stop_ids)}
+
+        # ---- Shapes: one sorted (shape rank, distance) key array
+        shapes = pd.read_csv(shapes_path).sort_values(["shape_id", "shape_pt_sequence"])
+        self.shape_ids = shapes["shape_id"].unique()
+        shape_rank = {s: i for i, s in enumerate(self.shape_ids)}
+        ranks = shapes["shape_id"].map(shape_rank).to_numpy()
+        self.shape_dist = shapes["shape_dist_traveled"].to_numpy(dtype=np.float64)
+        self.shape_lat = shapes["shape_pt_lat"].to_numpy(dtype=np.float64)
+        self.shape_lon = shapes["shape_pt_lon"].to_numpy(dtype=np.float64)
+        self.shape_key = ranks * DIST_STRIDE + self.shape_dist
+        bounds = np.r_[0, np.cumsum(np.bincount(ranks, minlength=len(self.shape_ids)))]
+        self.shape_start, self.shape_end = bounds[:-1], bounds[1:]
+
+        # Stop positions along every shape (shapes x stops)
+        self.stop_dist = np.vstack([
+            project_onto_shape(
+                self.shape_lat[a:b], self.shape_lon[a:b],
+                stops["stop_lat"].to_numpy(), stops["stop_lon"].to_numpy(), self.shape_dist[a:b]
+            )
+            for a, b in zip(self.shape_start, self.shape_end)
+        ])
+
+        # ---- Trips: (arrival, departure) point pairs per stop
+        trips = pd.read_csv(trips_path, usecols=["trip_id", "service_id", "direction_id", "shape_id"])
+        stop_times = pd.read_csv(
+            stop_times_path, usecols=["trip_id", "stop_sequence", "stop_id", "arrival_time", "departure_time"]
+        ).merge(trips, on="trip_id").sort_values(["trip_id", "stop_sequence"])
+
+        self.trip_ids = np.asarray(stop_times["trip_id"].unique(), dtype=object)
+        trip_rank = {t: i for i, t in enumerate(self.trip_ids)}
+        st_rank = stop_times["trip_id"].map(trip_rank).to_numpy()
+        st_stop = stop_times["stop_id"].map(stop_index).to_numpy()
+        st_shape = stop_times["shape_id"].map(shape_rank).to_numpy()
+
+        times = np.column_stack([gtfs_seconds(stop_times["arrival_time"]),
+                                 gtfs_seconds(stop_times["departure_time"])]).ravel().astype(np.float64)
+        self.point_time = times
+        self.point_dist = np.repeat(self.stop_dist[st_shape, st_stop], 2)
+        self.point_stop = np.repeat(st_stop, 2)
+        self.point_key = np.repeat(st_rank, 2) * TIME_STRIDE + times
+        bounds = np.r_[0, np.cumsum(np.bincount(st_rank, minlength=len(self.trip_ids)) * 2)]
+        self.point_start, self.point_end = bounds[:-1], bounds[1:]
+
+        meta = trips.set_index("trip_id").loc[self.trip_ids]
+        self.trip_service = meta["service_id"].to_numpy()
+        self.trip_direction = meta["direction_id"].to_numpy()
+        self.trip_shape = meta["shape_id"].map(shape_rank).to_numpy()
+        self.trip_first = self.point_time[self.point_start]
+        self.trip_last = self.point_time[self.point_end - 1]
+
+        # ---- Time index: trips sorted by start, per service
+        self.index: Dict[str, dict] = {}
+        for service in np.unique(self.trip_service):
+            ranks_ = np.flatnonzero(self.trip_service == service)
+            order = ranks_[np.argsort(self.trip_first[ranks_], kind="stable")]
+            self.index[service] = {
+                "ranks": order,
+                "starts": self.trip_first[order],
+                "max_duration": float((self.trip_last[order] - self.trip_first[order]).max())
+            }
+
+        self.calendar = calendar
+
+    # ---------------------------------------------
+    # Active trips
+    # ---------------------------------------------
+    def services_on(self, day: datetime.date) -> List[str]:
+        return [s for s in self.calendar.running_services(day) if s in self.index]
+
+    def active_trips(self, service: str, seconds: float) -> np.ndarray:
+        entry = self.index[service]
+        lo = np.searchsorted(entry["starts"], seconds - entry["max_duration"], side="left")
+        hi = np.searchsorted(entry["starts"], seconds, side="right")
+        candidates = entry["ranks"][lo:hi]
+        return candidates[self.trip_last[candidates] >= seconds]
+
+    # ---------------------------------------------
+    # Positions
+    # ---------------------------------------------
+    def locate(self, ranks: np.ndarray, seconds: np.ndarray) -> dict:
+        """
+        Interpolated state of trips `ranks` at service-day `seconds`
+        """
+        # Time -> distance along the shape
+        idx = np.searchsorted(self.point_key, ranks * TIME_STRIDE + seconds, side="right")
+        i1 = np.clip(idx, self.point_start[ranks] + 1, self.point_end[ranks] - 1)
+        i0 = i1 - 1
+        t0, t1 = self.point_time[i0], self.point_time[i1]
+        frac = np.where(t1 > t0, (seconds - t0) / np.maximum(t1 - t0, 1e-9), 1.0)
+        frac = np.clip(frac, 0.0, 1.0)
+        d0, d1 = self.point_dist[i0], self.point_dist[i1]
+        dist = d0 + frac * (d1 - d0)
+
+        # Distance -> lat/lon
+        shapes = self.trip_shape[ranks]
+        j = np.searchsorted(self.shape_key, shapes * DIST_STRIDE + dist, side="right")
+        j1 = np.clip(j, self.shape_start[shapes] + 1, self.shape_end[shapes] - 1)
+        j0 = j1 - 1
+        s0, s1 = self.shape_dist[j0], self.shape_dist[j1]
+        g = np.clip((dist - s0) / np.maximum(s1 - s0, 1e-9), 0.0, 1.0)
+        lat = self.shape_lat[j0] + g * (self.shape_lat[j1] - self.shape_lat[j0])
+        lon = self.shape_lon[j0] + g * (self.shape_lon[j1] - self.shape_lon[j0])
+
+        # Heading of the shape segment, degrees clockwise from north
+        d_lat = self.shape_lat[j1] - self.shape_lat[j0]
+        d_lon = (self.shape_lon[j1] - self.shape_lon[j0]) * np.cos(np.radians(lat))
+        bearing = (np.degrees(np.arctan2(d_lon, d_lat)) + 360.0) % 360.0
+
+        # A point pair with equal distance is a dwell; even indices are arrivals
+        at_stop = d0 == d1
+        return {
+            "lat": lat,
+            "lon": lon,
+            "bearing": bearing,
+            "dist_km": dist,
+            "at_stop": at_stop,
+            "stop": np.where(at_stop, self.point_stop[i0], self.point_stop[i1])
+        }
+
+    def positions(self, moment: datetime.datetime) -> dict:
+        """
+        All trains in service at local wall-clock `moment`
+
+        Trips from the previous service day that run past midnight
+        (times >= 24:00:00) are included.
+        """
+        day = moment.date()
+        seconds = moment.hour * 3600 + moment.minute * 60 + moment.second + moment.microsecond / 1e6
+
+        ranks, query = [], []
+        for offset, service_day in ((0.0, day), (86400.0, day - datetime.timedelta(days=1))):
+            for service in self.services_on(service_day):
+                active = self.active_trips(service, seconds + offset)
+                ranks.append(active)
+                query.append(np.full(len(active), seconds + offset))
+
+        ranks = np.concatenate(ranks) if ranks else np.empty(0, dtype=np.int64)
+        query = np.concatenate(query) if query else np.empty(0)
+        state = self.locate(ranks, query)
+        state["ranks"] = ranks
+        return state
@@ -0,0 +1,299 @@
+import glob
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# -------------------------------------------------
+# Demand rules (shared by current conditions and forecasts)
+# -------------------------------------------------
+RAIN_THRESHOLD_MM = 5.0
+RAIN_UPLIFT = 0.20
+HEAVY_UPLIFT = 0.10
+HEAT_THRESHOLD_C = 34.0
+HEAT_DROP = 0.05
+
+# Forecast hours follow local time (Asia/Kolkata, UTC+05:30, no DST)
+LOCAL_TZ = timezone(timedelta(hours=5, minutes=30))
+
+
+def demand_multipliers(rain_mm, temp, heavy) -> np.ndarray:
+    """
+    Weather demand factor for any number of hours at once
+
+    Rain above 5 mm adds 20%, a "Heavy" condition 10%, and heat above
+    34 °C takes 5% off, the same rules as for one current reading.
+    """
+    rain_mm = np.asarray(rain_mm, dtype=float)
+    factor = np.ones(rain_mm.shape)
+    factor += np.where(rain_mm > RAIN_THRESHOLD_MM, RAIN_UPLIFT, 0.0)
+    factor += np.where(np.asarray(heavy, dtype=bool), HEAVY_UPLIFT, 0.0)
+    factor -= np.where(np.asarray(temp, dtype=float) > HEAT_THRESHOLD_C, HEAT_DROP, 0.0)
+    return factor
+
+
+def describe_error(error: Exception) -> str:
+    """
+    Error text safe to expose. Network errors (requests' exceptions are
+    OSErrors) carry the full URL, API key included, in their message, so
+    only their type and HTTP status are kept.
+    """
+    if not isinstance(error, OSError):
+        return f"{type(error).__name__}: {error}"
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return f"{type(error).__name__} (HTTP {status})" if status is not None else type(error).__name__
+
+
+def local_day_start(day: date) -> int:
+    """
+    Epoch seconds of local midnight
+    """
+    return int(datetime.combine(day, datetime.min.time(), LOCAL_TZ).timestamp())
+
+# -------------------------------------------------
+# Hourly forecast
+# -------------------------------------------------
+class HourlyForecast:
+    """
+    One issued forecast as hour-aligned arrays.
+
+    Hour i covers [start + 3600 * i, start + 3600 * (i + 1)); conditions
+    are stored once and referenced by a uint8 code per hour. Multipliers
+    are computed for the whole horizon when the forecast is built.
+    """
+
+    def __init__(self, issued_at: int, start: int, temp, rain_mm, condition_codes, conditions: List[str]):
+        self.issued_at = int(issued_at)
+        self.start = int(start)
+        self.temp = np.asarray(temp, dtype=np.float32)
+        self.rain_mm = np.asarray(rain_mm, dtype=np.float32)
+        self.condition_codes = np.asarray(condition_codes, dtype=np.uint8)
+        self.conditions = list(conditions)
+
+        heavy_conditions = np.array(["Heavy" in c for c in self.conditions], dtype=bool)
+        self.heavy = heavy_conditions[self.condition_codes] if self.conditions else np.zeros(0, dtype=bool)
+        self.multipliers = demand_multipliers(self.rain_mm, self.temp, self.heavy)
+
+    @property
+    def hours(self) -> int:
+        return len(self.temp)
+
+    @property
+    def end(self) -> int:
+        return self.start + 3600 * self.hours
+
+    @classmethod
+    def from_weatherapi(cls, payload: dict, issued_at: Optional[int] = None) -> "HourlyForecast":
+        """
+        Build from a weatherapi.com forecast.json response (all days)
+        """
+        hours = [h for day in payload["forecast"]["forecastday"] for h in day["hour"]]
+        if not hours:
+            raise ValueError("Forecast has no hourly entries")
+        hours.sort(key=lambda h: h["time_epoch"])
+
+        epochs = np.array([h["time_epoch"] for h in hours], dtype=np.int64)
+        if np.any(np.diff(epochs) != 3600):
+            raise ValueError("Forecast hours are not contiguous")
+
+        conditions = sorted({h["condition"]["text"] for h in hours})
+        codes = {c: i for i, c in enumerate(conditions)}
+        return cls(
+            issued_at=issued_at if issued_at is not None else int(datetime.now(LOCAL_TZ).timestamp()),
+            start=int(epochs[0]),
+            temp=[h["temp_c"] for h in hours],
+            rain_mm=[h["precip_mm"] for h in hours],
+            condition_codes=[codes[h["condition"]["text"]] for h in hours],
+            conditions=conditions
+        )
+
+    def window(self, start: int, hours: int) -> Dict[str, np.ndarray]:
+        """
+        Arrays for `hours` hours from epoch `start`; `covered` marks the
+        hours this forecast has (others hold neutral values)
+        """
+        offsets = (start - self.start) // 3600 + np.arange(hours)
+        covered = (offsets >= 0) & (offsets < self.hours)
+        index = np.clip(offsets, 0, max(self.hours - 1, 0))
+
+        def take(values, fill):
+            return np.where(covered, values[index], fill) if self.hours else np.full(hours, fill)
+
+        return {
+            "covered": covered,
+            "temp": take(self.temp, np.nan),
+            "rain_mm": take(self.rain_mm, np.nan),
+            "condition_codes": take(self.condition_codes, 0).astype(np.uint8),
+            "multipliers": take(self.multipliers, 1.0)
+        }
+
+    def day(self, day: date) -> Dict[str, np.ndarray]:
+        """
+        The 24 local hours of one date
+        """
+        return self.window(local_day_start(day), 24)
+
+    def hour(self, when: datetime) -> Optional[dict]:
+        """
+        Weather for the hour containing `when`, in current-conditions shape
+        """
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=LOCAL_TZ)
+        i = (int(when.timestamp()) - self.start) // 3600
+        if not 0 <= i < self.hours:
+            return None
+        return {
+            "temp": round(float(self.temp[i]), 1),
+            "rain_mm": round(float(self.rain_mm[i]), 2),
+            "condition": self.conditions[self.condition_codes[i]]
+        }
+
+    def save(self, path: str):
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, issued_at=self.issued_at, start=self.start, temp=self.temp, rain_mm=self.rain_mm,
+                 condition_codes=self.condition_codes, conditions=np.array(self.conditions, dtype=str))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "HourlyForecast":
+        with np.load(path) as data:
+            return cls(int(data["issued_at"]), int(data["start"]), data["temp"], data["rain_mm"],
+                       data["condition_codes"], data["conditions"].tolist())
+
+# -------------------------------------------------
+# Sources: one bulk call per refresh
+# -------------------------------------------------
+class WeatherAPIForecastSource:
+    """
+    weatherapi.com forecast.json: every hour of `days` days in one request
+    """
+
+    def __init__(self, url: str, api_key: Optional[str], city: str = "Kochi", days: int = 2, timeout: float = 10.0):
+        self.url = url
+        self.api_key = api_key
+        self.city = city
+        self.days = days
+        self.timeout = timeout
+
+    def fetch(self) -> dict:
+        import requests
+
+        if not self.api_key:
+            raise RuntimeError("WEATHER_API_KEY is not set")
+        response = requests.get(self.url, params={"key": self.api_key, "q": self.city, "days": self.days,
+                                                  "aqi": "no", "alerts": "no"}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class FileForecastSource:
+    """
+    Stand-in reading a weatherapi.com-shaped forecast from a JSON file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch(self) -> dict:
+        with open(self.path) as f:
+            return json.load(f)
+
+# -------------------------------------------------
+# Store and daily ingestion
+# -------------------------------------------------
+class WeatherForecastStore:
+    """
+    Issued forecasts on disk (one .npz per issue date), newest in memory.
+
+    refresh() picks up a forecast another process (ingest_weather.py)
+    wrote for today, otherwise pulls from the source at most once per
+    local day unless forced, and after a failure waits `retry_s` before
+    trying again; readers take the in-memory forecast without locking.
+    """
+
+    def __init__(self, directory: str, source, keep: int = 14, retry_s: float = 900.0):
+        self.directory = directory
+        self.source = source
+        self.keep = keep
+        self.retry_s = retry_s
+        self.latest: Optional[HourlyForecast] = None
+        self.last_error: Optional[str] = None
+        self.last_attempt = 0.0
+        self.fetches = 0
+        self._lock = threading.Lock()
+        self._disk_path: Optional[str] = None
+        self._load_newest()
+
+    def _load_newest(self):
+        """
+        Adopt the newest forecast on disk, e.g. one ingest_weather.py wrote
+        """
+        paths = sorted(glob.glob(os.path.join(self.directory, "forecast-*.npz")))
+        if not paths or paths[-1] == self._disk_path:
+            return
+        self._disk_path = paths[-1]
+        try:
+            forecast = HourlyForecast.load(paths[-1])
+        except (OSError, KeyError, ValueError) as e:
+            self.last_error = f"{paths[-1]}: {e}"
+            return
+        if self.latest is None or forecast.issued_at > self.latest.issued_at:
+            self.latest = forecast
+
+    def issued_today(self) -> bool:
+        if self.latest is None:
+            return False
+        issued = datetime.fromtimestamp(self.latest.issued_at, LOCAL_TZ).date()
+        return issued == datetime.now(LOCAL_TZ).date()
+
+    def refresh(self, force: bool = False) -> Optional[HourlyForecast]:
+        """
+        Fetch and store today's forecast; on failure the previous one stays.
+        Unless forced, one already on disk for today is used instead.
+        """
+        with self._lock:
+            if not force:
+                if not self.issued_today():
+                    self._load_newest()
+                if self.issued_today() or time.time() - self.last_attempt < self.retry_s:
+                    return self.latest
+            self.last_attempt = time.time()
+            try:
+                forecast = HourlyForecast.from_weatherapi(self.source.fetch())
+                self.fetches += 1
+            except Exception as e:
+                self.last_error = describe_error(e)
+                return self.latest
+
+            os.makedirs(self.directory, exist_ok=True)
+            issued = datetime.fromtimestamp(forecast.issued_at, LOCAL_TZ)
+            forecast.save(os.path.join(self.directory, f"forecast-{issued:%Y%m%d}.npz"))
+            for old in sorted(glob.glob(os.path.join(self.directory, "forecast-*.npz")))[:-self.keep]:
+                os.remove(old)
+
+            self.latest = forecast
+            self.last_error = None
+            return forecast
+
+    def status(self) -> dict:
+        latest = self.latest
+        return {
+            "source": type(self.source).__name__,
+            "issued_at": datetime.fromtimestamp(latest.issued_at, LOCAL_TZ).isoformat() if latest else None,
+            "covers_from": datetime.fromtimestamp(latest.start, LOCAL_TZ).isoformat() if latest else None,
+            "covers_to": datetime.fromtimestamp(latest.end, LOCAL_TZ).isoformat() if latest else None,
+            "hours": latest.hours if latest else 0,
+            "fetches": self.fetches,
+            "last_error": self._redact(self.last_error)
+        }
+
+    def _redact(self, text: Optional[str]) -> Optional[str]:
+        # Last line of defence: the source's API key never leaves the store
+        secret = getattr(self.source, "api_key", None)
+        if text and secret and secret in text:
+            return text.replace(secret, "***")
+        return text
@@ -0,0 +1,165 @@
+"""
+Shared FastAPI backend access for the Streamlit pages
+
+Pages are thin clients: models, the LLM and the weather API live in the
+backend process, not in every Streamlit session. One pooled HTTP session
+is shared per Streamlit server (st.cache_resource), and responses are
+cached per input set with a TTL (st.cache_data), so moving a slider back
+to a previous value does not hit the backend again.
+"""
+import io
+import os
+from typing import Optional, Sequence
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000").rstrip("/")
+BACKEND_TIMEOUT_S = float(os.getenv("BACKEND_TIMEOUT_S", "15"))
+
+TRAIN_CAPACITY = 1000
+
+# Cache lifetimes (seconds): weather-dependent answers go stale fastest
+WEATHER_TTL = 300
+FORECAST_TTL = 900
+STATIC_TTL = 3600
+
+
+class BackendError(RuntimeError):
+    """
+    The backend could not be reached or answered with an error
+    """
+
+
+@st.cache_resource(show_spinner=False)
+def get_session() -> requests.Session:
+    session = requests.Session()
+    # Idempotent GETs are retried on connection errors; POSTs are not
+    retry = Retry(total=2, backoff_factor=0.2, allowed_methods=frozenset({"GET"}),
+                  status_forcelist=(502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _request(method: str, path: str, **kwargs) -> dict:
+    try:
+        response = get_session().request(method, f"{BACKEND_URL}{path}", timeout=BACKEND_TIMEOUT_S, **kwargs)
+        response.raise_for_status()
+        body = response.json()
+    except requests.HTTPError as e:
+        raise BackendError(f"Backend rejected {path} ({e.response.status_code})") from e
+    except requests.RequestException as e:
+        raise BackendError(f"Backend unavailable at {BACKEND_URL}: {e}") from e
+    except ValueError as e:
+        raise BackendError(f"Backend returned a non-JSON response for {path}") from e
+
+    if isinstance(body, dict) and "error" in body:
+        raise BackendError(body["error"])
+    return body
+
+
+def _get(path: str, **params) -> dict:
+    return _request("GET", path, params={k: v for k, v in params.items() if v is not None})
+
+
+def _post(path: str, payload: dict) -> dict:
+    return _request("POST", path, json=payload)
+
+# -------------------------------------------------
+# Demand
+# -------------------------------------------------
+@st.cache_data(ttl=WEATHER_TTL, show_spinner=False)
+def predict_demand(hour: int, is_weekend: int, is_peak_hour: int, trains_per_hour: int,
+                   direction_id: int) -> dict:
+    return _post("/api/demand/predict", {
+        "hour": hour,
+        "is_weekend": is_weekend,
+        "is_peak_hour": is_peak_hour,
+        "trains_per_hour": trains_per_hour,
+        "direction_id": direction_id
+    })
+
+
+@st.cache_data(ttl=WEATHER_TTL, show_spinner=False)
+def station_demand(day_type: str, start_hour: int = 0, end_hour: int = 23, date: Optional[str] = None) -> dict:
+    return _get("/api/demand/stations", day_type=day_type, start_hour=start_hour, end_hour=end_hour, date=date)
+
+
+@st.cache_data(ttl=STATIC_TTL, show_spinner=False)
+def historical_demand(day_type: str, start_hour: int = 0, end_hour: int = 23) -> dict:
+    return _get("/api/demand/historical", day_type=day_type, start_hour=start_hour, end_hour=end_hour)
+
+# -------------------------------------------------
+# Line
+# -------------------------------------------------
+@st.cache_data(ttl=FORECAST_TTL, show_spinner=False)
+def line_load(day_type: str, start_hour: int = 0, end_hour: int = 23) -> dict:
+    return _get("/api/line/load", day_type=day_type, start_hour=start_hour, end_hour=end_hour)
+
+
+@st.cache_data(ttl=STATIC_TTL, show_spinner=False)
+def service_day(date: str) -> dict:
+    """
+    Calendar entry for one date: running services, day type, holiday
+    """
+    return _get("/api/line/calendar", start=date, end=date)["days"][0]
+
+# -------------------------------------------------
+# Induction
+# -------------------------------------------------
+@st.cache_data(ttl=FORECAST_TTL, show_spinner=False)
+def recommend_trains(predicted_demand: int, is_peak_hour: int,
+                     quantiles: Optional[Sequence[float]] = None) -> dict:
+    payload = {"predicted_demand": predicted_demand, "is_peak_hour": is_peak_hour}
+    if quantiles:
+        payload["demand_distribution"] = {"quantiles": list(quantiles)}
+    return _post("/api/induction/recommend", payload)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def induction_status() -> dict:
+    return _get("/api/induction/status")
+
+# -------------------------------------------------
+# Scenarios
+# -------------------------------------------------
+@st.cache_data(ttl=STATIC_TTL, show_spinner=False)
+def scenario_baseline(date: str) -> dict:
+    return _get("/api/scenarios/baseline", date=date)
+
+
+@st.cache_data(ttl=STATIC_TTL, show_spinner=False)
+def evaluate_scenario(date: str, demand_increase: float, unavailable_trains: int, rain: bool,
+                      festival: bool) -> dict:
+    """
+    One scenario through the batch endpoint, unpacked to scalars
+    """
+    result = _post("/api/scenarios/evaluate", {
+        "date": date,
+        "scenarios": [{
+            "demand_increase": demand_increase,
+            "unavailable_trains": unavailable_trains,
+            "rain": rain,
+            "festival": festival
+        }]
+    })
+    return {key: value[0] if isinstance(value, list) else value for key, value in result.items()}
+
+# -------------------------------------------------
+# Figures
+# -------------------------------------------------
+def figure_png(fig) -> bytes:
+    """
+    Render and release a matplotlib figure; pages cache the bytes per
+    input set instead of redrawing on every rerun
+    """
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=110, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
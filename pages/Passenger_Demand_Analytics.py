@@ -3,8 +3,9 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import joblib
-from datetime import date
+from datetime import date, timedelta
+
+import backend_client as backend
 
 st.set_page_config(
     page_title="Passenger Demand Analytics",
@@ -14,97 +15,107 @@ st.set_page_config(
 st.title("📊 Passenger Demand Prediction Analytics")
 st.caption("AI-powered passenger flow analysis for Metro Rail Operations")
 
-model = joblib.load("./model/demand_forecast_model.pkl")
-features = joblib.load("./model/model_features.pkl")
-
-STATIONS = [
-    "Aluva", "Pulinchodu", "Companypady", "Ambattukavu",
-    "Muttom", "Kalamassery", "CUSAT", "Edappally",
-    "Kaloor", "MG Road", "Maharaja’s", "Ernakulam South"
-]
-
-HOURS = list(range(24))
-
 with st.container():
     c1, c2, c3, c4 = st.columns(4)
 
     selected_date = c1.date_input("📅 Select Date", date.today())
     time_range = c2.slider("⏱ Time Range", 0, 23, (6, 22))
-    day_type = c3.radio("Day Type", ["Weekday", "Weekend"])
+    try:
+        calendar_day = backend.service_day(selected_date.isoformat())
+    except backend.BackendError:
+        calendar_day = {"day_type": "weekday", "holiday": None}
+    day_type = c3.radio("Day Type", ["Weekday", "Weekend"],
+                        index=1 if calendar_day["day_type"] == "weekend" else 0)
     compare_prev = c4.toggle("Compare with Previous Week")
 
-is_weekend = 1 if day_type == "Weekend" else 0
-
-np.random.seed(42)
-
-heatmap_data = []
-
-for station in STATIONS:
-    base = np.random.randint(200, 600)
-    station_profile = []
-
-    for hour in HOURS:
-        peak_factor = 1.6 if (8 <= hour <= 10 or 17 <= hour <= 20) else 1.0
-        weekend_factor = 0.8 if is_weekend else 1.0
-
-        demand = int(base * peak_factor * weekend_factor * np.random.uniform(0.85, 1.15))
-        station_profile.append(demand)
-
-    heatmap_data.append(station_profile)
-
-heatmap_df = pd.DataFrame(
-    heatmap_data,
-    index=STATIONS,
-    columns=HOURS
-)
-
-heatmap_df = heatmap_df.loc[:, time_range[0]:time_range[1]]
-
-st.subheader("🔥 Station-wise Passenger Demand Heatmap")
-
-fig, ax = plt.subplots(figsize=(14, 6))
-sns.heatmap(
-    heatmap_df,
-    cmap="YlOrRd",
-    linewidths=0.3,
-    annot=False,
-    cbar_kws={"label": "Passenger Volume"}
-)
-
-ax.set_xlabel("Hour of Day")
-ax.set_ylabel("Stations")
-st.pyplot(fig)
-
-st.caption("Darker colors indicate higher passenger congestion")
-
-st.subheader("📈 Historical vs AI-Predicted Demand")
-
-historical_demand = np.random.randint(300, 900, size=24)
-ai_prediction = historical_demand * np.random.uniform(0.9, 1.1, size=24)
-
-if is_weekend:
-    ai_prediction *= 0.85
-
-fig2, ax2 = plt.subplots(figsize=(12, 4))
-
-ax2.plot(HOURS, historical_demand, label="Historical Demand", linewidth=2)
-ax2.plot(HOURS, ai_prediction, label="AI Forecast", linestyle="--", linewidth=2)
-
-if compare_prev:
-    prev_week = historical_demand * np.random.uniform(0.85, 1.05, size=24)
-    ax2.plot(HOURS, prev_week, label="Previous Week", linestyle=":", linewidth=2)
-
-ax2.set_xlabel("Hour")
-ax2.set_ylabel("Passengers")
-ax2.legend()
-ax2.grid(alpha=0.3)
-
-st.pyplot(fig2)
+if calendar_day["holiday"]:
+    st.caption(f"📅 {calendar_day['holiday']['name']} – scheduled as a weekend day")
+
+start_hour, end_hour = time_range
+
+
+@st.cache_data(ttl=backend.WEATHER_TTL, show_spinner=False)
+def station_frame(day_type: str, start_hour: int, end_hour: int, date: str) -> pd.DataFrame:
+    """
+    Stops × hours passenger volume, both directions summed
+    """
+    stations = backend.station_demand(day_type, start_hour, end_hour, date)
+    return pd.DataFrame(
+        np.asarray(stations["demand"]).sum(axis=2),
+        index=stations["stop_names"],
+        columns=stations["hours"]
+    )
+
+
+@st.cache_data(ttl=backend.WEATHER_TTL, show_spinner=False)
+def heatmap_png(heatmap_df: pd.DataFrame) -> bytes:
+    fig, ax = plt.subplots(figsize=(14, 6))
+    sns.heatmap(
+        heatmap_df,
+        cmap="YlOrRd",
+        linewidths=0.3,
+        annot=False,
+        cbar_kws={"label": "Passenger Volume"},
+        ax=ax
+    )
+
+    ax.set_xlabel("Hour of Day")
+    ax.set_ylabel("Stations")
+    return backend.figure_png(fig)
+
+
+@st.cache_data(ttl=backend.WEATHER_TTL, show_spinner=False)
+def trend_png(hours: tuple, historical: tuple, forecast: tuple, prev_week: tuple = None) -> bytes:
+    fig, ax = plt.subplots(figsize=(12, 4))
+
+    ax.plot(hours, historical, label="Historical Demand (line total)", linewidth=2)
+    ax.set_ylabel("Passengers (line total)")
+
+    # Station-level forecasts are boardings per stop and hour, on their own scale
+    ax_stops = ax.twinx()
+    ax_stops.plot(hours, forecast, label="AI Forecast (station boardings)", linestyle="--",
+                  linewidth=2, color="tab:orange")
+    if prev_week:
+        ax_stops.plot(hours, prev_week, label="Previous Week", linestyle=":", linewidth=2, color="tab:green")
+    ax_stops.set_ylabel("Boardings (all stations)")
+
+    ax.set_xlabel("Hour")
+    lines = ax.get_legend_handles_labels()
+    stop_lines = ax_stops.get_legend_handles_labels()
+    ax.legend(lines[0] + stop_lines[0], lines[1] + stop_lines[1])
+    ax.grid(alpha=0.3)
+    return backend.figure_png(fig)
+
+
+try:
+    heatmap_df = station_frame(day_type.lower(), start_hour, end_hour, selected_date.isoformat())
+
+    st.subheader("🔥 Station-wise Passenger Demand Heatmap")
+    st.image(heatmap_png(heatmap_df), use_container_width=True)
+    st.caption("Darker colors indicate higher passenger congestion")
+
+    st.subheader("📈 Historical vs AI-Predicted Demand")
+
+    historical = backend.historical_demand(day_type.lower(), start_hour, end_hour)
+    prev_week = None
+    if compare_prev:
+        prev_date = selected_date - timedelta(days=7)
+        prev_df = station_frame(day_type.lower(), start_hour, end_hour, prev_date.isoformat())
+        prev_week = tuple(prev_df.sum(axis=0).tolist())
+
+    st.image(trend_png(
+        tuple(historical["hours"]),
+        tuple(historical["historical"]),
+        tuple(heatmap_df.sum(axis=0).tolist()),
+        prev_week
+    ), use_container_width=True)
+except backend.BackendError as e:
+    st.error(str(e))
 
 with st.expander("ℹ️ How to read this dashboard"):
     st.markdown("""
-    - **Heatmap:** Quickly identify congested stations and peak hours  
-    - **Line Chart:** Compare actual demand with AI forecasts  
-    - **Previous Week Toggle:** Detect unusual demand spikes or events  
+    - **Heatmap:** Quickly identify congested stations and peak hours
+    - **Line Chart:** Compare actual demand with AI forecasts
+    - **Previous Week Toggle:** Detect unusual demand spikes or events
     - Useful for **schedule planning**, **headway optimization**, and **resource allocation**
     """)
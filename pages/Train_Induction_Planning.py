@@ -1,7 +1,6 @@
 import streamlit as st
-import numpy as np
-import joblib
-import os
+
+import backend_client as backend
 
 st.set_page_config(
     page_title="AI Train Induction Planning",
@@ -11,15 +10,6 @@ st.set_page_config(
 st.title("🚆 AI-Assisted Train Induction Planning")
 st.caption("Decision-support system for metro scheduling & headway optimization")
 
-Q_TABLE_PATH = "./model/rl_q_table.pkl"
-
-if os.path.exists(Q_TABLE_PATH):
-    q_table = joblib.load(Q_TABLE_PATH)
-    rl_available = True
-else:
-    q_table = {}
-    rl_available = False
-
 left, right = st.columns([2, 3])
 
 with left:
@@ -33,60 +23,44 @@ with left:
             value=10
         )
 
-        peak_mode = st.toggle("Peak Hour Mode", value=True)
+        hour = st.slider("Planning Hour", 0, 23, 9)
+        day_type = st.radio("Day Type", ["Weekday", "Weekend"], horizontal=True)
+        peak_mode = st.toggle("Peak Hour Mode", value=8 <= hour <= 10 or 17 <= hour <= 20)
 
         generate = st.button("🤖 Generate AI Plan", use_container_width=True)
 
-def rl_train_planner(predicted_demand, peak, available_trains):
+
+def plan_within_fleet(recommendation: dict, available_trains: int):
     """
-    RL-based train induction planner
-    Uses trained Q-table
+    Backend recommendation limited to the trains actually available:
+    the cheapest expected-cost action that fits, when the choice does not
     """
+    deploy = recommendation["recommended_trains"]
+    if deploy <= available_trains:
+        return deploy, recommendation["headway"], recommendation["expected_waiting_time"], False
 
-    # Discretize demand
-    if predicted_demand < 2000:
-        demand_level = 0
-    elif predicted_demand < 5000:
-        demand_level = 1
-    else:
-        demand_level = 2
-
-    state = (demand_level, peak, available_trains)
-
-    # Allowed actions
-    actions = list(range(2, available_trains + 1))
-
-    # Select best action from Q-table
-    q_values = [q_table.get((state, a), 0) for a in actions]
-    deploy = actions[np.argmax(q_values)]
+    costs = {int(k): v for k, v in recommendation["expected_cost"].items() if int(k) <= available_trains}
+    deploy = min(costs, key=costs.get) if costs else available_trains
+    headway = round(60 / deploy, 1)
+    return deploy, headway, round(headway / 2, 1), True
 
-    # Estimate headway (simple operational model)
-    headway = round(max(2.0, 12 - deploy), 1)
-
-    expected_wait = round(headway / 2, 1)
-
-    # Overcrowding risk
-    if peak and demand_level == 2 and deploy < available_trains * 0.7:
-        risk = "High"
-    elif peak:
-        risk = "Medium"
-    else:
-        risk = "Low"
-
-    return deploy, headway, expected_wait, risk
 
 with right:
     st.subheader("📊 AI Output Preview")
 
     if generate:
+        try:
+            forecast = backend.predict_demand(hour, int(day_type == "Weekend"), int(peak_mode), available_trains, 0)
+            predicted_demand = forecast["predicted_demand"]
+            recommendation = backend.recommend_trains(
+                predicted_demand, int(peak_mode), tuple(forecast["demand_distribution"]["quantiles"])
+            )
+        except backend.BackendError as e:
+            st.error(str(e))
+            st.stop()
 
-        predicted_demand = np.random.randint(1500, 6500)
-
-        deploy, headway, wait_time, risk = rl_train_planner(
-            predicted_demand,
-            peak_mode,
-            available_trains
-        )
+        deploy, headway, wait_time, capped = plan_within_fleet(recommendation, available_trains)
+        risk = "High" if capped and peak_mode else recommendation["overcrowding_risk"]
 
         with st.container(border=True):
             st.markdown("### 🤖 AI Deployment Recommendation")
@@ -109,18 +83,18 @@ with right:
 
             st.info(
                 f"""
-                **AI Insight:**  
-                A reinforcement learning agent evaluated multiple deployment actions
-                and selected **{deploy} trains** to balance passenger waiting time,
-                operational efficiency, and congestion risk under
+                **AI Insight:**
+                For a forecast of **{predicted_demand} passengers** at {hour:02d}:00, the
+                {recommendation['policy']} policy selected **{deploy} trains** to balance
+                passenger waiting time, operational efficiency, and congestion risk under
                 {'peak-hour' if peak_mode else 'off-peak'} conditions.
                 """
             )
 
-            if not rl_available:
+            if capped:
                 st.warning(
-                    "⚠️ RL model not trained yet. "
-                    "Using default Q-values. Train RL agent for optimal performance."
+                    f"⚠️ {recommendation['recommended_trains']} trains recommended, "
+                    f"only {available_trains} available."
                 )
 
     else:
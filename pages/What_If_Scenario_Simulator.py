@@ -3,6 +3,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import date
 
+import backend_client as backend
+
 st.set_page_config(
     page_title="What-If Scenario Simulator",
     layout="wide"
@@ -12,40 +14,21 @@ st.title("🔮 What-If Scenario Simulator")
 st.caption("Strategic AI simulation for metro operational planning")
 
 
-STATIONS = [
-    "Aluva", "Pulinchodu", "Companypady", "Ambattukavu",
-    "Muttom", "Kalamassery", "CUSAT", "Edappally",
-    "Kaloor", "MG Road", "Maharaja’s", "Ernakulam South"
-]
-
-HOURS = list(range(6, 23))  # peak operational hours
-
-BASE_TRAINS = 12
-TRAIN_CAPACITY = 1000
-BASE_HEADWAY = 4  # minutes
-
-def predict_demand(selected_date):
-    """
-    Predict demand based on the same logic used
-    in the demand forecasting dashboard
-    """
-
-    np.random.seed(int(selected_date.strftime("%Y%m%d")))
-
-    is_weekend = 1 if selected_date.weekday() >= 5 else 0
-    total_demand = 0
-
-    for _ in STATIONS:
-        base = np.random.randint(200, 600)
+@st.cache_data(ttl=backend.STATIC_TTL, show_spinner=False)
+def comparison_png(before: tuple, after: tuple) -> bytes:
+    labels = ["Demand", "Waiting Time", "Energy Usage"]
 
-        for hour in HOURS:
-            peak_factor = 1.6 if (8 <= hour <= 10 or 17 <= hour <= 20) else 1.0
-            weekend_factor = 0.8 if is_weekend else 1.0
+    fig, ax = plt.subplots(figsize=(8, 4))
+    x = np.arange(len(labels))
 
-            demand = base * peak_factor * weekend_factor * np.random.uniform(0.85, 1.15)
-            total_demand += demand
+    ax.bar(x - 0.2, before, width=0.4, label="Normal")
+    ax.bar(x + 0.2, after, width=0.4, label="Scenario")
 
-    return int(total_demand)
+    ax.set_xticks(x)
+    ax.set_xticklabels(labels)
+    ax.legend()
+    ax.grid(alpha=0.3)
+    return backend.figure_png(fig)
 
 left, right = st.columns([2, 3])
 
@@ -59,7 +42,14 @@ with left:
             value=date.today()
         )
 
-        BASE_DEMAND = predict_demand(selected_date)
+        try:
+            BASELINE = backend.scenario_baseline(selected_date.isoformat())
+        except backend.BackendError as e:
+            st.error(str(e))
+            st.stop()
+        DAY = BASELINE["calendar"]
+        BASE_DEMAND = int(BASELINE["demand"])
+        DAY_LABEL = DAY["day_type"] + (f", {DAY['holiday']['name']}" if DAY["holiday"] else "")
 
         demand_increase = st.slider(
             "Passenger Demand Increase (%)",
@@ -73,7 +63,7 @@ with left:
 
         st.markdown("### 🌦️ Special Events")
         rain = st.toggle("Rain")
-        festival = st.toggle("Festival / City Event")
+        festival = st.toggle("Festival / City Event", value=DAY["festival"])
 
         run_simulation = st.button(
             "🔁 Run Simulation",
@@ -83,44 +73,32 @@ with left:
 with right:
     st.info(
         f"""
-        📅 **Scenario Date:** {selected_date}  
+        📅 **Scenario Date:** {selected_date} ({DAY_LABEL})  
         👥 **AI-Predicted Base Demand:** {BASE_DEMAND}
         """
     )
 
-def simulate_scenario(demand_inc, trains_down, rain, festival):
-    demand = BASE_DEMAND * (1 + demand_inc / 100)
-
-    if rain:
-        demand *= 1.10
-    if festival:
-        demand *= 1.25
-
-    available_trains = max(2, BASE_TRAINS - trains_down)
-    load_factor = demand / (available_trains * TRAIN_CAPACITY)
-
-    waiting_time = round(BASE_HEADWAY * load_factor, 1)
-    energy_use = round(available_trains * 1.2, 1)
-
-    if load_factor > 1.1:
-        risk = "High"
-    elif load_factor > 0.85:
-        risk = "Medium"
-    else:
-        risk = "Low"
-
-    return demand, available_trains, waiting_time, energy_use, risk
-
 with right:
     st.subheader("📊 Simulation Results")
 
     if run_simulation:
-        sim_demand, sim_trains, sim_wait, sim_energy, sim_risk = simulate_scenario(
-            demand_increase,
-            unavailable_trains,
-            rain,
-            festival
-        )
+        try:
+            result = backend.evaluate_scenario(
+                selected_date.isoformat(),
+                demand_increase,
+                unavailable_trains,
+                rain,
+                festival
+            )
+        except backend.BackendError as e:
+            st.error(str(e))
+            st.stop()
+
+        sim_demand = result["demand"]
+        sim_trains = result["available_trains"]
+        sim_wait = result["waiting_time"]
+        sim_energy = result["energy_use"]
+        sim_risk = result["risk"]
 
         with st.container(border=True):
             c1, c2, c3, c4 = st.columns(4)
@@ -140,7 +118,7 @@ with right:
             c3.metric(
                 "⏱ Avg Waiting Time",
                 f"{sim_wait} min",
-                f"+{round(sim_wait - BASE_HEADWAY, 1)}"
+                f"+{round(sim_wait - BASELINE['waiting_time'], 1)}"
             )
 
             if sim_risk == "Low":
@@ -152,22 +130,9 @@ with right:
 
         st.markdown("### 📈 Before vs After Comparison")
 
-        labels = ["Demand", "Waiting Time", "Energy Usage"]
-        before = [BASE_DEMAND, BASE_HEADWAY, BASE_TRAINS * 1.2]
-        after = [sim_demand, sim_wait, sim_energy]
-
-        fig, ax = plt.subplots(figsize=(8, 4))
-        x = np.arange(len(labels))
-
-        ax.bar(x - 0.2, before, width=0.4, label="Normal")
-        ax.bar(x + 0.2, after, width=0.4, label="Scenario")
-
-        ax.set_xticks(x)
-        ax.set_xticklabels(labels)
-        ax.legend()
-        ax.grid(alpha=0.3)
-
-        st.pyplot(fig)
+        before = (BASELINE["demand"], BASELINE["waiting_time"], BASELINE["energy_use"])
+        after = (sim_demand, sim_wait, sim_energy)
+        st.image(comparison_png(before, after), use_container_width=True)
 
     else:
         st.info("Adjust scenario parameters and click **Run Simulation**")